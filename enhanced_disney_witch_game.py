@@ -1,11 +1,31 @@
+import os
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")  # Keeps the JSON some modes print alone on stdout
+
+import time
+STARTUP_CLOCK = time.perf_counter()  # --startup-profile times from here, before pygame loads
+
 import pygame
+import argparse
+import copy
+import queue
 import random
 import sys
 import math
-import time
+import json
+import struct
+import threading
+import weakref
+import zlib
+from collections import OrderedDict, deque
 
-# Initialize Pygame
-pygame.init()
+from memory_board import BoardModel
+from memory_engine import MATCH_SCORE, REVEAL_TIME, MemoryEngine
+from memory_snapshot import GameSave, load_game
+
+try:
+    import numpy as np
+except ImportError:  # Falls back to the per-object particles
+    np = None
 
 # Constants - FASTER GAMEPLAY
 WINDOW_WIDTH = 1200
@@ -15,9 +35,43 @@ CARD_HEIGHT = 200
 CARD_MARGIN = 20
 ROWS = 3
 COLS = 4
-REVEAL_TIME = 1800  # Faster - reduced from 2500
 CARD_RADIUS = 25
+HOVER_SCALE = 1.08  # Card scale while the pointer is over it
 ANIMATION_SPEED = 15  # Faster animations
+FLIP_WIDTH_STEP = 4  # Flip animation widths are cached in steps of this many pixels
+FAIRY_WING_PHASES = 16  # Pre-rendered wing positions per wing beat
+CARD_SPRITE_CACHE_SIZE = 512  # Maximum number of cached card sprites
+CARD_ART_PROCESSES = (os.cpu_count() or 1) - 1  # Card sprite render processes; none leaves it to a thread
+CARD_ART_CHUNK = 16  # Sprites per render task, cached as each task finishes
+TEXT_CACHE_SIZE = 256  # Maximum number of cached text surfaces
+CELEBRATION_PARTICLES = 30  # Particles per matched card
+VICTORY_PARTICLES = 200  # Particles in the victory explosion
+BACKGROUND_SPARKLES = 100  # Sparkles kept floating in the night sky
+USE_PARTICLE_ENGINE = np is not None  # Array-backed particles instead of one object each
+DIRTY_RECT_RENDERING = False  # Restore and push only the changed parts of the window
+DIRTY_RECT_MAX_FRACTION = 0.5  # Fall back to a full flip above this share of the window
+DIRTY_TILE_SIZE = 16  # Dirty regions are tracked on a grid of this many pixels
+PROFILE_HISTORY = 240  # Frames kept in the rolling phase histograms
+TRACE_MAX_SPANS = 500000  # Oldest trace spans are dropped beyond this
+BACK_EMBLEM_SIZE = 72  # Card back moon-and-stars emblem fits in this square
+CARD_DETAIL_MIN_HEIGHT = 150  # Smaller (zoomed out) cards skip the gem, name and emblem
+LARGE_BOARD_MARGIN = 1  # Rows and columns of live cards kept around the large-board viewport
+LARGE_BOARD_TOP = 210  # Large boards start below the HUD
+CAMERA_ZOOM_STEP = 1.1  # Zoom factor per mouse wheel notch
+CAMERA_MIN_ZOOM = 0.3
+CAMERA_MAX_ZOOM = 1.5
+CAMERA_PAN_SPEED = 14  # Pixels per step while an arrow key is held
+SIM_RATE = 75  # Simulation steps per second; per-step animation speeds are tuned for this rate
+SIM_STEP_MS = 1000 / SIM_RATE
+MAX_SIM_STEPS = 5  # Steps run per rendered frame at most; beyond that the game slows instead of stalling
+RENDER_FPS = 75  # Rendered frame cap
+QUALITY_TARGET_FPS = 60  # Frame rate the quality governor tries to hold
+QUALITY_WINDOW = 60  # Frames in the governor's rolling average
+QUALITY_DOWNGRADE = 1.0  # Drop a level when the average frame takes more than this share of the budget
+QUALITY_UPGRADE = 0.6  # Climb back only while it stays under this share
+QUALITY_UPGRADE_DELAY = 300  # Frames after a change before climbing, doubled when a climb is undone
+QUALITY_MAX_UPGRADE_DELAY = 4800  # The doubling stops here, about a minute at 75 fps
+REPLAY_SYNC_FRAMES = 30  # Recordings store a state checksum this often to catch replay divergence
 
 # Disney-style magical colors
 WITCH_COLORS = [
@@ -39,8 +93,118 @@ CASTLE_LIGHT = (255, 255, 150)
 WITCH_HAT = (75, 0, 130)
 WITCH_DRESS = (138, 43, 226)
 WITCH_SKIN = (255, 220, 177)
+CARD_BACK_COLOR = (60, 40, 120)
+SPARKLE_COLORS = [
+    (255, 255, 255), (255, 215, 0), (255, 192, 203),
+    (173, 216, 230), (144, 238, 144), (221, 160, 221)
+]
 FAIRY_COLORS = [(255, 192, 203), (173, 216, 230), (144, 238, 144), (255, 215, 0)]
 
+# Effect budgets from cheapest to full quality; the quality governor moves between them
+QUALITY_LEVELS = [
+    {"name": "minimal", "background_sparkles": 15, "fairies": 1, "fairy_trail": 0, "stars": 40,
+     "castles": 1, "celebration_particles": 6, "victory_particles": 40, "glow": False, "shadows": False},
+    {"name": "low", "background_sparkles": 40, "fairies": 2, "fairy_trail": 3, "stars": 75,
+     "castles": 2, "celebration_particles": 12, "victory_particles": 80, "glow": False, "shadows": True},
+    {"name": "medium", "background_sparkles": 70, "fairies": 4, "fairy_trail": 5, "stars": 110,
+     "castles": 3, "celebration_particles": 20, "victory_particles": 140, "glow": True, "shadows": True},
+    {"name": "high", "background_sparkles": BACKGROUND_SPARKLES, "fairies": 6, "fairy_trail": 8, "stars": 150,
+     "castles": 4, "celebration_particles": CELEBRATION_PARTICLES, "victory_particles": VICTORY_PARTICLES,
+     "glow": True, "shadows": True},
+]
+QUALITY_NAMES = [level["name"] for level in QUALITY_LEVELS]
+
+# Game time comes from here so benchmarks and replays can drive a virtual clock
+tick_source = pygame.time.get_ticks
+
+def get_ticks():
+    """Milliseconds of game time"""
+    return tick_source()
+
+def set_tick_source(source=None):
+    """Replace the game clock with a zero-argument callable, or restore the real one"""
+    global tick_source
+    tick_source = source if source is not None else pygame.time.get_ticks
+
+def init_pygame():
+    """Start only the subsystems the game uses; audio and joysticks stay off"""
+    pygame.display.init()
+    pygame.font.init()
+    pygame.time.wait(0)  # Also starts SDL's timer, without which get_ticks() stays at 0
+
+def vertical_gradient(width, height, color_at, flags=0):
+    """Surface whose rows are color_at(y), filled a row at a time (much cheaper than drawing lines)"""
+    surface = pygame.Surface((width, height), flags)
+    for y in range(height):
+        surface.fill(color_at(y), (0, y, width, 1))
+    return surface
+
+class FixedTimestep:
+    """Spends frame time in whole simulation steps of step_ms.
+    
+    Elapsed frame time goes into an accumulator and every full step runs one
+    update, so animation speed is independent of the frame rate. A slow frame
+    runs several updates before the next render, at most max_steps; time
+    beyond that is dropped. alpha is how far into the next step the frame
+    time has got, for interpolating what is drawn.
+    """
+    def __init__(self, now, step_ms=SIM_STEP_MS, max_steps=MAX_SIM_STEPS):
+        self.step_ms = step_ms
+        self.max_steps = max_steps
+        self.start = now
+        self.steps = 0
+        self.last = now
+        self.accumulator = 0.0
+        self.dropped_ms = 0.0  # Frame time given up because rendering fell too far behind
+    
+    def ticks(self):
+        """Milliseconds of simulation time; the game clock while the loop runs"""
+        return int(self.start + self.steps * self.step_ms)
+    
+    def advance(self, now):
+        """Add the time since the last frame and return how many steps to run"""
+        self.accumulator += now - self.last
+        self.last = now
+        steps = int(self.accumulator // self.step_ms)
+        if steps > self.max_steps:
+            excess = (steps - self.max_steps) * self.step_ms
+            self.accumulator -= excess
+            self.dropped_ms += excess
+            steps = self.max_steps
+        return steps
+    
+    def step(self):
+        self.accumulator -= self.step_ms
+        self.steps += 1
+    
+    @property
+    def alpha(self):
+        return self.accumulator / self.step_ms
+
+def interpolate(objects, alpha):
+    """Move each object alpha of the way from its previous step to its current state.
+    
+    Objects list the attributes to blend in INTERPOLATED and keep their values
+    from before the last update in previous (None to draw as is). Returns what
+    restore_interpolated() needs to put the current state back after drawing.
+    """
+    saved = []
+    for obj in objects:
+        previous = obj.previous
+        if previous is None:
+            continue
+        names = obj.INTERPOLATED
+        current = tuple(getattr(obj, name) for name in names)
+        saved.append((obj, current))
+        for name, before, after in zip(names, previous, current):
+            setattr(obj, name, before + (after - before) * alpha)
+    return saved
+
+def restore_interpolated(saved):
+    for obj, current in saved:
+        for name, value in zip(obj.INTERPOLATED, current):
+            setattr(obj, name, value)
+
 class Moon:
     def __init__(self):
         self.x = WINDOW_WIDTH - 150
@@ -49,7 +213,11 @@ class Moon:
         self.glow_intensity = 0
     
     def update(self):
-        self.glow_intensity = 0.3 + 0.2 * math.sin(pygame.time.get_ticks() * 0.003)  # Faster
+        self.glow_intensity = 0.3 + 0.2 * math.sin(get_ticks() * 0.003)  # Faster
+    
+    def get_bounds(self):
+        glow_radius = int(self.radius + 20 * self.glow_intensity)
+        return (int(self.x) - glow_radius, int(self.y) - glow_radius, glow_radius * 2 + 1, glow_radius * 2 + 1)
     
     def draw(self, screen):
         # Draw moon glow
@@ -68,6 +236,9 @@ class Moon:
         pygame.draw.circle(screen, (240, 240, 200), (int(self.x - 5), int(self.y + 12)), 4)
 
 class TangleCastle:
+    # Pre-render static geometry into a layer and only draw the animated parts each frame
+    use_static_layer = True
+    
     def __init__(self, x, y, scale=1.0):
         self.x = x
         self.y = y
@@ -75,51 +246,167 @@ class TangleCastle:
         self.width = int(250 * scale)
         self.height = int(180 * scale)
         self.window_glow = 0
+        self.static_layer = None
+        self.layer_key = None
+        self.layer_origin = (0, 0)
         
     def update(self):
-        self.window_glow = 0.5 + 0.3 * math.sin(pygame.time.get_ticks() * 0.004)
+        self.window_glow = 0.5 + 0.3 * math.sin(get_ticks() * 0.004)
+    
+    def snapshot(self):
+        """Copy to draw elsewhere, sharing a static layer built here first"""
+        if self.use_static_layer and (self.static_layer is None or self.layer_key != (self.scale, self.x, self.y)):
+            self.build_static_layer()
+        return copy.copy(self)
+    
+    def move_to(self, x, y):
+        """Move the castle and drop its cached layer"""
+        self.x = x
+        self.y = y
+        self.invalidate_layer()
+    
+    def invalidate_layer(self):
+        self.static_layer = None
+        self.layer_key = None
+    
+    def get_towers(self, x, y):
+        """Tower rectangles for a castle drawn with its top-left at (x, y)"""
+        return [
+            # Left tower - tall and thin
+            {'x': x - 10, 'y': y - 20, 'w': int(50 * self.scale), 'h': int(100 * self.scale)},
+            # Right tower - medium
+            {'x': x + self.width - 40, 'y': y - 10, 'w': int(45 * self.scale), 'h': int(80 * self.scale)},
+            # Center tower - tallest (Rapunzel's tower)
+            {'x': x + self.width//2 - 25, 'y': y - 60, 'w': int(50 * self.scale), 'h': int(140 * self.scale)},
+            # Left-center tower
+            {'x': x + 60, 'y': y - 30, 'w': int(40 * self.scale), 'h': int(90 * self.scale)},
+            # Right-center tower
+            {'x': x + self.width - 100, 'y': y - 25, 'w': int(42 * self.scale), 'h': int(85 * self.scale)},
+        ]
+    
+    def get_rapunzel_window(self, x, y):
+        """Position of the top window of the center tower"""
+        tower = self.get_towers(x, y)[2]
+        window_count = max(2, tower['h'] // 30)
+        window_y = tower['y'] + 20 + (window_count - 1) * (tower['h'] - 40) // window_count
+        window_x = tower['x'] + tower['w']//2 - 6
+        return window_x, window_y
+    
+    def get_bounds(self):
+        """Screen rectangle covering everything the castle draws"""
+        roof_height = int(25 * self.scale)
+        towers = self.get_towers(self.x, self.y)
+        left = min([self.x] + [tower['x'] - 5 for tower in towers])
+        top = min(tower['y'] for tower in towers) - roof_height - 5
+        wall_right = self.x + 30 + 5 * ((self.width - 60) // 4)
+        right = max([wall_right, self.x + self.width] + [tower['x'] + tower['w'] + 6 for tower in towers])
+        bottom = self.y + self.height + 1
+        return pygame.Rect(left, top, right - left, bottom - top)
+    
+    def build_static_layer(self):
+        """Render the static geometry into layers below and above Rapunzel's window"""
+        bounds = self.get_bounds()
+        under = pygame.Surface(bounds.size, pygame.SRCALPHA)
+        over = pygame.Surface(bounds.size, pygame.SRCALPHA)
+        self.draw_geometry(under, self.x - bounds.x, self.y - bounds.y, over)
+        self.static_layer = (under, over)
+        self.layer_origin = bounds.topleft
+        self.layer_key = (self.scale, self.x, self.y)
     
     def draw(self, screen):
+        if not self.use_static_layer:
+            self.draw_geometry(screen, self.x, self.y)
+            return
+        
+        if self.static_layer is None or self.layer_key != (self.scale, self.x, self.y):
+            self.build_static_layer()
+        under, over = self.static_layer
+        screen.blit(under, self.layer_origin)
+        self.draw_animated(screen)
+        screen.blit(over, self.layer_origin)
+    
+    def draw_animated(self, screen):
+        """Draw only the parts that change every frame between the static layers"""
+        window_x, window_y = self.get_rapunzel_window(self.x, self.y)
+        self.draw_rapunzel_window(screen, window_x, window_y)
+    
+    def get_animated_bounds(self):
+        """Screen rectangle covering the window glow and hair"""
+        window_x, window_y = self.get_rapunzel_window(self.x, self.y)
+        return (window_x - 6, window_y - 6, 24, 16 + 7 * 8 + 10)
+    
+    def draw_animated_patch(self, screen):
+        """Redraw the animated window on a background that already holds both static layers"""
+        if self.static_layer is None or self.layer_key != (self.scale, self.x, self.y):
+            self.build_static_layer()
+        self.draw_animated(screen)
+        
+        # Put back whatever the upper layer covers inside the patch
+        x, y, w, h = self.get_animated_bounds()
+        origin_x, origin_y = self.layer_origin
+        screen.blit(self.static_layer[1], (x, y), (x - origin_x, y - origin_y, w, h))
+    
+    def draw_rapunzel_window(self, screen, window_x, window_y):
+        # Rapunzel's glowing window
+        glow_intensity = self.window_glow
+        window_color = (255, 255, 150, int(200 * glow_intensity))
+        
+        # Window glow effect
+        glow_surf = pygame.Surface((24, 24), pygame.SRCALPHA)
+        pygame.draw.circle(glow_surf, window_color, (12, 12), 12)
+        screen.blit(glow_surf, (window_x - 6, window_y - 6))
+        
+        # Bright window
+        pygame.draw.rect(screen, (255, 255, 200), (window_x, window_y, 12, 16))
+        
+        # Hair flowing from window (Rapunzel's hair)
+        hair_points = []
+        for h in range(8):
+            hair_x = window_x + 6 + math.sin(get_ticks() * 0.002 + h) * 3
+            hair_y = window_y + 16 + h * 8
+            hair_points.append((hair_x, hair_y))
+        
+        if len(hair_points) > 1:
+            pygame.draw.lines(screen, (255, 215, 0), False, hair_points, 3)
+    
+    def draw_geometry(self, screen, x, y, over=None):
+        """Draw the castle at (x, y).
+        
+        With an `over` surface, Rapunzel's window is left out and everything
+        drawn after it goes to `over` so the window can be layered in between.
+        """
+        # Everything drawn after Rapunzel's window switches to the over surface
+        target = screen
+        
         # Main castle foundation
-        foundation = pygame.Rect(self.x, self.y + self.height - 40, self.width, 40)
-        pygame.draw.rect(screen, (30, 30, 60), foundation)
+        foundation = pygame.Rect(x, y + self.height - 40, self.width, 40)
+        pygame.draw.rect(target, (30, 30, 60), foundation)
         
         # Main castle body - Tangled style with curves
-        main_body = pygame.Rect(self.x + 30, self.y + 60, self.width - 60, self.height - 60)
-        pygame.draw.rect(screen, CASTLE_COLOR, main_body)
+        main_body = pygame.Rect(x + 30, y + 60, self.width - 60, self.height - 60)
+        pygame.draw.rect(target, CASTLE_COLOR, main_body)
         
         # Curved castle walls
         for i in range(5):
-            curve_x = self.x + 30 + i * (self.width - 60) // 4
+            curve_x = x + 30 + i * (self.width - 60) // 4
             curve_height = int(20 * math.sin(i * 0.8) * self.scale)
-            curve_rect = pygame.Rect(curve_x, self.y + 60 - curve_height, 
+            curve_rect = pygame.Rect(curve_x, y + 60 - curve_height, 
                                    (self.width - 60) // 4, self.height - 60 + curve_height)
-            pygame.draw.rect(screen, (50, 50, 90), curve_rect)
+            pygame.draw.rect(target, (50, 50, 90), curve_rect)
         
         # Multiple towers - Tangled style
-        towers = [
-            # Left tower - tall and thin
-            {'x': self.x - 10, 'y': self.y - 20, 'w': int(50 * self.scale), 'h': int(100 * self.scale)},
-            # Right tower - medium
-            {'x': self.x + self.width - 40, 'y': self.y - 10, 'w': int(45 * self.scale), 'h': int(80 * self.scale)},
-            # Center tower - tallest (Rapunzel's tower)
-            {'x': self.x + self.width//2 - 25, 'y': self.y - 60, 'w': int(50 * self.scale), 'h': int(140 * self.scale)},
-            # Left-center tower
-            {'x': self.x + 60, 'y': self.y - 30, 'w': int(40 * self.scale), 'h': int(90 * self.scale)},
-            # Right-center tower
-            {'x': self.x + self.width - 100, 'y': self.y - 25, 'w': int(42 * self.scale), 'h': int(85 * self.scale)},
-        ]
+        towers = self.get_towers(x, y)
         
         # Draw towers with Tangled-style details
         for i, tower in enumerate(towers):
             # Tower body
             tower_rect = pygame.Rect(tower['x'], tower['y'], tower['w'], tower['h'])
-            pygame.draw.rect(screen, CASTLE_COLOR, tower_rect)
+            pygame.draw.rect(target, CASTLE_COLOR, tower_rect)
             
             # Tower decorative bands
             for band in range(3):
                 band_y = tower['y'] + band * tower['h'] // 3
-                pygame.draw.rect(screen, (60, 60, 120), 
+                pygame.draw.rect(target, (60, 60, 120), 
                                (tower['x'], band_y, tower['w'], 3))
             
             # Conical roof - Tangled style
@@ -129,10 +416,10 @@ class TangleCastle:
                 (tower['x'] - 5, tower['y']),
                 (tower['x'] + tower['w'] + 5, tower['y'])
             ]
-            pygame.draw.polygon(screen, (80, 40, 120), roof_points)
+            pygame.draw.polygon(target, (80, 40, 120), roof_points)
             
             # Roof decorative elements
-            pygame.draw.circle(screen, (120, 80, 160), 
+            pygame.draw.circle(target, (120, 80, 160), 
                              (tower['x'] + tower['w']//2, tower['y'] - roof_height), 4)
             
             # Tower windows with magical glow
@@ -143,46 +430,29 @@ class TangleCastle:
                 
                 # Special glowing window for center tower (Rapunzel's)
                 if i == 2 and w == window_count - 1:  # Top window of center tower
-                    # Rapunzel's glowing window
-                    glow_intensity = self.window_glow
-                    window_color = (255, 255, 150, int(200 * glow_intensity))
-                    
-                    # Window glow effect
-                    glow_surf = pygame.Surface((24, 24), pygame.SRCALPHA)
-                    pygame.draw.circle(glow_surf, window_color, (12, 12), 12)
-                    screen.blit(glow_surf, (window_x - 6, window_y - 6))
-                    
-                    # Bright window
-                    pygame.draw.rect(screen, (255, 255, 200), (window_x, window_y, 12, 16))
-                    
-                    # Hair flowing from window (Rapunzel's hair)
-                    hair_points = []
-                    for h in range(8):
-                        hair_x = window_x + 6 + math.sin(pygame.time.get_ticks() * 0.002 + h) * 3
-                        hair_y = window_y + 16 + h * 8
-                        hair_points.append((hair_x, hair_y))
-                    
-                    if len(hair_points) > 1:
-                        pygame.draw.lines(screen, (255, 215, 0), False, hair_points, 3)
+                    if over is None:
+                        self.draw_rapunzel_window(target, window_x, window_y)
+                    else:
+                        target = over  # Drawn each frame by draw_animated
                 else:
                     # Regular windows
-                    pygame.draw.rect(screen, CASTLE_LIGHT, (window_x, window_y, 12, 16))
+                    pygame.draw.rect(target, CASTLE_LIGHT, (window_x, window_y, 12, 16))
                 
                 # Window frame
-                pygame.draw.rect(screen, (100, 100, 140), (window_x - 1, window_y - 1, 14, 18), 2)
+                pygame.draw.rect(target, (100, 100, 140), (window_x - 1, window_y - 1, 14, 18), 2)
         
         # Castle gate
         gate_width = int(40 * self.scale)
         gate_height = int(50 * self.scale)
-        gate_x = self.x + self.width//2 - gate_width//2
-        gate_y = self.y + self.height - gate_height
+        gate_x = x + self.width//2 - gate_width//2
+        gate_y = y + self.height - gate_height
         
         # Gate arch
-        pygame.draw.rect(screen, (20, 20, 40), (gate_x, gate_y, gate_width, gate_height))
-        pygame.draw.arc(screen, (20, 20, 40), (gate_x, gate_y - gate_width//2, gate_width, gate_width), 0, math.pi, gate_width//4)
+        pygame.draw.rect(target, (20, 20, 40), (gate_x, gate_y, gate_width, gate_height))
+        pygame.draw.arc(target, (20, 20, 40), (gate_x, gate_y - gate_width//2, gate_width, gate_width), 0, math.pi, gate_width//4)
         
         # Gate details
-        pygame.draw.rect(screen, (60, 60, 100), (gate_x + 5, gate_y + 10, gate_width - 10, gate_height - 10))
+        pygame.draw.rect(target, (60, 60, 100), (gate_x + 5, gate_y + 10, gate_width - 10, gate_height - 10))
         
         # Decorative flags on towers
         for i, tower in enumerate(towers):
@@ -195,9 +465,21 @@ class TangleCastle:
                     (flag_x + 12, flag_y + 12),
                     (flag_x, flag_y + 8)
                 ]
-                pygame.draw.polygon(screen, (160, 80, 200), flag_points)
+                pygame.draw.polygon(target, (160, 80, 200), flag_points)
+
+def castle_layout():
+    """Castle positions and scales for the current window size"""
+    return [
+        (WINDOW_WIDTH - 350, WINDOW_HEIGHT - 220, 1.2),  # Main large castle
+        (WINDOW_WIDTH - 600, WINDOW_HEIGHT - 180, 0.8),  # Medium castle
+        (50, WINDOW_HEIGHT - 160, 0.6),                  # Small left castle
+        (WINDOW_WIDTH - 150, WINDOW_HEIGHT - 140, 0.5),  # Tiny right castle
+    ]
 
 class FlyingFairy:
+    INTERPOLATED = ('x', 'y')
+    trail_length = 8  # Trail points kept; lowered by the quality governor
+    
     def __init__(self):
         self.x = random.uniform(-50, WINDOW_WIDTH + 50)
         self.y = random.uniform(100, 400)
@@ -210,14 +492,16 @@ class FlyingFairy:
         self.wing_beat = 0
         self.trail = []
         self.size = random.uniform(0.8, 1.2)
+        self.previous = None
         
     def update(self):
         # Move fairy
+        self.previous = (self.x, self.y)
         self.x += self.speed * self.direction_x
-        self.y += self.direction_y + math.sin(pygame.time.get_ticks() * self.bob_speed) * 0.5
+        self.y += self.direction_y + math.sin(get_ticks() * self.bob_speed) * 0.5
         
         # Wing beating animation - faster
-        self.wing_beat = pygame.time.get_ticks() * 0.02
+        self.wing_beat = get_ticks() * 0.02
         
         # Reverse direction at edges
         if self.x < -100 or self.x > WINDOW_WIDTH + 100:
@@ -229,61 +513,99 @@ class FlyingFairy:
         
         # Add to trail
         self.trail.append((self.x, self.y))
-        if len(self.trail) > 8:  # Shorter trail for performance
+        while len(self.trail) > self.trail_length:
             self.trail.pop(0)
     
+    def snapshot(self):
+        clone = copy.copy(self)
+        clone.trail = list(self.trail)
+        return clone
+    
+    def get_bounds(self):
+        xs = [trail_x for trail_x, _ in self.trail] + [self.x]
+        ys = [trail_y for _, trail_y in self.trail] + [self.y]
+        left, top = int(min(xs)) - 10, int(min(ys)) - 10
+        return (left, top, int(max(xs)) + 11 - left, int(max(ys)) + 11 - top)
+    
     def draw(self, screen):
-        # Draw fairy trail
+        sprites = FairySprites.get(self.color, int(4 * self.size))
+        sheet = sprites.sheet
+        batch = []
+        
+        # Trail dots, fading in towards the fairy
+        trail_count = len(self.trail)
         for i, (trail_x, trail_y) in enumerate(self.trail):
-            alpha = int(100 * (i / len(self.trail)))
+            alpha = int(100 * (i / trail_count))
             if alpha > 0:
-                trail_surf = pygame.Surface((6, 6), pygame.SRCALPHA)
-                trail_color = (*self.color, alpha)
-                pygame.draw.circle(trail_surf, trail_color, (3, 3), 3)
-                screen.blit(trail_surf, (int(trail_x - 3), int(trail_y - 3)))
+                batch.append((sheet, (int(trail_x - 3), int(trail_y - 3)), sprites.dots[alpha]))
         
-        # Fairy body
+        # Wings at the nearest pre-rendered beat phase, then the glowing body
         body_x, body_y = int(self.x), int(self.y)
-        body_size = int(4 * self.size)
-        
-        # Wings - animated
-        wing_offset = math.sin(self.wing_beat) * 3
-        wing_color = (*self.color, 150)
-        
-        # Wing surfaces
-        wing_surf = pygame.Surface((16, 12), pygame.SRCALPHA)
-        
-        # Left wing
-        left_wing_points = [
-            (8 - wing_offset, 6),
-            (2, 2 + wing_offset),
-            (0, 8),
-            (4, 10 - wing_offset)
-        ]
-        pygame.draw.polygon(wing_surf, wing_color, left_wing_points)
-        
-        # Right wing
-        right_wing_points = [
-            (8 + wing_offset, 6),
-            (14, 2 + wing_offset),
-            (16, 8),
-            (12, 10 - wing_offset)
-        ]
-        pygame.draw.polygon(wing_surf, wing_color, right_wing_points)
-        
-        screen.blit(wing_surf, (body_x - 8, body_y - 6))
-        
-        # Fairy body (glowing)
-        glow_surf = pygame.Surface((body_size * 3, body_size * 3), pygame.SRCALPHA)
-        glow_color = (*self.color, 80)
-        pygame.draw.circle(glow_surf, glow_color, (body_size * 3 // 2, body_size * 3 // 2), body_size * 3 // 2)
-        screen.blit(glow_surf, (body_x - body_size * 3 // 2, body_y - body_size * 3 // 2))
-        
-        # Fairy core
-        pygame.draw.circle(screen, self.color, (body_x, body_y), body_size)
-        pygame.draw.circle(screen, (255, 255, 255), (body_x, body_y), body_size // 2)
+        phase = round(self.wing_beat * FAIRY_WING_PHASES / math.tau) % FAIRY_WING_PHASES
+        batch.append((sheet, (body_x - 8, body_y - 6), sprites.wings[phase]))
+        glow_x, glow_y = sprites.glow_anchor
+        batch.append((sheet, (body_x - glow_x, body_y - glow_y), sprites.glow))
+        batch.append((sheet, (body_x - sprites.body_size, body_y - sprites.body_size), sprites.core))
+        screen.blits(batch, doreturn=False)
+
+class FairySprites:
+    """A fairy color and body size pre-rendered into one sheet.
+    
+    The sheet holds every wing-beat phase, the body glow and core, and a trail
+    dot for each alpha a trail can use, so drawing a fairy is a batch of
+    region blits instead of new surfaces and polygons every frame.
+    """
+    sheets = {}  # (color, body_size) -> FairySprites
+    TRAIL_ALPHAS = sorted({int(100 * (i / count)) for count in range(1, QUALITY_LEVELS[-1]["fairy_trail"] + 1)
+                           for i in range(count)} - {0})
+    
+    @classmethod
+    def get(cls, color, body_size):
+        sprites = cls.sheets.get((color, body_size))
+        if sprites is None:
+            sprites = cls.sheets[(color, body_size)] = cls(color, body_size)
+        return sprites
+    
+    def __init__(self, color, body_size):
+        self.body_size = body_size
+        glow_size = body_size * 3
+        core_size = body_size * 2 + 1
+        row_height = max(glow_size, core_size, 6)
+        width = max(16 * FAIRY_WING_PHASES, glow_size + core_size + 6 * len(self.TRAIL_ALPHAS))
+        self.sheet = pygame.Surface((width, 12 + row_height), pygame.SRCALPHA)
+        
+        # Top row: wing frames across one beat
+        wing_color = (*color, 150)
+        self.wings = []
+        for phase in range(FAIRY_WING_PHASES):
+            area = pygame.Rect(phase * 16, 0, 16, 12)
+            wing_offset = math.sin(math.tau * phase / FAIRY_WING_PHASES) * 3
+            wing_surf = self.sheet.subsurface(area)
+            pygame.draw.polygon(wing_surf, wing_color, [
+                (8 - wing_offset, 6), (2, 2 + wing_offset), (0, 8), (4, 10 - wing_offset)])
+            pygame.draw.polygon(wing_surf, wing_color, [
+                (8 + wing_offset, 6), (14, 2 + wing_offset), (16, 8), (12, 10 - wing_offset)])
+            self.wings.append(area)
+        
+        # Bottom row: glow, core, then the trail dots
+        self.glow = pygame.Rect(0, 12, glow_size, glow_size)
+        self.glow_anchor = (glow_size // 2, glow_size // 2)
+        pygame.draw.circle(self.sheet.subsurface(self.glow), (*color, 80), self.glow_anchor, glow_size // 2)
+        
+        self.core = pygame.Rect(glow_size, 12, core_size, core_size)
+        core_surf = self.sheet.subsurface(self.core)
+        pygame.draw.circle(core_surf, color, (body_size, body_size), body_size)
+        pygame.draw.circle(core_surf, (255, 255, 255), (body_size, body_size), body_size // 2)
+        
+        self.dots = {}
+        for i, alpha in enumerate(self.TRAIL_ALPHAS):
+            area = pygame.Rect(glow_size + core_size + i * 6, 12, 6, 6)
+            pygame.draw.circle(self.sheet.subsurface(area), (*color, alpha), (3, 3), 3)
+            self.dots[alpha] = area
 
 class FlyingWitch:
+    INTERPOLATED = ('x', 'y', 'bob_offset')
+    
     def __init__(self):
         self.x = -100
         self.y = 200
@@ -291,9 +613,13 @@ class FlyingWitch:
         self.bob_offset = 0
         self.direction = 1
         self.size = 1.0
+        # Draw-time jitter has its own generator so rendering never shifts the game's random stream
+        self.jitter = random.Random(random.getrandbits(32))
+        self.previous = None
     
     def update(self):
         # Move witch across screen - faster
+        self.previous = (self.x, self.y, self.bob_offset)
         self.x += self.speed * self.direction
         
         # Reverse direction when reaching edges
@@ -305,7 +631,11 @@ class FlyingWitch:
             self.y = random.uniform(150, 300)
         
         # Bobbing motion - faster
-        self.bob_offset = math.sin(pygame.time.get_ticks() * 0.008) * 10
+        self.bob_offset = math.sin(get_ticks() * 0.008) * 10
+    
+    def get_bounds(self):
+        # Broom, bristles, hat and the random sparkles around her
+        return (int(self.x) - 38, int(self.y + self.bob_offset) - 28, 84, 72)
     
     def draw(self, screen):
         current_y = self.y + self.bob_offset
@@ -323,7 +653,7 @@ class FlyingWitch:
         # Broom bristles
         for i in range(8):
             bristle_x = broom_end[0] - 15 + i * 2
-            bristle_y = broom_end[1] + random.randint(-5, 5)
+            bristle_y = broom_end[1] + self.jitter.randint(-5, 5)
             pygame.draw.line(screen, (205, 133, 63), 
                            (bristle_x, bristle_y), (bristle_x + 10, bristle_y + 8), 2)
         
@@ -365,28 +695,20 @@ class FlyingWitch:
         
         # Magic sparkles around witch
         for i in range(5):
-            sparkle_x = head_x + random.randint(-30, 30)
-            sparkle_y = int(current_y) + random.randint(-20, 20)
-            sparkle_size = random.randint(2, 4)
-            color = random.choice([(255, 215, 0), (255, 192, 203), (173, 216, 230)])
+            sparkle_x = head_x + self.jitter.randint(-30, 30)
+            sparkle_y = int(current_y) + self.jitter.randint(-20, 20)
+            sparkle_size = self.jitter.randint(2, 4)
+            color = self.jitter.choice([(255, 215, 0), (255, 192, 203), (173, 216, 230)])
             
             # Draw sparkle as a star
             self.draw_sparkle(screen, sparkle_x, sparkle_y, sparkle_size, color)
     
     def draw_sparkle(self, screen, x, y, size, color):
         # Draw a simple 4-pointed star
-        points = [
-            (x, y - size),
-            (x + size//2, y - size//2),
-            (x + size, y),
-            (x + size//2, y + size//2),
-            (x, y + size),
-            (x - size//2, y + size//2),
-            (x - size, y),
-            (x - size//2, y - size//2)
-        ]
-        if len(points) >= 3:
-            pygame.draw.polygon(screen, color, points)
+        if STAMP_ATLAS.enabled:
+            STAMP_ATLAS.draw(screen, 'sparkle', x, y, size, color)
+            return
+        pygame.draw.polygon(screen, color, sparkle_points(x, y, size))
 
 class MagicalSparkle:
     def __init__(self, x, y):
@@ -398,10 +720,7 @@ class MagicalSparkle:
         self.twinkle_speed = random.uniform(0.08, 0.2)  # Faster twinkling
         self.drift_x = random.uniform(-0.5, 0.5)
         self.drift_y = random.uniform(-1.2, -0.4)  # Faster drift
-        self.color = random.choice([
-            (255, 255, 255), (255, 215, 0), (255, 192, 203),
-            (173, 216, 230), (144, 238, 144), (221, 160, 221)
-        ])
+        self.color = random.choice(SPARKLE_COLORS)
     
     def update(self):
         self.x += self.drift_x
@@ -409,15 +728,21 @@ class MagicalSparkle:
         self.life -= 1.5  # Faster decay
         return self.life > 0
     
+    def get_bounds(self):
+        size = int(self.size) + 1
+        return (int(self.x) - size * 2 - 1, int(self.y) - size * 2 - 1, size * 4 + 2, size * 4 + 2)
+    
     def draw(self, screen):
         if self.life <= 0:
             return
         
         alpha = int(255 * (self.life / self.max_life))
-        twinkle = abs(math.sin(pygame.time.get_ticks() * self.twinkle_speed))
+        twinkle = abs(math.sin(get_ticks() * self.twinkle_speed))
         size = int(self.size * twinkle * (self.life / self.max_life))
         
-        if size > 0:
+        if size > 0 and STAMP_ATLAS.enabled:
+            STAMP_ATLAS.draw(screen, 'cross', self.x, self.y, size, self.color, alpha)
+        elif size > 0:
             sparkle_surf = pygame.Surface((size * 4, size * 4), pygame.SRCALPHA)
             color_with_alpha = (*self.color, alpha)
             
@@ -449,6 +774,421 @@ def draw_rounded_rect(surface, color, rect, radius):
     
     surface.blit(rounded_surf, rect.topleft)
 
+def star_points(x, y, outer_radius, inner_radius, rotation=0.0):
+    """Points of a 5-pointed star, with rotation in radians"""
+    points = []
+    for i in range(10):
+        angle = i * math.pi / 5 + rotation
+        radius = outer_radius if i % 2 == 0 else inner_radius
+        points.append((x + radius * math.cos(angle), y + radius * math.sin(angle)))
+    return points
+
+def sparkle_points(x, y, size):
+    """Points of a simple 4-pointed star, also used as the gem outline"""
+    return [
+        (x, y - size),
+        (x + size//2, y - size//2),
+        (x + size, y),
+        (x + size//2, y + size//2),
+        (x, y + size),
+        (x - size//2, y + size//2),
+        (x - size, y),
+        (x - size//2, y - size//2)
+    ]
+
+class StampAtlas:
+    """Small shapes pre-rasterized once into shared sheets and drawn as region blits.
+    
+    Stamps are indexed by shape, size, rotation step, color and alpha bucket.
+    """
+    # Rotational symmetry in degrees for shapes that rotate
+    SYMMETRY = {'particle_star': 72}
+    
+    def __init__(self, sheet_size=1024, rotation_steps=12, alpha_step=16):
+        self.sheet_size = sheet_size
+        self.rotation_steps = rotation_steps
+        self.alpha_step = alpha_step
+        self.enabled = True
+        self.sheet = None
+        self.regions = {}
+        self.shelf_x = self.shelf_y = self.shelf_height = 0
+        self.hits = 0
+        self.misses = 0
+        self.sheets_filled = 0
+    
+    def anchor(self, shape, size):
+        """Offset from a stamp's top-left corner to the point it is drawn around"""
+        if shape == 'particle_star':
+            return size
+        if shape == 'cross':
+            return size * 2
+        return size + 1
+    
+    def extent(self, shape, size):
+        if shape == 'particle_star':
+            return size * 2
+        if shape == 'cross':
+            return size * 4
+        return size * 2 + 3
+    
+    def render(self, surface, shape, x, y, size, rotation_step, color):
+        """Rasterize one shape around (x, y) the same way the direct draw code does"""
+        if shape == 'particle_star':
+            rotation = math.radians(rotation_step * self.SYMMETRY[shape] / self.rotation_steps)
+            pygame.draw.polygon(surface, color, star_points(x, y, size * 0.8, size * 0.4, rotation))
+        elif shape == 'cross':
+            pygame.draw.line(surface, color, (x - size, y), (x + size, y), 2)
+            pygame.draw.line(surface, color, (x, y - size), (x, y + size), 2)
+        elif shape == 'star':
+            pygame.draw.polygon(surface, color, star_points(x, y, size, size * 0.4, -math.pi / 2))
+        elif shape == 'sparkle':
+            pygame.draw.polygon(surface, color, sparkle_points(x, y, size))
+        elif shape == 'gem':
+            points = sparkle_points(x, y, size)
+            pygame.draw.polygon(surface, color, points)
+            inner_points = [(px + (x-px)*0.3, py + (y-py)*0.3) for px, py in points]
+            pygame.draw.polygon(surface, (255, 255, 255, color[3]), inner_points)
+    
+    def new_sheet(self):
+        if self.sheet is not None:
+            self.sheets_filled += 1
+        # Regions already handed out keep the old sheet alive until they are drawn
+        self.sheet = pygame.Surface((self.sheet_size, self.sheet_size), pygame.SRCALPHA)
+        self.regions = {}
+        self.shelf_x = self.shelf_y = self.shelf_height = 0
+    
+    def region(self, shape, size, rotation_step, color, alpha_bucket):
+        """Return (sheet, area) for an already quantized stamp, rasterizing it on a miss"""
+        key = (shape, size, rotation_step, color, alpha_bucket)
+        region = self.regions.get(key)
+        if region is not None:
+            self.hits += 1
+            return region
+        
+        self.misses += 1
+        extent = self.extent(shape, size)
+        if self.sheet is None:
+            self.new_sheet()
+        if self.shelf_x + extent > self.sheet_size:
+            # Start a new shelf below the current one
+            self.shelf_x = 0
+            self.shelf_y += self.shelf_height
+            self.shelf_height = 0
+        if self.shelf_y + extent > self.sheet_size:
+            self.new_sheet()
+        
+        area = pygame.Rect(self.shelf_x, self.shelf_y, extent, extent)
+        self.shelf_x += extent
+        self.shelf_height = max(self.shelf_height, extent)
+        
+        # The top bucket stays fully opaque so solid shapes match direct drawing
+        if alpha_bucket >= 255 // self.alpha_step:
+            alpha = 255
+        else:
+            alpha = alpha_bucket * self.alpha_step + self.alpha_step // 2
+        anchor = self.anchor(shape, size)
+        self.render(self.sheet.subsurface(area), shape, anchor, anchor, size, rotation_step, (*color, alpha))
+        region = (self.sheet, area)
+        self.regions[key] = region
+        return region
+    
+    def quantize(self, shape, rotation, alpha):
+        """Rotation step and alpha bucket for a rotation in degrees and an alpha value"""
+        symmetry = self.SYMMETRY.get(shape)
+        rotation_step = 0
+        if symmetry:
+            rotation_step = round(rotation * self.rotation_steps / symmetry) % self.rotation_steps
+        return rotation_step, min(255, alpha) // self.alpha_step
+    
+    def draw(self, screen, shape, x, y, size, color, alpha=255, rotation=0):
+        """Blit a stamp centered on (x, y)"""
+        rotation_step, alpha_bucket = self.quantize(shape, rotation, alpha)
+        sheet, area = self.region(shape, size, rotation_step, tuple(color[:3]), alpha_bucket)
+        anchor = self.anchor(shape, size)
+        screen.blit(sheet, (int(x - anchor), int(y - anchor)), area)
+    
+    def stats(self):
+        """Hit/miss counters for sizing the quantization buckets"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'stamps': len(self.regions),
+            'sheets_filled': self.sheets_filled,
+        }
+
+# Shared by every particle, sparkle, star and gem
+STAMP_ATLAS = StampAtlas()
+
+def card_radius(height):
+    """Corner radius for a card of this height, shrinking with zoomed-out cards"""
+    return min(CARD_RADIUS, CARD_RADIUS * height // CARD_HEIGHT)
+
+def render_card_side(color, width, height, shade, border_color):
+    """Render a rounded card side with a vertical gradient and border"""
+    def row_color(i):
+        ratio = i / height
+        return tuple(int(channel * (1 - ratio * shade)) for channel in color)
+    gradient_surf = vertical_gradient(width, height, row_color, pygame.SRCALPHA)
+    
+    # Apply rounded corners to gradient
+    temp_rect = pygame.Rect(0, 0, width, height)
+    final_surf = pygame.Surface((width, height), pygame.SRCALPHA)
+    draw_rounded_rect(final_surf, (255, 255, 255), temp_rect, card_radius(height))
+    final_surf.blit(gradient_surf, (0, 0), special_flags=pygame.BLEND_MULT)
+    
+    # Draw border with rounded corners
+    pygame.draw.rect(final_surf, border_color, temp_rect, 4, border_radius=card_radius(height))
+    return final_surf
+
+class SurfaceCache:
+    """Bounded LRU cache of pre-rendered surfaces, shared with the warm-up thread"""
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.sprites = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()  # Guards the dict only; sprites are built outside it
+    
+    def get(self, key, builder):
+        """Return the sprite for key, building it with builder() on a miss"""
+        with self.lock:
+            sprite = self.sprites.get(key)
+            if sprite is not None:
+                self.sprites.move_to_end(key)
+                self.hits += 1
+                return sprite
+            self.misses += 1
+        
+        # Another thread may build the same sprite meanwhile; either copy will do
+        sprite = builder()
+        self.put(key, sprite)
+        return sprite
+    
+    def put(self, key, sprite):
+        with self.lock:
+            self.sprites[key] = sprite
+            self.sprites.move_to_end(key)
+            if len(self.sprites) > self.max_entries:
+                self.sprites.popitem(last=False)
+    
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.sprites
+    
+    def clear(self):
+        with self.lock:
+            self.sprites.clear()
+
+def render_card_sprite(key):
+    """Render the card face, back, shadow or glow a CardSpriteCache key names"""
+    kind = key[0]
+    if kind == 'face':
+        _, color, width, height = key
+        return render_card_side(color, width, height, 0.3, (255, 255, 255))
+    if kind == 'back':
+        _, width, height = key
+        return render_card_side(CARD_BACK_COLOR, width, height, 0.2, (150, 120, 200))
+    if kind == 'shadow':
+        _, width, height = key
+        shadow_surf = pygame.Surface((width, height), pygame.SRCALPHA)
+        draw_rounded_rect(shadow_surf, (0, 0, 0, 80), pygame.Rect(0, 0, width, height), card_radius(height))
+        return shadow_surf
+    _, color, width, height, glow_size = key
+    glow_surf = pygame.Surface((width + glow_size * 2, height + glow_size * 2), pygame.SRCALPHA)
+    glow_color = (*color, int(50 * glow_size / 20))
+    glow_rect = pygame.Rect(glow_size, glow_size, width, height)
+    draw_rounded_rect(glow_surf, glow_color, glow_rect, card_radius(height) + glow_size//2)
+    return glow_surf
+
+def card_sprite_size(key):
+    """Pixel size of the sprite render_card_sprite(key) returns"""
+    if key[0] == 'glow':
+        _, _, width, height, glow_size = key
+        return width + glow_size * 2, height + glow_size * 2
+    return key[-2:]
+
+class CardSpriteCache(SurfaceCache):
+    """Pre-rendered card faces, backs, shadows and glows"""
+    def __init__(self, max_entries=CARD_SPRITE_CACHE_SIZE):
+        super().__init__(max_entries)
+        self.blocks = {}  # Shared memory block -> weak references to the sprites it holds
+    
+    def sprite(self, key):
+        return self.get(key, lambda: render_card_sprite(key))
+    
+    def face(self, color, width, height):
+        return self.sprite(('face', color, width, height))
+    
+    def back(self, width, height):
+        return self.sprite(('back', width, height))
+    
+    def shadow(self, width, height):
+        return self.sprite(('shadow', width, height))
+    
+    def glow(self, color, width, height, glow_size):
+        return self.sprite(('glow', color, width, height, glow_size))
+    
+    def adopt(self, block, sprites):
+        """Cache (key, sprite) pairs whose pixels live in block, a SharedMemory.
+        
+        Blocks are closed once the LRU has dropped every sprite they hold.
+        """
+        for key, sprite in sprites:
+            self.put(key, sprite)
+        with self.lock:
+            self.blocks.setdefault(block, []).extend(weakref.ref(sprite) for _, sprite in sprites)
+        self.release_blocks(keep=block)
+    
+    def release_blocks(self, keep=None):
+        """Close the shared memory blocks none of whose sprites are left"""
+        with self.lock:
+            unused = [block for block, refs in self.blocks.items()
+                      if block is not keep and all(ref() is None for ref in refs)]
+        for block in unused:
+            try:
+                block.close()
+            except BufferError:
+                continue  # A sprite is still being drawn; try again with the next block
+            with self.lock:
+                del self.blocks[block]
+    
+    def clear(self):
+        super().clear()
+        self.release_blocks()
+    
+class TextCache(SurfaceCache):
+    """Rendered text keyed on font, string and color"""
+    def __init__(self, max_entries=TEXT_CACHE_SIZE):
+        super().__init__(max_entries)
+    
+    def render(self, font, text, color):
+        return self.get((id(font), text, color), lambda: font.render(text, True, color))
+    
+    def shadowed(self, font, text, color, shadow_color, offsets):
+        """Text composed over its shadow copies; the text sits at (0, 0) of the result"""
+        def build():
+            text_surf = self.render(font, text, color)
+            shadow_surf = self.render(font, text, shadow_color)
+            reach = max(max(dx, dy) for dx, dy in offsets)
+            composed = pygame.Surface((text_surf.get_width() + reach, text_surf.get_height() + reach),
+                                      pygame.SRCALPHA)
+            for offset in offsets:
+                composed.blit(shadow_surf, offset)
+            composed.blit(text_surf, (0, 0))
+            return composed
+        return self.get((id(font), text, color, shadow_color, tuple(offsets)), build)
+
+# Shared by every card so matching colors reuse the same sprites
+CARD_SPRITES = CardSpriteCache()
+TEXT_CACHE = TextCache()
+
+def card_sprite_keys(width, height):
+    """CardSpriteCache keys of the sprites a game at this card size needs, soonest first.
+    
+    Resting and hovered faces, backs and shadows come first, then every
+    quantized flip width and the matched-card glows. Text is left out because
+    fonts must only be used from the main thread.
+    """
+    colors = [color for color, _ in WITCH_COLORS]
+    keys = []
+    for w, h in [(width, height), (int(width * HOVER_SCALE), int(height * HOVER_SCALE))]:
+        keys.append(('back', w, h))
+        keys.append(('shadow', w, h))
+        keys.extend(('face', c, w, h) for c in colors)
+    for flip_width in range(width - width % FLIP_WIDTH_STEP, 0, -FLIP_WIDTH_STEP):
+        keys.append(('back', flip_width, height))
+        keys.extend(('face', c, flip_width, height) for c in colors)
+    for glow_size in range(4, 17):
+        keys.extend(('glow', c, width, height, glow_size) for c in colors)
+    return keys
+
+def card_sprite_jobs(width, height):
+    """Builders for the card sprites a game at this card size needs, soonest first"""
+    return [lambda key=key: CARD_SPRITES.sprite(key) for key in card_sprite_keys(width, height)]
+
+def render_card_art(task):
+    """Pool worker: render card sprites into a shared memory block at the given offsets"""
+    from multiprocessing import shared_memory
+    block_name, placed = task
+    block = shared_memory.SharedMemory(block_name)
+    try:
+        for key, offset in placed:
+            sprite = render_card_sprite(key)
+            # BGRA is the byte order of 32-bit SRCALPHA surfaces, so frombuffer() needs no conversion
+            data = pygame.image.tobytes(sprite, "BGRA")
+            block.buf[offset:offset + len(data)] = data
+    finally:
+        block.close()
+    return placed
+
+class AssetWarmUp(threading.Thread):
+    """Runs sprite builders on a background thread while the game is already on screen"""
+    def __init__(self, jobs):
+        super().__init__(name="asset-warm-up", daemon=True)
+        self.jobs = jobs
+        self.built = 0
+        self.elapsed_ms = None  # Set once every job has run
+        self.stop_requested = threading.Event()
+    
+    def run(self):
+        start = time.perf_counter()
+        for job in self.jobs:
+            if self.stop_requested.is_set():
+                return
+            job()
+            self.built += 1
+            time.sleep(0)  # Hand the GIL back to the game loop between sprites
+        self.elapsed_ms = (time.perf_counter() - start) * 1000
+    
+    def stop(self):
+        self.stop_requested.set()
+
+class PooledWarmUp(AssetWarmUp):
+    """Renders card sprites in worker processes and caches them straight from shared memory.
+    
+    Every sprite gets its own slice of one SharedMemory block. Workers render
+    chunks of them into place, and each finished chunk is wrapped with
+    pygame.image.frombuffer() without copying, so sprites show up in
+    CARD_SPRITES while later chunks are still rendering.
+    """
+    def __init__(self, pool, keys):
+        super().__init__([])
+        self.pool = pool
+        self.keys = [key for key in keys if key not in CARD_SPRITES]
+    
+    def run(self):
+        start = time.perf_counter()
+        from multiprocessing import shared_memory
+        placed = []
+        size = 0
+        for key in self.keys:
+            width, height = card_sprite_size(key)
+            placed.append((key, size))
+            size += width * height * 4
+        if not placed:
+            self.elapsed_ms = 0.0
+            return
+        
+        block = shared_memory.SharedMemory(create=True, size=size)
+        try:
+            tasks = [(block.name, placed[i:i + CARD_ART_CHUNK]) for i in range(0, len(placed), CARD_ART_CHUNK)]
+            for chunk in self.pool.imap(render_card_art, tasks):
+                sprites = []
+                for key, offset in chunk:
+                    width, height = card_sprite_size(key)
+                    pixels = block.buf[offset:offset + width * height * 4]
+                    sprites.append((key, pygame.image.frombuffer(pixels, (width, height), "BGRA")))
+                CARD_SPRITES.adopt(block, sprites)
+                self.built += len(sprites)
+                if self.stop_requested.is_set():
+                    return
+        finally:
+            # The mapping outlives the name; adopt() closes it once its sprites are gone
+            block.unlink()
+        self.elapsed_ms = (time.perf_counter() - start) * 1000
+
 class FloatingParticle:
     def __init__(self, x, y, color):
         self.x = x
@@ -470,42 +1210,231 @@ class FloatingParticle:
         self.life -= 1.5  # Faster decay
         return self.life > 0
     
+    def get_bounds(self):
+        size = int(self.size) + 1
+        return (int(self.x) - size - 1, int(self.y) - size - 1, size * 2 + 2, size * 2 + 2)
+    
     def draw(self, screen):
         alpha = int(255 * (self.life / self.max_life))
         size = int(self.size * (self.life / self.max_life))
-        if size > 0:
+        if size > 0 and STAMP_ATLAS.enabled:
+            STAMP_ATLAS.draw(screen, 'particle_star', self.x, self.y, size, self.color, alpha, self.rotation)
+        elif size > 0:
             particle_surf = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
             color_with_alpha = (*self.color, alpha)
             
             # Draw a simple star
             center = size
-            points = []
-            for i in range(10):
-                angle = i * math.pi / 5 + math.radians(self.rotation)
-                if i % 2 == 0:
-                    radius = size * 0.8
-                else:
-                    radius = size * 0.4
-                x = center + radius * math.cos(angle)
-                y = center + radius * math.sin(angle)
-                points.append((x, y))
-            
-            if len(points) >= 3:
-                pygame.draw.polygon(particle_surf, color_with_alpha, points)
+            points = star_points(center, center, size * 0.8, size * 0.4, math.radians(self.rotation))
+            pygame.draw.polygon(particle_surf, color_with_alpha, points)
             
             screen.blit(particle_surf, (int(self.x - size), int(self.y - size)))
 
+STAR_PARTICLE = 0     # Rotating star with gravity, like FloatingParticle
+SPARKLE_PARTICLE = 1  # Twinkling cross that drifts, like MagicalSparkle
+
+class ParticleSystem:
+    """Array-backed particles updated with vectorized NumPy math and drawn in one batch"""
+    FIELDS = ('x', 'y', 'vx', 'vy', 'gravity', 'life', 'max_life', 'size',
+              'rotation', 'rotation_speed', 'twinkle_speed')
+    SHAPES = {STAR_PARTICLE: 'particle_star', SPARKLE_PARTICLE: 'cross'}
+    
+    def __init__(self, capacity=256):
+        # Seeded from the global generator so random.seed() keeps runs reproducible
+        self.rng = np.random.default_rng(random.getrandbits(64))
+        self.count = 0
+        self.capacity = capacity
+        for name in self.FIELDS:
+            setattr(self, name, np.zeros(capacity, dtype=np.float32))
+        self.kind = np.zeros(capacity, dtype=np.uint8)
+        self.color = np.zeros(capacity, dtype=np.uint16)  # Index into self.palette
+        self.palette = []
+        self.palette_index = {}
+        self.frame_layout = None
+    
+    def __len__(self):
+        return self.count
+    
+    def clear(self):
+        self.count = 0
+        self.frame_layout = None
+    
+    def color_ids(self, colors, count):
+        """Palette indices for a single color or one color per particle"""
+        if isinstance(colors[0], int):
+            colors = [colors]
+        ids = []
+        for color in colors:
+            color = tuple(color)
+            if color not in self.palette_index:
+                self.palette_index[color] = len(self.palette)
+                self.palette.append(color)
+            ids.append(self.palette_index[color])
+        return np.resize(np.array(ids, dtype=np.uint16), count)
+    
+    def allocate(self, count):
+        """Reserve count slots at the end of the arrays and return their slice"""
+        needed = self.count + count
+        if needed > self.capacity:
+            capacity = max(needed, self.capacity * 2)
+            for name in self.FIELDS + ('kind', 'color'):
+                old = getattr(self, name)
+                grown = np.zeros(capacity, dtype=old.dtype)
+                grown[:self.count] = old[:self.count]
+                setattr(self, name, grown)
+            self.capacity = capacity
+        start = self.count
+        self.count = needed
+        self.frame_layout = None
+        return slice(start, needed)
+    
+    def emit_stars(self, x, y, colors, count):
+        """Spawn celebration stars around (x, y), with positions as scalars or arrays"""
+        if count <= 0:
+            return
+        uniform = self.rng.uniform
+        new = self.allocate(count)
+        self.x[new] = x
+        self.y[new] = y
+        self.vx[new] = uniform(-3, 3, count)  # Faster movement
+        self.vy[new] = uniform(-4, -1, count)
+        self.gravity[new] = 0.08  # Faster gravity
+        self.life[new] = 60  # Shorter life for performance
+        self.max_life[new] = 60
+        self.size[new] = uniform(3, 8, count)
+        self.rotation[new] = 0
+        self.rotation_speed[new] = uniform(-8, 8, count)  # Faster rotation
+        self.twinkle_speed[new] = 0
+        self.kind[new] = STAR_PARTICLE
+        self.color[new] = self.color_ids(colors, count)
+    
+    def emit_sparkles(self, x, y, count):
+        """Spawn twinkling sparkles at (x, y), with positions as scalars or arrays"""
+        if count <= 0:
+            return
+        uniform = self.rng.uniform
+        new = self.allocate(count)
+        self.x[new] = x
+        self.y[new] = y
+        self.vx[new] = uniform(-0.5, 0.5, count)
+        self.vy[new] = uniform(-1.2, -0.4, count)  # Faster drift
+        self.gravity[new] = 0
+        self.life[new] = uniform(40, 80, count)  # Faster lifecycle
+        self.max_life[new] = self.life[new]
+        self.size[new] = uniform(1, 4, count)
+        self.rotation[new] = 0
+        self.rotation_speed[new] = 0
+        self.twinkle_speed[new] = uniform(0.08, 0.2, count)  # Faster twinkling
+        self.kind[new] = SPARKLE_PARTICLE
+        self.color[new] = self.color_ids(SPARKLE_COLORS, len(SPARKLE_COLORS))[
+            self.rng.integers(0, len(SPARKLE_COLORS), count)]
+    
+    def update(self):
+        """Advance every particle one frame and drop the dead ones"""
+        self.frame_layout = None
+        n = self.count
+        if n == 0:
+            return
+        
+        self.x[:n] += self.vx[:n]
+        self.y[:n] += self.vy[:n]
+        self.vy[:n] += self.gravity[:n]
+        self.rotation[:n] += self.rotation_speed[:n]
+        self.life[:n] -= 1.5  # Faster decay
+        
+        alive = self.life[:n] > 0
+        if not alive.all():
+            keep = np.flatnonzero(alive)
+            for name in self.FIELDS + ('kind', 'color'):
+                array = getattr(self, name)
+                array[:len(keep)] = array[keep]
+            self.count = len(keep)
+    
+    def snapshot(self):
+        """Copy of the live particles to draw while this system keeps updating"""
+        clone = copy.copy(self)
+        for name in self.FIELDS + ('kind', 'color'):
+            setattr(clone, name, getattr(self, name)[:self.count].copy())
+        clone.capacity = self.count
+        clone.frame_layout = None
+        return clone
+    
+    def layout(self):
+        """Screen placement of the visible particles, computed once per frame"""
+        if self.frame_layout is not None:
+            return self.frame_layout
+        
+        n = self.count
+        kind = self.kind[:n]
+        ratio = self.life[:n] / self.max_life[:n]
+        twinkle = np.where(kind == SPARKLE_PARTICLE,
+                           np.abs(np.sin(get_ticks() * self.twinkle_speed[:n])), 1.0)
+        size = (self.size[:n] * twinkle * ratio).astype(np.int32)
+        visible = np.flatnonzero(size > 0)
+        
+        size = size[visible]
+        kind = kind[visible]
+        # Stars are centered on a 2x surface, sparkles on a 4x one
+        offset = np.where(kind == STAR_PARTICLE, size, size * 2)
+        left = (self.x[:n][visible] - offset).astype(np.int32)
+        top = (self.y[:n][visible] - offset).astype(np.int32)
+        self.frame_layout = (visible, kind, size, ratio[visible], offset * 2, left, top)
+        return self.frame_layout
+    
+    def bounds(self):
+        """Rectangles the next draw() will touch, as (x, y, w, h) tuples"""
+        if self.count == 0:
+            return []
+        visible, kind, size, ratio, extent, left, top = self.layout()
+        extent = extent.tolist()
+        return list(zip(left.tolist(), top.tolist(), extent, extent))
+    
+    def draw(self, screen):
+        """Draw all live particles with a single batched blit"""
+        n = self.count
+        if n == 0:
+            return
+        
+        visible, kind, size, ratio, extent, left, top = self.layout()
+        if len(visible) == 0:
+            return
+        
+        # Quantize the same way StampAtlas.quantize does, for all particles at once
+        atlas = STAMP_ATLAS
+        alpha_bucket = (255 * ratio).astype(np.int32) // atlas.alpha_step
+        steps = atlas.rotation_steps
+        rotation_step = np.round(self.rotation[:n][visible] * steps / 72).astype(np.int32) % steps
+        rotation_step[kind != STAR_PARTICLE] = 0
+        
+        region = atlas.region
+        shapes = self.SHAPES
+        palette = self.palette
+        batch = []
+        for k, c, sz, r, a, px, py in zip(
+                kind.tolist(), self.color[:n][visible].tolist(), size.tolist(),
+                rotation_step.tolist(), alpha_bucket.tolist(), left.tolist(), top.tolist()):
+            sheet, area = region(shapes[k], sz, r, palette[c], a)
+            batch.append((sheet, (px, py), area))
+        screen.blits(batch, doreturn=False)
+
 class Card:
-    def __init__(self, x, y, color_data, index):
+    """Animated view of one card; its game state is read from the BoardModel"""
+    __slots__ = ('width', 'height', 'target_x', 'target_y', 'x', 'y', 'board', 'index',
+                 'flip_progress', 'scale', 'target_scale', 'hover', 'entrance_delay',
+                 'entrance_complete', 'glow_intensity', 'sparkles', 'sparkle_system', 'previous')
+    INTERPOLATED = ('x', 'y', 'target_scale', 'flip_progress')
+    draw_glow = True  # Shared effect switches set by the quality governor
+    draw_shadow = True
+    
+    def __init__(self, x, y, board, index, sparkle_system=None, width=CARD_WIDTH, height=CARD_HEIGHT):
+        self.width = width
+        self.height = height
         self.target_x = x
         self.target_y = y
         self.x = x
         self.y = y + 150
-        self.color, self.color_name = color_data
+        self.board = board
         self.index = index
-        self.is_revealed = False
-        self.is_matched = False
-        self.reveal_time = 0
         self.flip_progress = 0
         self.scale = 0.5
         self.target_scale = 1.0
@@ -514,11 +1443,60 @@ class Card:
         self.entrance_complete = False
         self.glow_intensity = 0
         self.sparkles = []
+        self.sparkle_system = sparkle_system  # Shared ParticleSystem, or None for per-card sparkles
+        self.previous = None  # Interpolated state before the last update
+    
+    @property
+    def is_revealed(self):
+        return self.board.revealed[self.index] == 1
+    
+    @property
+    def is_matched(self):
+        return self.board.matched[self.index] == 1
+    
+    @property
+    def reveal_time(self):
+        return self.board.reveal_times[self.index]
+    
+    @property
+    def color(self):
+        return WITCH_COLORS[self.board.symbols[self.index]][0]
+    
+    @property
+    def color_name(self):
+        return WITCH_COLORS[self.board.symbols[self.index]][1]
+    
+    def recycle(self, index):
+        """Reuse this card for another large-board cell, already settled in place"""
+        self.index = index
+        self.flip_progress = 1.0 if self.is_revealed or self.is_matched else 0.0
+        self.scale = self.target_scale = 1.0
+        self.hover = False
+        self.entrance_delay = 0
+        self.entrance_complete = True
+        self.glow_intensity = 0
+        self.sparkles = []
+        self.previous = None
+    
+    def snapshot(self, board):
+        """Copy to draw while this card keeps updating, reading its flags from board"""
+        clone = copy.copy(self)
+        clone.board = board
+        clone.sparkles = [copy.copy(sparkle) for sparkle in self.sparkles]
+        return clone
+    
+    def place(self, x, y, width, height):
+        self.target_x = self.x = x
+        self.target_y = self.y = y
+        self.width = width
+        self.height = height
+        self.previous = None  # Jump straight there rather than sliding across the board
     
     def update(self):
+        self.previous = (self.x, self.y, self.target_scale, self.flip_progress)
         # Faster entrance animation
         if not self.entrance_complete:
-            if pygame.time.get_ticks() > self.entrance_delay:
+            if get_ticks() > self.entrance_delay:
                 self.y += (self.target_y - self.y) * 0.18  # Faster
                 self.scale += (self.target_scale - self.scale) * 0.18
                 if abs(self.y - self.target_y) < 2 and abs(self.scale - self.target_scale) < 0.02:
@@ -527,19 +1505,21 @@ class Card:
                     self.entrance_complete = True
         
         # Faster hover effect
-        target_scale = 1.08 if self.hover and not self.is_matched else 1.0
+        target_scale = HOVER_SCALE if self.hover and not self.is_matched else 1.0
         self.target_scale += (target_scale - self.target_scale) * 0.25  # Faster
         
         # Faster glow effect for matched cards
         if self.is_matched:
-            self.glow_intensity = 0.5 + 0.3 * math.sin(pygame.time.get_ticks() * 0.008)  # Faster
+            self.glow_intensity = 0.5 + 0.3 * math.sin(get_ticks() * 0.008)  # Faster
             # More frequent sparkles
             if random.random() < 0.15:
                 rect = self.get_rect()
-                self.sparkles.append(MagicalSparkle(
-                    rect.centerx + random.uniform(-rect.width//3, rect.width//3),
-                    rect.centery + random.uniform(-rect.height//3, rect.height//3)
-                ))
+                sparkle_x = rect.centerx + random.uniform(-rect.width//3, rect.width//3)
+                sparkle_y = rect.centery + random.uniform(-rect.height//3, rect.height//3)
+                if self.sparkle_system is not None:
+                    self.sparkle_system.emit_sparkles(sparkle_x, sparkle_y, 1)
+                else:
+                    self.sparkles.append(MagicalSparkle(sparkle_x, sparkle_y))
         
         # Update sparkles
         self.sparkles = [s for s in self.sparkles if s.update()]
@@ -551,176 +1531,893 @@ class Card:
             self.flip_progress = max(0.0, self.flip_progress - 0.18)
     
     def draw(self, screen, font, title_font):
-        if not self.entrance_complete and pygame.time.get_ticks() < self.entrance_delay:
+        if not self.entrance_complete and get_ticks() < self.entrance_delay:
             return
         
         # Calculate card dimensions with scale
-        width = int(CARD_WIDTH * self.target_scale)
-        height = int(CARD_HEIGHT * self.target_scale)
+        width = int(self.width * self.target_scale)
+        height = int(self.height * self.target_scale)
         
         # Card position (centered)
-        card_x = int(self.x - width // 2 + CARD_WIDTH // 2)
-        card_y = int(self.y - height // 2 + CARD_HEIGHT // 2)
+        card_x = int(self.x - width // 2 + self.width // 2)
+        card_y = int(self.y - height // 2 + self.height // 2)
         
         # Draw glow effect for matched cards
-        if self.is_matched and self.glow_intensity > 0:
+        if self.draw_glow and self.is_matched and self.glow_intensity > 0:
             glow_size = int(20 * self.glow_intensity)
-            glow_surf = pygame.Surface((width + glow_size * 2, height + glow_size * 2), pygame.SRCALPHA)
-            glow_color = (*self.color, int(50 * self.glow_intensity))
-            glow_rect = pygame.Rect(glow_size, glow_size, width, height)
-            draw_rounded_rect(glow_surf, glow_color, glow_rect, CARD_RADIUS + glow_size//2)
+            glow_surf = CARD_SPRITES.glow(self.color, width, height, glow_size)
             screen.blit(glow_surf, (card_x - glow_size, card_y - glow_size))
         
         # Draw shadow with rounded corners
-        shadow_offset = 5
-        shadow_surf = pygame.Surface((width, height), pygame.SRCALPHA)
-        shadow_rect = pygame.Rect(0, 0, width, height)
-        draw_rounded_rect(shadow_surf, (0, 0, 0, 80), shadow_rect, CARD_RADIUS)
-        screen.blit(shadow_surf, (card_x + shadow_offset, card_y + shadow_offset))
+        if self.draw_shadow:
+            shadow_offset = 5
+            screen.blit(CARD_SPRITES.shadow(width, height), (card_x + shadow_offset, card_y + shadow_offset))
         
         # Card rectangle
         card_rect = pygame.Rect(card_x, card_y, width, height)
         
-        # Flip effect
-        original_width = width
+        # Flip effect - widths are quantized so the sprites can be cached
         if self.flip_progress > 0:
             flip_width = int(width * abs(math.cos(self.flip_progress * math.pi)))
+            if flip_width < width:
+                flip_width = min(width, round(flip_width / FLIP_WIDTH_STEP) * FLIP_WIDTH_STEP)
             card_rect.width = max(1, flip_width)
             card_rect.x = card_x + (width - card_rect.width) // 2
         
         # Determine card color and content
         if self.flip_progress > 0.5 and (self.is_revealed or self.is_matched):
             # Show color side with gradient
-            gradient_surf = pygame.Surface((card_rect.width, card_rect.height), pygame.SRCALPHA)
-            for i in range(card_rect.height):
-                ratio = i / card_rect.height
-                r = int(self.color[0] * (1 - ratio * 0.3))
-                g = int(self.color[1] * (1 - ratio * 0.3))
-                b = int(self.color[2] * (1 - ratio * 0.3))
-                pygame.draw.line(gradient_surf, (r, g, b), (0, i), (card_rect.width, i))
-            
-            # Apply rounded corners to gradient
-            temp_rect = pygame.Rect(0, 0, card_rect.width, card_rect.height)
-            final_surf = pygame.Surface((card_rect.width, card_rect.height), pygame.SRCALPHA)
-            draw_rounded_rect(final_surf, (255, 255, 255), temp_rect, CARD_RADIUS)
-            final_surf.blit(gradient_surf, (0, 0), special_flags=pygame.BLEND_MULT)
-            screen.blit(final_surf, card_rect)
-            
-            # Draw border with rounded corners
-            border_surf = pygame.Surface((card_rect.width, card_rect.height), pygame.SRCALPHA)
-            border_rect = pygame.Rect(0, 0, card_rect.width, card_rect.height)
-            pygame.draw.rect(border_surf, (255, 255, 255), border_rect, 4, border_radius=CARD_RADIUS)
-            screen.blit(border_surf, card_rect)
+            screen.blit(CARD_SPRITES.face(self.color, card_rect.width, card_rect.height), card_rect)
             
             # Draw magical symbol (crystal/gem)
-            if card_rect.width > 40:
+            if card_rect.width > 40 and self.height >= CARD_DETAIL_MIN_HEIGHT:
                 center_x, center_y = card_rect.center
                 gem_size = min(card_rect.width, card_rect.height) // 6
-                self.draw_gem(screen, center_x, center_y - 20, gem_size, (255, 255, 255))
+                gem_surf = CARD_SPRITES.get(('gem', gem_size), lambda: self.render_gem(gem_size))
+                screen.blit(gem_surf, (center_x - gem_size - 1, center_y - 20 - gem_size - 1))
                 
                 # Draw color name
-                text = font.render(self.color_name, True, (255, 255, 255))
+                text = TEXT_CACHE.render(font, self.color_name, (255, 255, 255))
                 text_rect = text.get_rect(center=(center_x, center_y + 40))
-                shadow_text = font.render(self.color_name, True, (0, 0, 0))
+                shadow_text = TEXT_CACHE.render(font, self.color_name, (0, 0, 0))
                 screen.blit(shadow_text, (text_rect.x + 2, text_rect.y + 2))
                 screen.blit(text, text_rect)
         else:
             # Show back side with magical pattern
-            gradient_surf = pygame.Surface((card_rect.width, card_rect.height), pygame.SRCALPHA)
-            card_back_color = (60, 40, 120)
-            for i in range(card_rect.height):
-                ratio = i / card_rect.height
-                r = int(card_back_color[0] * (1 - ratio * 0.2))
-                g = int(card_back_color[1] * (1 - ratio * 0.2))
-                b = int(card_back_color[2] * (1 - ratio * 0.2))
-                pygame.draw.line(gradient_surf, (r, g, b), (0, i), (card_rect.width, i))
-            
-            # Apply rounded corners
-            temp_rect = pygame.Rect(0, 0, card_rect.width, card_rect.height)
-            final_surf = pygame.Surface((card_rect.width, card_rect.height), pygame.SRCALPHA)
-            draw_rounded_rect(final_surf, (255, 255, 255), temp_rect, CARD_RADIUS)
-            final_surf.blit(gradient_surf, (0, 0), special_flags=pygame.BLEND_MULT)
-            screen.blit(final_surf, card_rect)
-            
-            # Draw border
-            border_surf = pygame.Surface((card_rect.width, card_rect.height), pygame.SRCALPHA)
-            border_rect = pygame.Rect(0, 0, card_rect.width, card_rect.height)
-            pygame.draw.rect(border_surf, (150, 120, 200), border_rect, 4, border_radius=CARD_RADIUS)
-            screen.blit(border_surf, card_rect)
+            screen.blit(CARD_SPRITES.back(card_rect.width, card_rect.height), card_rect)
             
             # Draw magical pattern (moon and stars)
-            if card_rect.width > 40:
+            if card_rect.width > 40 and self.height >= CARD_DETAIL_MIN_HEIGHT:
                 center_x, center_y = card_rect.center
-                
-                # Draw crescent moon
-                moon_radius = 15
-                pygame.draw.circle(screen, (255, 255, 200), (center_x, center_y - 10), moon_radius)
-                pygame.draw.circle(screen, card_back_color, (center_x + 8, center_y - 10), moon_radius - 2)
-                
-                # Draw stars around
-                star_positions = [
-                    (center_x - 25, center_y - 25),
-                    (center_x + 25, center_y - 25),
-                    (center_x - 30, center_y + 15),
-                    (center_x + 30, center_y + 15),
-                    (center_x, center_y + 30)
-                ]
-                
-                for star_x, star_y in star_positions:
-                    self.draw_star(screen, star_x, star_y, 4, (255, 255, 200))
+                emblem = CARD_SPRITES.get(('back_emblem',), self.render_back_emblem)
+                screen.blit(emblem, (center_x - BACK_EMBLEM_SIZE // 2, center_y - BACK_EMBLEM_SIZE // 2))
         
         # Draw sparkles
         for sparkle in self.sparkles:
             sparkle.draw(screen)
     
+    def render_gem(self, size):
+        """Pre-render the face gem centered on a transparent surface"""
+        gem_surf = pygame.Surface((size * 2 + 2, size * 2 + 2), pygame.SRCALPHA)
+        self.draw_gem(gem_surf, size + 1, size + 1, size, (255, 255, 255))
+        return gem_surf
+    
+    def render_back_emblem(self):
+        """Pre-render the crescent moon and stars shown on the card back"""
+        emblem = pygame.Surface((BACK_EMBLEM_SIZE, BACK_EMBLEM_SIZE), pygame.SRCALPHA)
+        center_x = center_y = BACK_EMBLEM_SIZE // 2
+        
+        # Draw crescent moon
+        moon_radius = 15
+        pygame.draw.circle(emblem, (255, 255, 200), (center_x, center_y - 10), moon_radius)
+        pygame.draw.circle(emblem, CARD_BACK_COLOR, (center_x + 8, center_y - 10), moon_radius - 2)
+        
+        # Draw stars around
+        star_positions = [
+            (center_x - 25, center_y - 25),
+            (center_x + 25, center_y - 25),
+            (center_x - 30, center_y + 15),
+            (center_x + 30, center_y + 15),
+            (center_x, center_y + 30)
+        ]
+        
+        for star_x, star_y in star_positions:
+            self.draw_star(emblem, star_x, star_y, 4, (255, 255, 200))
+        return emblem
+    
     def draw_gem(self, screen, x, y, size, color):
         """Draw a magical gem/crystal"""
-        points = [
-            (x, y - size),
-            (x + size//2, y - size//2),
-            (x + size, y),
-            (x + size//2, y + size//2),
-            (x, y + size),
-            (x - size//2, y + size//2),
-            (x - size, y),
-            (x - size//2, y - size//2)
-        ]
-        if len(points) >= 3:
-            pygame.draw.polygon(screen, color, points)
-            inner_points = [(px + (x-px)*0.3, py + (y-py)*0.3) for px, py in points]
-            pygame.draw.polygon(screen, (255, 255, 255), inner_points)
+        if STAMP_ATLAS.enabled:
+            STAMP_ATLAS.draw(screen, 'gem', x, y, size, color)
+            return
+        points = sparkle_points(x, y, size)
+        pygame.draw.polygon(screen, color, points)
+        inner_points = [(px + (x-px)*0.3, py + (y-py)*0.3) for px, py in points]
+        pygame.draw.polygon(screen, (255, 255, 255), inner_points)
     
     def draw_star(self, screen, x, y, size, color):
         """Draw a 5-pointed star"""
-        points = []
-        for i in range(10):
-            angle = i * math.pi / 5
-            if i % 2 == 0:
-                radius = size
-            else:
-                radius = size * 0.4
-            px = x + radius * math.cos(angle - math.pi / 2)
-            py = y + radius * math.sin(angle - math.pi / 2)
-            points.append((px, py))
-        
-        if len(points) >= 3:
-            pygame.draw.polygon(screen, color, points)
+        if STAMP_ATLAS.enabled:
+            STAMP_ATLAS.draw(screen, 'star', x, y, size, color)
+            return
+        pygame.draw.polygon(screen, color, star_points(x, y, size, size * 0.4, -math.pi / 2))
+    
+    def get_draw_bounds(self):
+        """Rectangles covering the card with its glow and shadow, plus its sparkles"""
+        rect = self.get_rect()
+        bounds = [(rect.x - 20, rect.y - 20, rect.width + 45, rect.height + 45)]
+        bounds.extend(sparkle.get_bounds() for sparkle in self.sparkles)
+        return bounds
+    
+    def get_draw_state(self):
+        """Everything that changes how the card looks, or None while its sparkles move"""
+        if self.sparkles:
+            return None
+        hidden = not self.entrance_complete and get_ticks() < self.entrance_delay
+        glow_size = int(20 * self.glow_intensity) if self.draw_glow and self.is_matched else 0
+        return (hidden, tuple(self.get_rect()), self.flip_progress,
+                self.is_revealed, self.is_matched, glow_size, self.color)
     
     def get_rect(self):
-        width = int(CARD_WIDTH * self.target_scale)
-        height = int(CARD_HEIGHT * self.target_scale)
+        width = int(self.width * self.target_scale)
+        height = int(self.height * self.target_scale)
         return pygame.Rect(
-            int(self.x - width // 2 + CARD_WIDTH // 2),
-            int(self.y - height // 2 + CARD_HEIGHT // 2),
+            int(self.x - width // 2 + self.width // 2),
+            int(self.y - height // 2 + self.height // 2),
             width, height
         )
     
     def is_clicked(self, pos):
         return self.get_rect().collidepoint(pos) and self.entrance_complete
 
+class CardGrid:
+    """Spatial index mapping a pointer position to the card laid out under it.
+    
+    Each card owns one cell of the layout pitch, centered on its slot. A hovered
+    card grows past its slot by (HOVER_SCALE - 1) / 2 of its size (plus a pixel
+    of rounding); while that fits inside half the margin only one cell needs
+    checking, otherwise the neighbouring cells the overhang can reach are
+    checked too. Cells are a mapping from cell index to card, so a large board
+    can pass only the cards that currently exist.
+    """
+    def __init__(self, origin_x, origin_y, rows, cols, cells,
+                 card_width=CARD_WIDTH, card_height=CARD_HEIGHT, margin=CARD_MARGIN):
+        self.pitch_x = card_width + margin
+        self.pitch_y = card_height + margin
+        self.origin_x = origin_x - margin / 2
+        self.origin_y = origin_y - margin / 2
+        self.rows = rows
+        self.cols = cols
+        self.cells = cells if isinstance(cells, dict) else dict(enumerate(cells))
+        self.reach_x = max(0, math.ceil(card_width * (HOVER_SCALE - 1) / 2 + 1 - margin / 2))
+        self.reach_y = max(0, math.ceil(card_height * (HOVER_SCALE - 1) / 2 + 1 - margin / 2))
+    
+    def cell(self, x, y):
+        col = (x - self.origin_x) // self.pitch_x
+        row = (y - self.origin_y) // self.pitch_y
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return int(row * self.cols + col)
+        return None
+    
+    def candidates(self, pos):
+        """Cards whose rect may contain pos, whether or not they have settled"""
+        x, y = pos
+        if not self.reach_x and not self.reach_y:
+            card = self.cells.get(self.cell(x, y))
+            return [] if card is None else [card]
+        found = []
+        for dx in {-self.reach_x, 0, self.reach_x}:
+            for dy in {-self.reach_y, 0, self.reach_y}:
+                card = self.cells.get(self.cell(x + dx, y + dy))
+                if card is not None and card not in found:
+                    found.append(card)
+        return found
+    
+    def card_at(self, pos):
+        """The settled card under pos, or None"""
+        for card in self.candidates(pos):
+            if card.is_clicked(pos):
+                return card
+        return None
+
+class Camera:
+    """Pan and zoom over a large board; world units are unscaled card pixels"""
+    def __init__(self, width, height, world_width, world_height):
+        self.width = width
+        self.height = height
+        self.world_width = world_width
+        self.world_height = world_height
+        self.zoom_level = 0
+        self.zoom = 1.0
+        self.x = 0.0
+        self.y = -LARGE_BOARD_TOP
+    
+    def resize(self, width, height):
+        self.width = width
+        self.height = height
+        self.clamp()
+    
+    def to_screen(self, x, y):
+        return (x - self.x) * self.zoom, (y - self.y) * self.zoom
+    
+    def to_world(self, x, y):
+        return x / self.zoom + self.x, y / self.zoom + self.y
+    
+    def pan(self, dx, dy):
+        """Move the view by a distance in screen pixels"""
+        self.x += dx / self.zoom
+        self.y += dy / self.zoom
+        self.clamp()
+    
+    def zoom_at(self, pos, steps):
+        """Zoom by whole wheel steps, keeping the world point under pos in place"""
+        min_level = math.ceil(math.log(CAMERA_MIN_ZOOM) / math.log(CAMERA_ZOOM_STEP))
+        max_level = math.floor(math.log(CAMERA_MAX_ZOOM) / math.log(CAMERA_ZOOM_STEP))
+        level = min(max_level, max(min_level, self.zoom_level + steps))
+        if level == self.zoom_level:
+            return
+        anchor_x, anchor_y = self.to_world(*pos)
+        # Zoom comes in discrete levels so card sprites are cached at a few sizes only
+        self.zoom_level = level
+        self.zoom = CAMERA_ZOOM_STEP ** level
+        self.x = anchor_x - pos[0] / self.zoom
+        self.y = anchor_y - pos[1] / self.zoom
+        self.clamp()
+    
+    def clamp(self):
+        """Keep at least part of the board in view"""
+        view_width = self.width / self.zoom
+        view_height = self.height / self.zoom
+        self.x = min(max(self.x, -view_width / 2), self.world_width - view_width / 2)
+        self.y = min(max(self.y, -view_height / 2), self.world_height - view_height / 2)
+    
+    def get_view(self):
+        return (self.x, self.y, self.zoom, self.width, self.height)
+
+class LargeBoard:
+    """Board of many pairs with Card objects only for cells in or near the viewport.
+    
+    Card state lives in a BoardModel. sync() attaches pooled Cards to the
+    cells the camera can see and releases the rest back to the pool, so the
+    per-frame work follows the view rather than the board size.
+    """
+    def __init__(self, rows, cols, width, height, sparkle_system=None, board=None):
+        self.rows = rows
+        self.cols = cols
+        self.sparkle_system = sparkle_system
+        self.board = board if board is not None else BoardModel.shuffled(rows * cols // 2, len(WITCH_COLORS))
+        
+        self.pitch_x = CARD_WIDTH + CARD_MARGIN
+        self.pitch_y = CARD_HEIGHT + CARD_MARGIN
+        self.camera = Camera(width, height, cols * self.pitch_x, rows * self.pitch_y)
+        self.active = {}  # Cell index -> Card
+        self.pool = []
+        self.cards = []
+        self.grid = None
+        self.view = None
+    
+    def visible_range(self):
+        """First and last rows and columns in view, including the margin"""
+        camera = self.camera
+        left, top = camera.to_world(0, 0)
+        right, bottom = camera.to_world(camera.width, camera.height)
+        first_col = max(0, int(left // self.pitch_x) - LARGE_BOARD_MARGIN)
+        last_col = min(self.cols - 1, int(right // self.pitch_x) + LARGE_BOARD_MARGIN)
+        first_row = max(0, int(top // self.pitch_y) - LARGE_BOARD_MARGIN)
+        last_row = min(self.rows - 1, int(bottom // self.pitch_y) + LARGE_BOARD_MARGIN)
+        return first_row, last_row, first_col, last_col
+    
+    def attach(self, index):
+        card = self.pool.pop() if self.pool else Card(0, 0, self.board, index, self.sparkle_system)
+        card.recycle(index)
+        self.active[index] = card
+        return card
+    
+    def release(self, index):
+        self.pool.append(self.active.pop(index))
+    
+    def cell_center(self, index):
+        """Screen position of a cell's center, whether or not a Card is attached"""
+        row, col = divmod(index, self.cols)
+        return self.camera.to_screen((col + 0.5) * self.pitch_x - CARD_MARGIN / 2,
+                                     (row + 0.5) * self.pitch_y - CARD_MARGIN / 2)
+    
+    def sync(self):
+        """Match the live cards to the camera; returns True if anything moved"""
+        view = self.camera.get_view()
+        if view == self.view:
+            return False
+        self.view = view
+        
+        first_row, last_row, first_col, last_col = self.visible_range()
+        for index in list(self.active):
+            row, col = divmod(index, self.cols)
+            if not (first_row <= row <= last_row and first_col <= col <= last_col):
+                self.release(index)
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                index = row * self.cols + col
+                if index not in self.active:
+                    self.attach(index)
+        
+        zoom = self.camera.zoom
+        width = int(CARD_WIDTH * zoom)
+        height = int(CARD_HEIGHT * zoom)
+        for index, card in self.active.items():
+            row, col = divmod(index, self.cols)
+            x, y = self.camera.to_screen(col * self.pitch_x, row * self.pitch_y)
+            card.place(x, y, width, height)
+        
+        self.cards = [self.active[index] for index in sorted(self.active)]
+        origin_x, origin_y = self.camera.to_screen(0, 0)
+        self.grid = CardGrid(origin_x, origin_y, self.rows, self.cols, self.active,
+                             CARD_WIDTH * zoom, CARD_HEIGHT * zoom, CARD_MARGIN * zoom)
+        return True
+
+class FrameProfiler:
+    """Phase timers for the game loop with rolling histograms and Chrome-trace export.
+    
+    Every hook returns straight away while the profiler is disabled, so the
+    calls can stay in the loop permanently.
+    """
+    def __init__(self, history=PROFILE_HISTORY):
+        self.enabled = False
+        self.tracing = False
+        self.show_overlay = False
+        self.history = history
+        self.samples = {}        # Phase name -> recent per-frame totals in ms
+        self.frame_totals = {}   # Phase name -> ms spent so far this frame
+        self.open_spans = {}
+        self.spans = deque(maxlen=TRACE_MAX_SPANS)
+        self.gauges = {}         # Extra values shown on the overlay
+        self.origin = time.perf_counter()
+        self.overlay_font = None
+    
+    def begin(self, name):
+        if not self.enabled:
+            return
+        self.open_spans[name] = time.perf_counter()
+    
+    def end(self, name, args=None):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        start = self.open_spans.pop(name, now)
+        elapsed = now - start
+        self.frame_totals[name] = self.frame_totals.get(name, 0.0) + elapsed * 1000
+        if self.tracing:
+            self.spans.append((name, start, elapsed, args))
+    
+    def end_frame(self):
+        """Push this frame's phase totals into the rolling histograms"""
+        if not self.enabled:
+            return
+        for name, total in self.frame_totals.items():
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=self.history)
+            samples.append(total)
+        self.frame_totals = {}
+    
+    def set_gauge(self, name, value):
+        self.gauges[name] = value
+    
+    def toggle_overlay(self):
+        self.show_overlay = not self.show_overlay
+        # Hiding the overlay stops the timing too, unless a trace is still being recorded
+        self.enabled = self.show_overlay or self.tracing
+    
+    def phase_stats(self):
+        """(name, mean, p95, max) in ms for every phase seen in the history window"""
+        stats = []
+        for name, samples in self.samples.items():
+            if not samples:
+                continue
+            values = sorted(samples)
+            p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+            stats.append((name, sum(values) / len(values), p95, values[-1]))
+        return stats
+    
+    def overlay_bounds(self):
+        return (WINDOW_WIDTH - 330, 10, 320, 30 + 20 * (len(self.samples) + len(self.gauges)))
+    
+    def draw_overlay(self, screen):
+        if not self.show_overlay:
+            return
+        if self.overlay_font is None:
+            self.overlay_font = pygame.font.Font(None, 22)
+        
+        panel_rect = pygame.Rect(self.overlay_bounds())
+        panel = pygame.Surface(panel_rect.size, pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        screen.blit(panel, panel_rect)
+        
+        # Phase name on the left, then right-aligned avg/p95/max columns
+        rows = [("phase (ms)", "avg", "p95", "max")]
+        for name, mean, p95, worst in self.phase_stats():
+            rows.append((name, f"{mean:.2f}", f"{p95:.2f}", f"{worst:.2f}"))
+        for name, value in self.gauges.items():
+            rows.append((f"{name}: {value}",))
+        for i, row in enumerate(rows):
+            y = panel_rect.y + 6 + i * 20
+            text = self.overlay_font.render(row[0], True, (255, 255, 255))
+            screen.blit(text, (panel_rect.x + 8, y))
+            for column, cell in enumerate(row[1:]):
+                text = self.overlay_font.render(cell, True, (255, 255, 255))
+                screen.blit(text, (panel_rect.x + 200 + column * 55 - text.get_width(), y))
+    
+    def write_chrome_trace(self, path):
+        """Dump the recorded spans as a Chrome trace JSON file"""
+        events = []
+        for name, start, elapsed, args in self.spans:
+            event = {
+                "name": name, "cat": "frame", "ph": "X", "pid": 1, "tid": 1,
+                "ts": (start - self.origin) * 1e6, "dur": elapsed * 1e6,
+            }
+            if args:
+                event["args"] = args
+            events.append(event)
+        with open(path, "w") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
+
+class QualityGovernor:
+    """Moves between QUALITY_LEVELS to hold a target frame rate.
+    
+    Each frame reports its busy time, everything except the frame-cap sleep.
+    When the rolling average goes over the frame budget the level drops one
+    step. It only climbs again after QUALITY_UPGRADE_DELAY frames with the
+    average well under budget. That delay doubles, up to a cap, when a climb
+    has to be undone within one delay, so the level settles instead of
+    flapping. A climb that holds longer than that resets the delay, so one
+    spike long after it counts for nothing.
+    """
+    def __init__(self, target_fps=QUALITY_TARGET_FPS, window=QUALITY_WINDOW):
+        self.enabled = True
+        self.budget_ms = 1000 / target_fps
+        self.samples = deque(maxlen=window)
+        self.level = len(QUALITY_LEVELS) - 1
+        self.upgrade_delay = QUALITY_UPGRADE_DELAY
+        self.frames_since_change = 0
+        self.last_change = 0
+        self.changes = 0
+    
+    def average_ms(self):
+        return sum(self.samples) / len(self.samples) if self.samples else 0.0
+    
+    def add_frame(self, busy_ms):
+        """Record one frame; returns True when the quality level changed"""
+        if not self.enabled:
+            return False
+        self.samples.append(busy_ms)
+        self.frames_since_change += 1
+        climb_held = self.last_change > 0 and self.frames_since_change > self.upgrade_delay
+        if climb_held:
+            self.upgrade_delay = QUALITY_UPGRADE_DELAY
+        if len(self.samples) < self.samples.maxlen:
+            return False
+        
+        average = self.average_ms()
+        if average > self.budget_ms * QUALITY_DOWNGRADE and self.level > 0:
+            if self.last_change > 0 and not climb_held:
+                # The last climb was too much for this machine
+                self.upgrade_delay = min(self.upgrade_delay * 2, QUALITY_MAX_UPGRADE_DELAY)
+            self.set_level(self.level - 1)
+            return True
+        if (average < self.budget_ms * QUALITY_UPGRADE and self.level < len(QUALITY_LEVELS) - 1
+                and self.frames_since_change >= self.upgrade_delay):
+            self.set_level(self.level + 1)
+            return True
+        return False
+    
+    def set_level(self, level):
+        self.last_change = level - self.level
+        self.level = level
+        self.samples.clear()
+        self.frames_since_change = 0
+        self.changes += 1
+
+class DirtyRectRenderer:
+    """Tracks which parts of the window changed so only those are restored and pushed.
+    
+    Drawables report their bounds and a state value each frame. Anything whose
+    bounds or state changed is marked dirty on a coarse tile grid, along with
+    where it was last frame. Unchanged drawables are only redrawn where they
+    overlap a dirty region, clipped to it, so layering stays correct.
+    """
+    def __init__(self, size, tile_size=DIRTY_TILE_SIZE, max_fraction=DIRTY_RECT_MAX_FRACTION):
+        self.tile_size = tile_size
+        self.max_fraction = max_fraction
+        self.resize(size)
+    
+    def resize(self, size):
+        self.width, self.height = size
+        self.cols = max(1, (self.width + self.tile_size - 1) // self.tile_size)
+        self.rows = max(1, (self.height + self.tile_size - 1) // self.tile_size)
+        self.tiles = bytearray(self.cols * self.rows)
+        self.previous = {}
+        self.needs_full = True  # Nothing on screen can be trusted after a resize
+    
+    def mark(self, rect):
+        x, y, w, h = rect
+        if w <= 0 or h <= 0:
+            return
+        size = self.tile_size
+        first_col = max(0, x // size)
+        last_col = min(self.cols - 1, (x + w - 1) // size)
+        first_row = max(0, y // size)
+        last_row = min(self.rows - 1, (y + h - 1) // size)
+        if first_col > last_col or first_row > last_row:
+            return
+        run = b'\x01' * (last_col - first_col + 1)
+        for row in range(first_row, last_row + 1):
+            start = row * self.cols
+            self.tiles[start + first_col:start + last_col + 1] = run
+    
+    def plan(self, items):
+        """Mark this frame's dirty tiles and decide how each item is drawn.
+        
+        items is a list of (key, bounds, state, draw) in draw order, where
+        bounds is a list of (x, y, w, h) and a state of None means the item
+        changes every frame. Returns the merged dirty rects and, per item,
+        True to draw it fully, a list of clip rects, or None to skip it.
+        """
+        self.tiles = bytearray(self.cols * self.rows)
+        current = {}
+        plan = [True] * len(items)
+        stable = []
+        
+        for i, (key, bounds, state, _) in enumerate(items):
+            previous = self.previous.get(key)
+            current[key] = (bounds, state)
+            if state is None or previous != (bounds, state):
+                for rect in bounds:
+                    self.mark(rect)
+                if previous is not None:
+                    for rect in previous[0]:
+                        self.mark(rect)
+            else:
+                stable.append(i)
+        
+        # Clear whatever disappeared since last frame
+        for key, (bounds, _) in self.previous.items():
+            if key not in current:
+                for rect in bounds:
+                    self.mark(rect)
+        self.previous = current
+        
+        # Unchanged items only need repainting where the background was restored
+        rects = self.dirty_rects()
+        for i in stable:
+            clips = set()
+            for rect in items[i][1]:
+                clips.update(pygame.Rect(rect).collidelistall(rects))
+            plan[i] = [rects[j] for j in sorted(clips)] or None
+        return rects, plan
+    
+    def dirty_fraction(self):
+        return self.tiles.count(1) / len(self.tiles)
+    
+    def dirty_rects(self):
+        """Dirty tiles merged into row runs, with identical runs on adjacent rows joined"""
+        size = self.tile_size
+        rects = []
+        open_runs = {}
+        for row in range(self.rows):
+            start = row * self.cols
+            runs = {}
+            col = 0
+            while col < self.cols:
+                if self.tiles[start + col]:
+                    first = col
+                    while col < self.cols and self.tiles[start + col]:
+                        col += 1
+                    rect = open_runs.get((first, col))
+                    if rect is not None:
+                        rect.height += size
+                    else:
+                        rect = pygame.Rect(first * size, row * size, (col - first) * size, size)
+                        rects.append(rect)
+                    runs[(first, col)] = rect
+                col += 1
+            open_runs = runs
+        
+        screen_rect = pygame.Rect(0, 0, self.width, self.height)
+        return [rect.clip(screen_rect) for rect in rects]
+    
+    def use_full_redraw(self):
+        if self.needs_full or self.dirty_fraction() > self.max_fraction:
+            self.needs_full = False
+            return True
+        return False
+
+# Posted during replays to restore a window size the recording ended up with
+WINDOW_SIZE_EVENT = pygame.event.custom_type()
+# Posted by the quality governor so level changes are recorded like input
+QUALITY_EVENT = pygame.event.custom_type()
+
+class InputLog:
+    """Binary session log: a header, then one record per frame.
+    
+    The header holds the random seed, starting game time, window size, mouse
+    position and board. Each frame stores its game-time delta and event count
+    followed by the events, packed with struct. Every REPLAY_SYNC_FRAMES frames
+    a checksum of the game state is added so a replay can report the first
+    frame where it diverged.
+    """
+    MAGIC = b"WREC"
+    VERSION = 1
+    HEADER = struct.Struct("<4sHQIHHhhIIB")
+    FRAME = struct.Struct("<HB")
+    LONG_DELTA = struct.Struct("<I")  # Follows a frame delta of 0xFFFF
+    SYNC = 0xFF
+    FLAG_PARTICLE_ENGINE = 1
+    
+    # Event code -> (pygame type, payload layout, field names)
+    EVENTS = {
+        1: (pygame.QUIT, struct.Struct("<"), ()),
+        2: (pygame.KEYDOWN, struct.Struct("<I"), ("key",)),
+        3: (pygame.KEYUP, struct.Struct("<I"), ("key",)),
+        4: (pygame.MOUSEBUTTONDOWN, struct.Struct("<hhB"), ("x", "y", "button")),
+        5: (pygame.MOUSEMOTION, struct.Struct("<hhhhB"), ("x", "y", "rel_x", "rel_y", "buttons")),
+        6: (pygame.MOUSEWHEEL, struct.Struct("<h"), ("y",)),
+        7: (pygame.VIDEORESIZE, struct.Struct("<HH"), ("w", "h")),
+        8: (WINDOW_SIZE_EVENT, struct.Struct("<HH"), ("w", "h")),
+        9: (pygame.WINDOWFOCUSLOST, struct.Struct("<"), ()),
+        10: (QUALITY_EVENT, struct.Struct("<B"), ("level",)),
+    }
+    CODES = {event_type: code for code, (event_type, _, _) in EVENTS.items()}
+
+def state_checksum(game):
+    """CRC of the simulation state a replay must reproduce exactly"""
+    engine = game.engine
+    mt_state = random.getstate()[1]
+    summary = struct.pack("<IIIIiiI", get_ticks() & 0xFFFFFFFF, engine.moves, engine.score,
+                          mt_state[-1], int(game.witch.x * 16), int(game.witch.y * 16),
+                          len(game.floating_particles) + game.background_sparkle_count())
+    checksum = zlib.crc32(summary)
+    checksum = zlib.crc32(engine.board.revealed, checksum)
+    return zlib.crc32(engine.board.matched, checksum)
+
+class InputRecorder:
+    """Writes the seed and every handled input event of a session to an InputLog"""
+    def __init__(self, path, seed, board_size=None):
+        self.file = open(path, "wb")
+        self.seed = seed
+        self.board_size = board_size
+        self.ticks = pygame.time.get_ticks()  # Frozen for the whole frame while recording
+        self.start_ticks = self.ticks
+        self.last_ticks = self.ticks
+        self.size = None
+        self.frame = bytearray()
+        self.count = 0
+        self.frames = 0
+    
+    def start(self, game):
+        self.size = game.screen.get_size()
+        flags = InputLog.FLAG_PARTICLE_ENGINE if game.use_particle_engine else 0
+        rows, cols = self.board_size or (0, 0)
+        self.file.write(InputLog.HEADER.pack(InputLog.MAGIC, InputLog.VERSION, self.seed, self.start_ticks,
+                                             *self.size, *game.mouse_pos, rows, cols, flags))
+    
+    def begin_frame(self):
+        self.ticks = pygame.time.get_ticks()
+    
+    def add(self, code, *values):
+        _, layout, _ = InputLog.EVENTS[code]
+        self.frame.append(code)
+        self.frame += layout.pack(*values)
+        self.count += 1
+    
+    def record(self, event, size):
+        """Log an event after the game handled it, with the window size it left behind"""
+        code = InputLog.CODES.get(event.type)
+        if code is None:
+            return
+        if event.type == pygame.VIDEORESIZE:
+            # Store the size the window actually took, not the one asked for
+            self.add(code, *size)
+            self.size = size
+            return
+        if size != self.size:
+            self.add(InputLog.CODES[WINDOW_SIZE_EVENT], *size)
+            self.size = size
+        if event.type in (pygame.KEYDOWN, pygame.KEYUP):
+            self.add(code, event.key)
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            self.add(code, *event.pos, event.button)
+        elif event.type == pygame.MOUSEMOTION:
+            buttons = sum(1 << i for i, pressed in enumerate(event.buttons[:3]) if pressed)
+            self.add(code, *event.pos, *event.rel, buttons)
+        elif event.type == pygame.MOUSEWHEEL:
+            self.add(code, event.y)
+        elif event.type == QUALITY_EVENT:
+            self.add(code, event.level)
+        else:
+            self.add(code)
+    
+    def end_frame(self, game):
+        if self.frames % REPLAY_SYNC_FRAMES == 0:
+            self.frame.append(InputLog.SYNC)
+            self.frame += struct.pack("<I", state_checksum(game))
+            self.count += 1
+        
+        delta = self.ticks - self.last_ticks
+        if delta < 0xFFFF:
+            self.file.write(InputLog.FRAME.pack(delta, self.count))
+        else:
+            self.file.write(InputLog.FRAME.pack(0xFFFF, self.count) + InputLog.LONG_DELTA.pack(delta))
+        self.file.write(self.frame)
+        self.last_ticks = self.ticks
+        self.frame = bytearray()
+        self.count = 0
+        self.frames += 1
+    
+    def close(self):
+        self.file.close()
+
+class InputReplay:
+    """Feeds an InputLog back frame by frame on a virtual clock"""
+    def __init__(self, path):
+        with open(path, "rb") as log_file:
+            self.data = log_file.read()
+        if len(self.data) < InputLog.HEADER.size:
+            raise ValueError(f"{path} is not a version {InputLog.VERSION} input log")
+        (magic, version, self.seed, self.ticks, width, height, mouse_x, mouse_y,
+         rows, cols, flags) = InputLog.HEADER.unpack_from(self.data)
+        if magic != InputLog.MAGIC or version != InputLog.VERSION:
+            raise ValueError(f"{path} is not a version {InputLog.VERSION} input log")
+        self.size = (width, height)
+        self.mouse_pos = (mouse_x, mouse_y)
+        self.board_size = (rows, cols) if rows else None
+        self.particle_engine = bool(flags & InputLog.FLAG_PARTICLE_ENGINE)
+        self.offset = InputLog.HEADER.size
+        self.frames = 0
+        self.expected = None
+        self.divergence = None  # First frame whose state checksum did not match
+    
+    def next_frame(self):
+        """Events of the next frame with the clock advanced to it, or None at the end"""
+        offset = self.offset
+        expected = None
+        events = []
+        try:
+            delta, count = InputLog.FRAME.unpack_from(self.data, offset)
+            offset += InputLog.FRAME.size
+            if delta == 0xFFFF:
+                delta, = InputLog.LONG_DELTA.unpack_from(self.data, offset)
+                offset += InputLog.LONG_DELTA.size
+            for _ in range(count):
+                code = self.data[offset]
+                offset += 1
+                if code == InputLog.SYNC:
+                    expected, = struct.unpack_from("<I", self.data, offset)
+                    offset += 4
+                    continue
+                event_type, layout, fields = InputLog.EVENTS[code]
+                values = dict(zip(fields, layout.unpack_from(self.data, offset)))
+                offset += layout.size
+                events.append(self.make_event(event_type, values))
+        except (struct.error, IndexError):
+            # A frame cut short, as the last one is when the recording process died, ends the log
+            return None
+        self.offset = offset
+        self.ticks += delta
+        self.expected = expected
+        return events
+    
+    def make_event(self, event_type, values):
+        if event_type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEMOTION):
+            values["pos"] = (values.pop("x"), values.pop("y"))
+        if event_type == pygame.MOUSEMOTION:
+            values["rel"] = (values.pop("rel_x"), values.pop("rel_y"))
+            values["buttons"] = tuple((values["buttons"] >> i) & 1 for i in range(3))
+        if event_type in (pygame.VIDEORESIZE, WINDOW_SIZE_EVENT):
+            values["size"] = (values["w"], values["h"])
+        return pygame.event.Event(event_type, values)
+    
+    def end_frame(self, game):
+        if self.expected is not None and self.divergence is None:
+            if state_checksum(game) != self.expected:
+                self.divergence = self.frames
+        self.frames += 1
+
+class BoardView:
+    """The flags of a few cards, copied from a BoardModel for a SceneSnapshot"""
+    __slots__ = ('symbols', 'revealed', 'matched', 'reveal_times')
+    
+    def __init__(self, board, indices):
+        self.symbols = {index: board.symbols[index] for index in indices}
+        self.revealed = {index: board.revealed[index] for index in indices}
+        self.matched = {index: board.matched[index] for index in indices}
+        self.reveal_times = {index: board.reveal_times[index] for index in indices}
+
+class SceneSnapshot:
+    """Everything a frame draws, copied after a simulation step and interpolated.
+    
+    Attributes are named like the game's own, so the render methods draw
+    from self.scene whether that is the live game or one of these.
+    """
+    def __init__(self, game, timestep):
+        self.ticks = timestep.ticks()
+        self.engine = copy.copy(game.engine)  # Only the counters are read
+        self.moon = copy.copy(game.moon)
+        self.castles = [castle.snapshot() for castle in game.castles]
+        self.witch = copy.copy(game.witch)
+        self.fairies = [fairy.snapshot() for fairy in game.fairies]
+        self.background_sparkles = [copy.copy(sparkle) for sparkle in game.background_sparkles]
+        self.floating_particles = [copy.copy(particle) for particle in game.floating_particles]
+        self.background_particles = self.effect_particles = self.card_particles = None
+        if game.effect_particles is not None:
+            self.background_particles = game.background_particles.snapshot()
+            self.effect_particles = game.effect_particles.snapshot()
+            self.card_particles = game.card_particles.snapshot()
+        board = BoardView(game.engine.board, [card.index for card in game.cards])
+        self.cards = [card.snapshot(board) for card in game.cards]
+        interpolate([self.witch, *self.fairies, *self.cards], timestep.alpha)
+
+class SimulationThread(threading.Thread):
+    """Runs the fixed steps of the threaded loop while the main thread renders.
+    
+    The main thread owns the game from wait() until run_steps(), which is when
+    it handles input. The steps then run here, and their SceneSnapshot is
+    ready for the next frame, so each frame draws the state one frame old.
+    """
+    def __init__(self, game, timestep):
+        super().__init__(name="simulation", daemon=True)
+        self.game = game
+        self.timestep = timestep
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.results.put(SceneSnapshot(game, timestep))
+        self.scene_ticks = timestep.ticks()
+        self.busy_ms = 0.0  # Time the last steps and snapshot took on this thread
+    
+    def ticks(self):
+        """Game clock: simulation time on this thread, the drawn scene's time elsewhere"""
+        if threading.get_ident() == self.ident:
+            return self.timestep.ticks()
+        return self.scene_ticks
+    
+    def wait(self):
+        """Scene from the last run_steps(), once the game is free to change again"""
+        scene = self.results.get()
+        if isinstance(scene, BaseException):
+            raise scene
+        self.scene_ticks = scene.ticks
+        return scene
+    
+    def run_steps(self, steps):
+        self.requests.put(steps)
+    
+    def stop(self):
+        self.requests.put(None)
+        self.join()
+    
+    def run(self):
+        while True:
+            steps = self.requests.get()
+            if steps is None:
+                return
+            start = time.perf_counter()
+            try:
+                for _ in range(steps):
+                    self.game.update_simulation()
+                    self.timestep.step()
+                scene = SceneSnapshot(self.game, self.timestep)
+            except BaseException as error:
+                # Raised again on the main thread by wait()
+                self.results.put(error)
+                return
+            self.busy_ms = (time.perf_counter() - start) * 1000
+            self.results.put(scene)
+
 class EnhancedDisneyWitchGame:
-    def __init__(self):
+    def __init__(self, board_size=None, remote=None, autosave=None, resumed=None):
+        # Milliseconds since STARTUP_CLOCK at each startup milestone
+        self.startup = {"import_ms": self.startup_ms()}
+        
         # Set up display
+        init_pygame()
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.RESIZABLE)
         pygame.display.set_caption("🌙 Enhanced Disney Witch's Magical Memory 🧙‍♀️")
         self.clock = pygame.time.Clock()
@@ -733,150 +2430,402 @@ class EnhancedDisneyWitchGame:
         # Game objects
         self.moon = Moon()
         
-        # Multiple Tangled-style castles
-        self.castles = [
-            TangleCastle(WINDOW_WIDTH - 350, WINDOW_HEIGHT - 220, 1.2),  # Main large castle
-            TangleCastle(WINDOW_WIDTH - 600, WINDOW_HEIGHT - 180, 0.8),  # Medium castle
-            TangleCastle(50, WINDOW_HEIGHT - 160, 0.6),                  # Small left castle
-            TangleCastle(WINDOW_WIDTH - 150, WINDOW_HEIGHT - 140, 0.5),  # Tiny right castle
-        ]
+        # Effect budgets follow measured frame time unless a fixed quality is set
+        self.governor = QualityGovernor()
+        self.quality = QUALITY_LEVELS[self.governor.level]
+        
+        # Multiple Tangled-style castles; the quality level decides how many are shown
+        self.all_castles = [TangleCastle(x, y, scale) for x, y, scale in castle_layout()]
+        self.castles = self.all_castles[:self.quality["castles"]]
         
         self.witch = FlyingWitch()
         
         # Multiple flying fairies
         self.fairies = []
-        for _ in range(6):  # 6 fairies flying around
+        for _ in range(self.quality["fairies"]):
             self.fairies.append(FlyingFairy())
         
+        # Matching rules, moves and score live in the engine; cards only draw its board
+        self.engine = None
+        self.remote = remote  # RemoteEngine when the rules run on a memory_server.py
+        self.autosave = autosave  # GameSave that every deal and move is written to
+        self.resumed = resumed  # SavedGame to deal instead of a fresh shuffle
         self.cards = []
-        self.revealed_cards = []
-        self.matched_pairs = 0
-        self.total_pairs = (ROWS * COLS) // 2
-        self.game_won = False
+        self.card_grid = None
+        
+        # (rows, cols) for a virtualized large board, or None for the classic layout
+        self.board_size = board_size
+        self.large_board = None
         self.floating_particles = []
         self.background_sparkles = []
-        self.score = 0
-        self.moves = 0
+        
+        # Array-backed particle layers; the object lists above are kept for comparison
+        self.use_particle_engine = USE_PARTICLE_ENGINE
+        if np is not None:
+            self.background_particles = ParticleSystem()
+            self.card_particles = ParticleSystem()
+            self.effect_particles = ParticleSystem(capacity=1024)
+        else:
+            self.background_particles = self.card_particles = self.effect_particles = None
+        
+        # Cached night sky layer, rebuilt on resize
+        self.sky_surface = None
+        self.sky_size = None
+        self.star_positions = []
+        self.build_sky_surface()
+        
+        # Composed HUD and victory overlay, rebuilt when the stats change
+        self.hud_layers = None
+        self.hud_key = None
+        self.win_overlay = None
+        self.win_key = None
+        
+        # Phase timers, overlay and Chrome-trace export (off until enabled)
+        self.profiler = FrameProfiler()
+        self.trace_path = None
+        
+        # Dirty-rect rendering restores changed regions from a cached background
+        self.dirty_rect_rendering = DIRTY_RECT_RENDERING
+        self.dirty_renderer = DirtyRectRenderer((WINDOW_WIDTH, WINDOW_HEIGHT))
+        self.background_cache = None
+        self.background_key = None
+        
+        # What frames are drawn from: the game itself, or the latest SceneSnapshot with --threaded
+        self.scene = self
+        self.threaded = False
+        
+        # Session recording and replay (see InputLog)
+        self.recorder = None
+        self.replay = None
+        self.running = False
+        self.held_keys = set()  # Tracked from events so replays see the same keys held
+        
+        # Local leaderboard shown on the victory screen (see memory_leaderboard.py)
+        self.leaderboard = None
+        self.last_win = None  # played_at of the win submitted this session, to highlight it
+        
+        # Hover is recomputed from the card grid only when the pointer or cards change
+        self.mouse_pos = pygame.mouse.get_pos()
+        self.hovered_card = None
+        self.hover_dirty = True
         
         # Initialize background sparkles
-        for _ in range(100):  # More sparkles for magical atmosphere
-            self.background_sparkles.append(MagicalSparkle(
-                random.uniform(0, WINDOW_WIDTH),
-                random.uniform(0, WINDOW_HEIGHT)
-            ))
+        self.spawn_background_sparkles(self.quality["background_sparkles"])
+        self.apply_quality(self.governor.level)
         
         self.setup_cards()
+        
+        # Card sprites are pre-rendered in the background once the first frame is up,
+        # in worker processes when there are cores to spare
+        self.warm_up = None
+        self.warm_up_size = None
+        self.card_art_pool = None
+        self.startup_profile = False
+        self.startup["init_ms"] = self.startup_ms()
+    
+    def startup_ms(self):
+        return round((time.perf_counter() - STARTUP_CLOCK) * 1000, 1)
+    
+    def card_size(self):
+        cards = self.cards  # Replaced, not changed in place, by a --threaded simulation step
+        if cards:
+            return int(cards[0].width), int(cards[0].height)
+        return CARD_WIDTH, CARD_HEIGHT
+    
+    def start_warm_up(self):
+        """Pre-render card sprites in the background for the current card size"""
+        self.warm_up_size = width, height = self.card_size()
+        if CARD_ART_PROCESSES > 0:
+            if self.card_art_pool is None:
+                import multiprocessing  # Single-core machines never pay for the pool
+                # By now the simulation, leaderboard and warm-up threads may be running, and forking
+                # a threaded process can deadlock the child; forkserver workers start clean
+                context = multiprocessing.get_context("forkserver")
+                self.card_art_pool = context.Pool(CARD_ART_PROCESSES)
+            self.warm_up = PooledWarmUp(self.card_art_pool, card_sprite_keys(width, height))
+        else:
+            self.warm_up = AssetWarmUp(card_sprite_jobs(width, height))
+        self.warm_up.start()
+    
+    def check_card_size(self):
+        """Pre-render again for a new card size (a large-board zoom) once the last warm-up is done"""
+        if (self.card_art_pool is not None and not self.warm_up.is_alive()
+                and self.card_size() != self.warm_up_size):
+            self.start_warm_up()
+    
+    def check_startup(self):
+        """Note when the first frame is up and when warm-up finishes; ends --startup-profile runs"""
+        if "first_frame_ms" not in self.startup:
+            self.startup["first_frame_ms"] = self.startup_ms()
+            if self.replay is None:
+                self.start_warm_up()
+        elif self.warm_up is not None and self.warm_up.elapsed_ms is not None and "warm_up_ms" not in self.startup:
+            self.startup["warm_up_ms"] = self.startup_ms()
+            self.startup["sprites_warmed"] = self.warm_up.built
+            if self.startup_profile:
+                print(json.dumps(self.startup))
+                self.running = False
     
     def setup_cards(self):
         """Create and shuffle cards with faster entrance"""
+        if self.board_size:
+            self.setup_large_board()
+            return
         colors_needed = (ROWS * COLS) // 2
-        selected_colors = WITCH_COLORS[:colors_needed]
-        
-        card_data = []
-        for color_data in selected_colors:
-            card_data.extend([color_data] * 2)
         
-        random.shuffle(card_data)
-        
-        # Calculate starting position to center the grid properly
-        total_width = COLS * (CARD_WIDTH + CARD_MARGIN) - CARD_MARGIN
-        total_height = ROWS * (CARD_HEIGHT + CARD_MARGIN) - CARD_MARGIN
-        
-        screen_rect = self.screen.get_rect()
-        start_x = (screen_rect.width - total_width) // 2
-        start_y = (screen_rect.height - total_height) // 2 + 40
+        if self.remote is not None:
+            # The server shuffles and only tells us each symbol as its card is flipped
+            self.remote.new_game(colors_needed, colors_needed)
+            self.engine = self.remote
+        elif self.resumed is not None:
+            self.engine = self.take_resumed_engine()
+        else:
+            symbols = []
+            for symbol in range(colors_needed):
+                symbols.extend([symbol] * 2)
+            
+            random.shuffle(symbols)
+            self.engine = MemoryEngine(BoardModel(symbols), REVEAL_TIME, MATCH_SCORE)
         
-        # Create card objects
+        # Create card views over the board
+        start_x, start_y = self.grid_origin()
         self.cards = []
         index = 0
         for row in range(ROWS):
             for col in range(COLS):
                 x = start_x + col * (CARD_WIDTH + CARD_MARGIN)
                 y = start_y + row * (CARD_HEIGHT + CARD_MARGIN)
-                color_data = card_data[index]
-                card = Card(x, y, color_data, index)
+                card = Card(x, y, self.engine.board, index, self.card_sparkle_system())
                 self.cards.append(card)
                 index += 1
+        
+        self.card_grid = CardGrid(start_x, start_y, ROWS, COLS, self.cards)
+        self.hovered_card = None
+        self.hover_dirty = True
+        self.save_game()
     
-    def handle_card_click(self, pos):
-        """Handle clicking on a card"""
-        if len(self.revealed_cards) >= 2:
-            return
+    def grid_origin(self):
+        """Top-left of the classic grid, centered in the window"""
+        total_width = COLS * (CARD_WIDTH + CARD_MARGIN) - CARD_MARGIN
+        total_height = ROWS * (CARD_HEIGHT + CARD_MARGIN) - CARD_MARGIN
         
+        screen_rect = self.screen.get_rect()
+        start_x = (screen_rect.width - total_width) // 2
+        start_y = (screen_rect.height - total_height) // 2 + 40
+        return start_x, start_y
+    
+    def layout_cards(self):
+        """Move the dealt cards to the grid centered in the resized window"""
+        start_x, start_y = self.grid_origin()
         for card in self.cards:
-            if card.is_clicked(pos) and not card.is_revealed and not card.is_matched:
-                card.is_revealed = True
-                card.reveal_time = pygame.time.get_ticks()
-                self.revealed_cards.append(card)
-                
-                if len(self.revealed_cards) == 2:
-                    self.moves += 1
-                break
+            row, col = divmod(card.index, COLS)
+            card.place(start_x + col * (CARD_WIDTH + CARD_MARGIN), start_y + row * (CARD_HEIGHT + CARD_MARGIN),
+                       card.width, card.height)
+        self.card_grid = CardGrid(start_x, start_y, ROWS, COLS, self.cards)
+        self.hover_dirty = True
+    
+    def setup_large_board(self):
+        """Board records for every cell; Cards come and go with the camera"""
+        rows, cols = self.board_size
+        if self.resumed is not None:
+            self.engine = self.take_resumed_engine()
+            board = self.engine.board
+        else:
+            board = None
+        self.large_board = LargeBoard(rows, cols, WINDOW_WIDTH, WINDOW_HEIGHT, self.card_sparkle_system(), board)
+        if board is None:
+            self.engine = MemoryEngine(self.large_board.board, REVEAL_TIME, MATCH_SCORE)
+        self.cards = []
+        self.hovered_card = None
+        self.update_large_board()
+        self.save_game()
+    
+    def take_resumed_engine(self):
+        """The saved game's engine, moved onto the current game clock"""
+        engine = self.resumed.resume(get_ticks())
+        self.resumed = None
+        return engine
+    
+    def save_game(self):
+        """Snapshot a new deal; the moves that follow are appended to it"""
+        if self.autosave is not None:
+            self.autosave.save(self.engine, self.board_size, get_ticks())
+    
+    def update_large_board(self):
+        """Pan with the arrow keys, then attach and release cards for the new view"""
+        board = self.large_board
+        keys = self.held_keys
+        dx = ((pygame.K_RIGHT in keys) - (pygame.K_LEFT in keys)) * CAMERA_PAN_SPEED
+        dy = ((pygame.K_DOWN in keys) - (pygame.K_UP in keys)) * CAMERA_PAN_SPEED
+        if dx or dy:
+            board.camera.pan(dx, dy)
+        
+        if board.sync():
+            self.cards = board.cards
+            self.card_grid = board.grid
+            self.hover_dirty = True
+            if self.hovered_card is not None and self.hovered_card not in board.active.values():
+                self.hovered_card = None
+    
+    def card_sparkle_system(self):
+        """Particle system matched cards should sparkle into, if the engine is on"""
+        return self.card_particles if self.use_particle_engine else None
+    
+    def toggle_particle_engine(self):
+        """Switch between array-backed and per-object particles for visual comparison"""
+        if np is None:
+            return
+        self.use_particle_engine = not self.use_particle_engine
+        for card in self.cards:
+            card.sparkle_system = self.card_sparkle_system()
+        if self.large_board is not None:
+            self.large_board.sparkle_system = self.card_sparkle_system()
+            for card in self.large_board.pool:
+                card.sparkle_system = self.card_sparkle_system()
+    
+    def spawn_background_sparkles(self, count):
+        if self.use_particle_engine:
+            self.background_particles.emit_sparkles(
+                self.background_particles.rng.uniform(0, WINDOW_WIDTH, count),
+                self.background_particles.rng.uniform(0, WINDOW_HEIGHT, count),
+                count
+            )
+        else:
+            for _ in range(count):
+                self.background_sparkles.append(MagicalSparkle(
+                    random.uniform(0, WINDOW_WIDTH),
+                    random.uniform(0, WINDOW_HEIGHT)
+                ))
+    
+    def spawn_celebration(self, x, y, colors, count, spread):
+        """Burst of star particles around (x, y) using one color or a list to pick from"""
+        if self.use_particle_engine:
+            rng = self.effect_particles.rng
+            if not isinstance(colors[0], int):
+                colors = [colors[i] for i in rng.integers(0, len(colors), count)]
+            self.effect_particles.emit_stars(
+                x + rng.uniform(-spread, spread, count),
+                y + rng.uniform(-spread, spread, count),
+                colors, count
+            )
+        else:
+            for _ in range(count):
+                self.floating_particles.append(FloatingParticle(
+                    x + random.uniform(-spread, spread),
+                    y + random.uniform(-spread, spread),
+                    colors if isinstance(colors[0], int) else random.choice(colors)
+                ))
+    
+    def background_sparkle_count(self):
+        count = len(self.background_sparkles)
+        if self.background_particles is not None:
+            count += len(self.background_particles)
+        return count
+    
+    def handle_card_click(self, pos):
+        """Handle clicking on a card"""
+        card = self.card_grid.card_at(pos)
+        now = get_ticks()
+        if card is not None and self.engine.flip(card.index, now):
+            self.hover_dirty = True
+            if self.autosave is not None:
+                self.autosave.record_flip(self.engine, card.index, now)
     
     def update_revealed_cards(self):
         """Update the state of revealed cards - FASTER"""
-        current_time = pygame.time.get_ticks()
+        now = get_ticks()
+        result = self.engine.update(now)
+        if result is None:
+            return
         
-        if len(self.revealed_cards) == 2:
-            if all(current_time - card.reveal_time >= REVEAL_TIME for card in self.revealed_cards):
-                card1, card2 = self.revealed_cards
-                
-                if card1.color == card2.color:
-                    # Cards match
-                    card1.is_matched = True
-                    card2.is_matched = True
-                    self.matched_pairs += 1
-                    self.score += 250  # Higher score
-                    
-                    # Create more celebration particles
-                    for card in [card1, card2]:
-                        rect = card.get_rect()
-                        for _ in range(30):  # More particles
-                            self.floating_particles.append(FloatingParticle(
-                                rect.centerx + random.uniform(-50, 50),
-                                rect.centery + random.uniform(-50, 50),
-                                card.color
-                            ))
-                    
-                    # Check if game is won
-                    if self.matched_pairs == self.total_pairs:
-                        self.game_won = True
-                        # Massive victory particles explosion
-                        for _ in range(200):
-                            self.floating_particles.append(FloatingParticle(
-                                WINDOW_WIDTH // 2 + random.uniform(-400, 400),
-                                WINDOW_HEIGHT // 2 + random.uniform(-400, 400),
-                                random.choice([color for color, _ in WITCH_COLORS])
-                            ))
-                else:
-                    # Cards don't match
-                    card1.is_revealed = False
-                    card2.is_revealed = False
-                
-                self.revealed_cards = []
+        first, second, matched = result
+        self.hover_dirty = True
+        if self.autosave is not None:
+            self.autosave.record_resolve(self.engine, first, second, matched, now)
+        if matched:
+            # Create more celebration particles
+            color = WITCH_COLORS[self.engine.board.symbols[first]][0]
+            for index in [first, second]:
+                center_x, center_y = self.card_center(index)
+                self.spawn_celebration(center_x, center_y, color,
+                                       self.quality["celebration_particles"], 50)
+            
+            if self.engine.won:
+                if self.leaderboard is not None:
+                    self.last_win = self.leaderboard.submit(self.board_key(), self.engine.score, self.engine.moves)
+                # Massive victory particles explosion
+                self.spawn_celebration(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2,
+                                       [color for color, _ in WITCH_COLORS],
+                                       self.quality["victory_particles"], 400)
     
-    def update_hover(self, mouse_pos):
-        """Update hover effects"""
-        for card in self.cards:
-            card.hover = card.is_clicked(mouse_pos) and not card.is_matched and not card.is_revealed
+    def board_key(self):
+        """Board size as the leaderboard files it, such as 3x4"""
+        rows, cols = self.board_size or (ROWS, COLS)
+        return f"{rows}x{cols}"
+    
+    def card_center(self, index):
+        if self.large_board is not None:
+            return self.large_board.cell_center(index)
+        return self.cards[index].get_rect().center
+    
+    def update_hover(self, mouse_pos=None):
+        """Update hover effects when the pointer has moved or the cards under it changed"""
+        if mouse_pos is not None and mouse_pos != self.mouse_pos:
+            self.mouse_pos = mouse_pos
+            self.hover_dirty = True
+        if not self.hover_dirty:
+            return
+        
+        candidates = self.card_grid.candidates(self.mouse_pos)
+        card = self.card_grid.card_at(self.mouse_pos)
+        if card is not None and (card.is_matched or card.is_revealed):
+            card = None
+        if card is not self.hovered_card:
+            if self.hovered_card is not None:
+                self.hovered_card.hover = False
+            if card is not None:
+                card.hover = True
+            self.hovered_card = card
+        
+        # A card still flying in under the pointer may become hoverable next frame
+        self.hover_dirty = any(not candidate.entrance_complete for candidate in candidates)
+    
+    def build_sky_surface(self):
+        """Pre-render the night sky gradient and star positions for the current window size"""
+        def row_color(y):
+            ratio = y / WINDOW_HEIGHT
+            return tuple(int(start + (end - start) * ratio) for start, end in zip(NIGHT_SKY_START, NIGHT_SKY_END))
+        sky = vertical_gradient(WINDOW_WIDTH, WINDOW_HEIGHT, row_color)
+        
+        self.sky_surface = sky.convert() if pygame.display.get_surface() else sky
+        self.sky_size = (WINDOW_WIDTH, WINDOW_HEIGHT)
+        
+        # Star positions only depend on the window size
+        self.star_positions = [
+            ((i * 137) % WINDOW_WIDTH, (i * 211) % max(1, WINDOW_HEIGHT // 2), i)
+            for i in range(QUALITY_LEVELS[-1]["stars"])
+        ]
     
     def draw_night_sky_background(self):
         """Draw magical night sky with gradient"""
-        for y in range(WINDOW_HEIGHT):
-            ratio = y / WINDOW_HEIGHT
-            r = int(NIGHT_SKY_START[0] + (NIGHT_SKY_END[0] - NIGHT_SKY_START[0]) * ratio)
-            g = int(NIGHT_SKY_START[1] + (NIGHT_SKY_END[1] - NIGHT_SKY_START[1]) * ratio)
-            b = int(NIGHT_SKY_START[2] + (NIGHT_SKY_END[2] - NIGHT_SKY_START[2]) * ratio)
-            pygame.draw.line(self.screen, (r, g, b), (0, y), (WINDOW_WIDTH, y))
+        if self.sky_surface is None or self.sky_size != (WINDOW_WIDTH, WINDOW_HEIGHT):
+            self.build_sky_surface()
+        self.screen.blit(self.sky_surface, (0, 0))
         
         # Draw more twinkling stars
-        for i in range(150):  # More stars
-            star_x = (i * 137) % WINDOW_WIDTH
-            star_y = (i * 211) % (WINDOW_HEIGHT // 2)
-            twinkle = abs(math.sin(pygame.time.get_ticks() * 0.005 + i))  # Faster twinkling
+        for star_x, star_y, size, _ in self.visible_stars():
+            pygame.draw.circle(self.screen, STAR_COLOR, (star_x, star_y), size)
+    
+    def visible_stars(self):
+        """Twinkling stars bright enough to draw this frame as (x, y, size, index)"""
+        phase = get_ticks() * 0.005  # Faster twinkling
+        sin = math.sin
+        stars = []
+        for star_x, star_y, i in self.star_positions[:self.quality["stars"]]:
+            twinkle = abs(sin(phase + i))
             if twinkle > 0.6:  # More frequent twinkling
-                size = int(2 + twinkle * 3)
-                pygame.draw.circle(self.screen, STAR_COLOR, (star_x, star_y), size)
+                stars.append((star_x, star_y, int(2 + twinkle * 3), i))
+        return stars
     
     def update_background_effects(self):
         """Update all background magical effects"""
@@ -898,131 +2847,314 @@ class EnhancedDisneyWitchGame:
         self.background_sparkles = [s for s in self.background_sparkles if s.update()]
         
         # Add new sparkles more frequently
-        if len(self.background_sparkles) < 100:
-            for _ in range(3):  # Add multiple sparkles at once
-                self.background_sparkles.append(MagicalSparkle(
-                    random.uniform(0, WINDOW_WIDTH),
-                    random.uniform(0, WINDOW_HEIGHT)
-                ))
+        if self.background_sparkle_count() < self.quality["background_sparkles"]:
+            self.spawn_background_sparkles(3)  # Add multiple sparkles at once
         
         # Update floating particles
         self.floating_particles = [p for p in self.floating_particles if p.update()]
+        
+        if self.effect_particles is not None:
+            self.background_particles.update()
+            self.card_particles.update()
+            self.effect_particles.update()
     
     def draw_background_effects(self):
         """Draw all background magical effects"""
+        scene = self.scene
         # Draw all castles first (behind everything)
-        for castle in self.castles:
+        for castle in scene.castles:
             castle.draw(self.screen)
         
         # Draw moon
-        self.moon.draw(self.screen)
+        scene.moon.draw(self.screen)
         
         # Draw background sparkles
-        for sparkle in self.background_sparkles:
+        for sparkle in scene.background_sparkles:
             sparkle.draw(self.screen)
+        if scene.background_particles is not None:
+            scene.background_particles.draw(self.screen)
         
         # Draw all flying fairies
-        for fairy in self.fairies:
+        for fairy in scene.fairies:
             fairy.draw(self.screen)
         
         # Draw flying witch
-        self.witch.draw(self.screen)
+        scene.witch.draw(self.screen)
         
         # Draw floating particles
-        for particle in self.floating_particles:
+        for particle in scene.floating_particles:
             particle.draw(self.screen)
+        if scene.effect_particles is not None:
+            scene.effect_particles.draw(self.screen)
     
-    def draw_ui(self):
-        """Draw Disney-style user interface"""
-        # Title with magical glow effect
-        title_text = self.title_font.render("🌙 Enhanced Disney Witch's Magic 🧙‍♀️", True, (255, 215, 0))
-        title_shadow = self.title_font.render("🌙 Enhanced Disney Witch's Magic 🧙‍♀️", True, (0, 0, 0))
-        title_rect = title_text.get_rect(center=(WINDOW_WIDTH // 2, 50))
+    def get_hud_layers(self):
+        """Title, stats panel and instruction as composed (surface, position) pairs.
         
-        # Draw title with glow
-        for offset in [(4, 4), (2, 2)]:
-            self.screen.blit(title_shadow, (title_rect.x + offset[0], title_rect.y + offset[1]))
-        self.screen.blit(title_text, title_rect)
+        They are rebuilt only when the stats or window size change.
+        """
+        engine = self.scene.engine
+        show_instruction = not engine.won and engine.matched_pairs == 0
+        key = (tuple(self.get_stat_lines()), show_instruction, WINDOW_WIDTH, WINDOW_HEIGHT)
+        if key == self.hud_key:
+            return self.hud_layers
+        
+        # Title with magical glow effect
+        layers = []
+        title = TEXT_CACHE.shadowed(self.title_font, "🌙 Enhanced Disney Witch's Magic 🧙‍♀️",
+                                    (255, 215, 0), (0, 0, 0), [(4, 4), (2, 2)])
+        title_size = self.title_font.size("🌙 Enhanced Disney Witch's Magic 🧙‍♀️")
+        title_rect = pygame.Rect((0, 0), title_size)
+        title_rect.center = (WINDOW_WIDTH // 2, 50)
+        layers.append((title, title_rect.topleft))
         
         # Stats panel with Disney styling
         stats_y = 100
-        stats = [
-            f"🔮 Spell Pairs: {self.matched_pairs}/{self.total_pairs}",
-            f"⭐ Magic Moves: {self.moves}",
-            f"✨ Enchant Score: {self.score}"
-        ]
-        
-        for i, stat in enumerate(stats):
-            text = self.font.render(stat, True, (255, 255, 255))
-            shadow_text = self.font.render(stat, True, (0, 0, 0))
-            self.screen.blit(shadow_text, (22, stats_y + i * 30 + 2))
-            self.screen.blit(text, (20, stats_y + i * 30))
+        lines = [TEXT_CACHE.shadowed(self.font, stat, (255, 255, 255), (0, 0, 0), [(2, 2)])
+                 for stat in self.get_stat_lines()]
+        panel = pygame.Surface((max(line.get_width() for line in lines),
+                                (len(lines) - 1) * 30 + lines[-1].get_height()), pygame.SRCALPHA)
+        for i, line in enumerate(lines):
+            panel.blit(line, (0, i * 30))
+        layers.append((panel, (20, stats_y)))
         
         # Instructions
-        if not self.game_won and self.matched_pairs == 0:
+        if show_instruction:
             instruction = "🌟 Cast spells by matching magical gem pairs! 🌟"
-            text = self.font.render(instruction, True, (255, 255, 255))
-            shadow_text = self.font.render(instruction, True, (0, 0, 0))
-            text_rect = text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT - 40))
-            self.screen.blit(shadow_text, (text_rect.x + 2, text_rect.y + 2))
-            self.screen.blit(text, text_rect)
+            text = TEXT_CACHE.shadowed(self.font, instruction, (255, 255, 255), (0, 0, 0), [(2, 2)])
+            text_rect = pygame.Rect((0, 0), self.font.size(instruction))
+            text_rect.center = (WINDOW_WIDTH // 2, WINDOW_HEIGHT - 40)
+            layers.append((text, text_rect.topleft))
+        
+        self.hud_layers = layers
+        self.hud_key = key
+        return layers
     
-    def draw_win_screen(self):
-        """Draw Disney-style magical victory screen"""
-        if not self.game_won:
-            return
+    def draw_ui(self):
+        """Draw Disney-style user interface"""
+        for surface, position in self.get_hud_layers():
+            self.screen.blit(surface, position)
+    
+    def get_win_overlay(self):
+        """Victory overlay composed once per final score and window size"""
+        engine = self.scene.engine
+        leaderboard = self.leaderboard
+        key = (engine.score, engine.moves, WINDOW_WIDTH, WINDOW_HEIGHT,
+               leaderboard.version if leaderboard is not None else None)
+        if key == self.win_key:
+            return self.win_overlay
         
         # Semi-transparent magical overlay
         overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
         overlay.fill((25, 25, 80, 220))
-        self.screen.blit(overlay, (0, 0))
         
-        # Victory message with Disney sparkle effect
-        win_text = self.big_font.render("🎆 MAGICAL MASTERY! 🎆", True, (255, 215, 0))
-        win_shadow = self.big_font.render("🎆 MAGICAL MASTERY! 🎆", True, (75, 0, 130))
-        win_rect = win_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 80))
-        
-        # Draw with multiple shadow layers for glow effect
-        for offset in [(6, 6), (4, 4), (2, 2)]:
-            self.screen.blit(win_shadow, (win_rect.x + offset[0], win_rect.y + offset[1]))
-        self.screen.blit(win_text, win_rect)
-        
-        # Stats with Disney emojis
-        final_score = self.font.render(f"🌟 Final Enchantment Score: {self.score}", True, (255, 255, 255))
-        moves_text = self.font.render(f"✨ Total Magical Moves: {self.moves}", True, (255, 255, 255))
-        
-        score_rect = final_score.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 20))
-        moves_rect = moves_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 10))
-        
-        # Draw shadows
-        final_score_shadow = self.font.render(f"🌟 Final Enchantment Score: {self.score}", True, (0, 0, 0))
-        moves_text_shadow = self.font.render(f"✨ Total Magical Moves: {self.moves}", True, (0, 0, 0))
-        self.screen.blit(final_score_shadow, (score_rect.x + 2, score_rect.y + 2))
-        self.screen.blit(moves_text_shadow, (moves_rect.x + 2, moves_rect.y + 2))
-        
-        self.screen.blit(final_score, score_rect)
-        self.screen.blit(moves_text, moves_rect)
+        # Victory message with Disney sparkle effect, centered text lines below it
+        lines = [
+            (self.big_font, "🎆 MAGICAL MASTERY! 🎆", (255, 215, 0), (75, 0, 130),
+             [(6, 6), (4, 4), (2, 2)], -80),
+            (self.font, f"🌟 Final Enchantment Score: {engine.score}", (255, 255, 255), (0, 0, 0), [(2, 2)], -20),
+            (self.font, f"✨ Total Magical Moves: {engine.moves}", (255, 255, 255), (0, 0, 0), [(2, 2)], 10),
+            (self.font, "🧙‍♀️ Press R to cast again or ESC to return to reality 🧙‍♀️",
+             (255, 255, 255), (0, 0, 0), [(2, 2)], 60),
+        ]
+        if leaderboard is not None:
+            # Make room below for the top ten, read from the leaderboard's cache
+            lines = [line[:5] + (line[5] - 150,) for line in lines]
+            lines.append((self.font, f"🏆 Hall of Fame {self.board_key()} 🏆", (255, 215, 0), (0, 0, 0),
+                          [(2, 2)], -30))
+            for rank, (_, score, moves, played_at) in enumerate(leaderboard.top(self.board_key()), 1):
+                color = (255, 215, 0) if played_at == self.last_win else (255, 255, 255)
+                when = time.strftime("%b %d %H:%M", time.localtime(played_at))
+                lines.append((self.font, f"{rank}. {moves} moves  {score} points  {when}", color, (0, 0, 0),
+                              [(2, 2)], rank * 26))
+        for font, text, color, shadow_color, offsets, center_offset in lines:
+            composed = TEXT_CACHE.shadowed(font, text, color, shadow_color, offsets)
+            text_rect = pygame.Rect((0, 0), font.size(text))
+            text_rect.center = (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + center_offset)
+            overlay.blit(composed, text_rect)
+        
+        self.win_overlay = overlay
+        self.win_key = key
+        return overlay
+    
+    def draw_win_screen(self):
+        """Draw Disney-style magical victory screen"""
+        if not self.scene.engine.won:
+            return
+        self.screen.blit(self.get_win_overlay(), (0, 0))
+    
+    def hud_bounds(self):
+        """Rectangles draw_ui will cover, including text shadows"""
+        engine = self.scene.engine
+        title_width, title_height = self.title_font.size("🌙 Enhanced Disney Witch's Magic 🧙‍♀️")
+        bounds = [(WINDOW_WIDTH // 2 - title_width // 2 - 1, 50 - title_height // 2 - 1,
+                   title_width + 6, title_height + 6)]
+        for i, stat in enumerate(self.get_stat_lines()):
+            width, height = self.font.size(stat)
+            bounds.append((20, 100 + i * 30, width + 3, height + 3))
+        if not engine.won and engine.matched_pairs == 0:
+            width, height = self.font.size("🌟 Cast spells by matching magical gem pairs! 🌟")
+            bounds.append((WINDOW_WIDTH // 2 - width // 2 - 1, WINDOW_HEIGHT - 40 - height // 2 - 1,
+                           width + 4, height + 4))
+        return bounds
+    
+    def get_stat_lines(self):
+        engine = self.scene.engine
+        return [
+            f"🔮 Spell Pairs: {engine.matched_pairs}/{engine.total_pairs}",
+            f"⭐ Magic Moves: {engine.moves}",
+            f"✨ Enchant Score: {engine.score}"
+        ]
+    
+    def build_background_cache(self):
+        """Sky gradient with both static castle layers, used to restore dirty regions"""
+        scene = self.scene
+        if self.sky_surface is None or self.sky_size != (WINDOW_WIDTH, WINDOW_HEIGHT):
+            self.build_sky_surface()
+        background = self.sky_surface.copy()
+        for castle in scene.castles:
+            if castle.static_layer is None or castle.layer_key != (castle.scale, castle.x, castle.y):
+                castle.build_static_layer()
+            under, over = castle.static_layer
+            background.blit(under, castle.layer_origin)
+            background.blit(over, castle.layer_origin)
+        self.background_cache = background
+        self.background_key = (self.sky_size, tuple(castle.layer_key for castle in scene.castles))
+    
+    def scene_items(self):
+        """Everything drawn over the background, in draw order, for the dirty-rect renderer"""
+        scene = self.scene
+        screen = self.screen
+        items = []
+        
+        # Twinkling stars
+        for star_x, star_y, size, i in self.visible_stars():
+            items.append((('star', i), [(star_x - size, star_y - size, size * 2 + 1, size * 2 + 1)], size,
+                          lambda x=star_x, y=star_y, r=size: pygame.draw.circle(screen, STAR_COLOR, (x, y), r)))
+        
+        for i, castle in enumerate(scene.castles):
+            items.append((('castle', i), [castle.get_animated_bounds()], None,
+                          lambda castle=castle: castle.draw_animated_patch(screen)))
+        
+        items.append(('moon', [scene.moon.get_bounds()], None, lambda: scene.moon.draw(screen)))
+        
+        if scene.background_sparkles:
+            items.append(('background_sparkles', [s.get_bounds() for s in scene.background_sparkles], None,
+                          lambda: [sparkle.draw(screen) for sparkle in scene.background_sparkles]))
+        if scene.background_particles is not None:
+            items.append(('background_particles', scene.background_particles.bounds(), None,
+                          lambda: scene.background_particles.draw(screen)))
+        
+        for i, fairy in enumerate(scene.fairies):
+            items.append((('fairy', i), [fairy.get_bounds()], None, lambda fairy=fairy: fairy.draw(screen)))
+        items.append(('witch', [scene.witch.get_bounds()], None, lambda: scene.witch.draw(screen)))
+        
+        if scene.floating_particles:
+            items.append(('floating_particles', [p.get_bounds() for p in scene.floating_particles], None,
+                          lambda: [particle.draw(screen) for particle in scene.floating_particles]))
+        if scene.effect_particles is not None:
+            items.append(('effect_particles', scene.effect_particles.bounds(), None,
+                          lambda: scene.effect_particles.draw(screen)))
+        
+        for card in scene.cards:
+            items.append((('card', card.index), card.get_draw_bounds(), card.get_draw_state(),
+                          lambda card=card: card.draw(screen, self.font, self.title_font)))
+        if scene.card_particles is not None:
+            items.append(('card_particles', scene.card_particles.bounds(), None,
+                          lambda: scene.card_particles.draw(screen)))
+        
+        hud_state = (tuple(self.get_stat_lines()), scene.engine.won, scene.engine.matched_pairs == 0)
+        items.append(('hud', self.hud_bounds(), hud_state, self.draw_ui))
+        if self.profiler.show_overlay:
+            items.append(('profiler', [self.profiler.overlay_bounds()], None,
+                          lambda: self.profiler.draw_overlay(screen)))
+        return items
+    
+    def render_full_frame(self):
+        """Redraw the whole window and flip"""
+        scene = self.scene
+        profiler = self.profiler
+        profiler.begin("background")
+        self.draw_night_sky_background()
+        self.draw_background_effects()
+        profiler.end("background")
+        
+        # Draw cards
+        for card in scene.cards:
+            profiler.begin("card_draw")
+            card.draw(self.screen, self.font, self.title_font)
+            profiler.end("card_draw", {"index": card.index})
+        if scene.card_particles is not None:
+            scene.card_particles.draw(self.screen)
+        
+        # Draw UI
+        profiler.begin("ui")
+        self.draw_ui()
+        self.draw_win_screen()
+        profiler.draw_overlay(self.screen)
+        profiler.end("ui")
+        
+        profiler.begin("flip")
+        pygame.display.flip()
+        profiler.end("flip")
+    
+    def render_frame(self, alpha=None):
+        """Draw the scene alpha of the way from the previous step to the current one, or as is for None"""
+        saved = interpolate(self.interpolated_objects(), alpha) if alpha is not None else None
+        if self.dirty_rect_rendering:
+            self.profiler.begin("render_dirty")
+            self.render_dirty_frame()
+            self.profiler.end("render_dirty")
+        else:
+            self.render_full_frame()
+        if saved is not None:
+            restore_interpolated(saved)
+    
+    def render_dirty_frame(self):
+        """Restore and redraw only the changed regions, or everything when too much changed"""
+        scene = self.scene
+        if self.background_cache is None or self.background_key != (
+                (WINDOW_WIDTH, WINDOW_HEIGHT), tuple(castle.layer_key for castle in scene.castles)):
+            self.build_background_cache()
+        
+        items = self.scene_items()
+        rects, plan = self.dirty_renderer.plan(items)
+        if scene.engine.won or self.dirty_renderer.use_full_redraw():
+            # Full redraw still goes through the cached background and item list
+            self.screen.blit(self.background_cache, (0, 0))
+            for _, _, _, draw in items:
+                draw()
+            self.draw_win_screen()
+            self.profiler.draw_overlay(self.screen)
+            pygame.display.flip()
+            return
         
-        # Restart instruction
-        restart_text = self.font.render("🧙‍♀️ Press R to cast again or ESC to return to reality 🧙‍♀️", True, (255, 255, 255))
-        restart_shadow = self.font.render("🧙‍♀️ Press R to cast again or ESC to return to reality 🧙‍♀️", True, (0, 0, 0))
-        restart_rect = restart_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 60))
-        self.screen.blit(restart_shadow, (restart_rect.x + 2, restart_rect.y + 2))
-        self.screen.blit(restart_text, restart_rect)
+        for rect in rects:
+            self.screen.blit(self.background_cache, rect, rect)
+        for (_, _, _, draw), how in zip(items, plan):
+            if how is True:
+                draw()
+            elif how:
+                for clip in how:
+                    self.screen.set_clip(clip)
+                    draw()
+                self.screen.set_clip(None)
+        pygame.display.update(rects)
+    
+    def toggle_dirty_rect_rendering(self):
+        self.dirty_rect_rendering = not self.dirty_rect_rendering
+        self.dirty_renderer.needs_full = True
     
     def restart_game(self):
         """Restart the magical adventure"""
         self.cards = []
-        self.revealed_cards = []
-        self.matched_pairs = 0
-        self.game_won = False
         self.floating_particles = []
-        self.score = 0
-        self.moves = 0
+        if self.effect_particles is not None:
+            self.effect_particles.clear()
+            self.card_particles.clear()
         
         # Reset fairies
         self.fairies = []
-        for _ in range(6):
+        for _ in range(self.quality["fairies"]):
             self.fairies.append(FlyingFairy())
         
         self.setup_cards()
@@ -1031,72 +3163,366 @@ class EnhancedDisneyWitchGame:
         """Handle window resize for proper centering"""
         global WINDOW_WIDTH, WINDOW_HEIGHT
         WINDOW_WIDTH, WINDOW_HEIGHT = self.screen.get_size()
-        self.setup_cards()
+        self.build_sky_surface()
+        self.dirty_renderer.resize((WINDOW_WIDTH, WINDOW_HEIGHT))
+        if self.large_board is not None:
+            self.large_board.camera.resize(WINDOW_WIDTH, WINDOW_HEIGHT)
+        else:
+            self.layout_cards()
         
         # Update castle and moon positions
-        self.castles = [
-            TangleCastle(WINDOW_WIDTH - 350, WINDOW_HEIGHT - 220, 1.2),
-            TangleCastle(WINDOW_WIDTH - 600, WINDOW_HEIGHT - 180, 0.8),
-            TangleCastle(50, WINDOW_HEIGHT - 160, 0.6),
-            TangleCastle(WINDOW_WIDTH - 150, WINDOW_HEIGHT - 140, 0.5),
-        ]
+        # Static castle layers are re-rendered lazily at their new positions
+        for castle, (x, y, _) in zip(self.all_castles, castle_layout()):
+            castle.move_to(x, y)
         self.moon.x = WINDOW_WIDTH - 150
     
+    def apply_quality(self, level):
+        """Switch to the effect budgets of QUALITY_LEVELS[level]"""
+        self.quality = quality = QUALITY_LEVELS[level]
+        Card.draw_glow = quality["glow"]
+        Card.draw_shadow = quality["shadows"]
+        FlyingFairy.trail_length = quality["fairy_trail"]
+        self.castles = self.all_castles[:quality["castles"]]
+        
+        # Extra fairies leave now; background sparkles thin out as they expire
+        del self.fairies[quality["fairies"]:]
+        while len(self.fairies) < quality["fairies"]:
+            self.fairies.append(FlyingFairy())
+        self.dirty_renderer.needs_full = True
+    
+    def handle_event(self, event):
+        """Apply one input event; replays feed their logged events through here too"""
+        if event.type == pygame.QUIT:
+            self.running = False
+        
+        elif event.type == pygame.VIDEORESIZE:
+            self.screen = pygame.display.set_mode((event.w, event.h), pygame.RESIZABLE)
+            self.handle_resize()
+        
+        elif event.type == WINDOW_SIZE_EVENT:
+            # A replay restoring the size a fullscreen toggle produced when recorded
+            self.screen = pygame.display.set_mode(event.size, pygame.RESIZABLE)
+        
+        elif event.type == pygame.KEYDOWN:
+            self.held_keys.add(event.key)
+            if event.key == pygame.K_ESCAPE:
+                self.running = False
+            elif event.key == pygame.K_r and self.engine.won:
+                self.restart_game()
+            elif event.key == pygame.K_p:
+                self.toggle_particle_engine()
+            elif event.key == pygame.K_d:
+                self.toggle_dirty_rect_rendering()
+            elif event.key == pygame.K_F3:
+                self.profiler.toggle_overlay()
+            elif event.key == pygame.K_F11:
+                if self.replay is None:
+                    pygame.display.toggle_fullscreen()
+                self.handle_resize()
+        
+        elif event.type == pygame.KEYUP:
+            self.held_keys.discard(event.key)
+        
+        elif event.type == pygame.WINDOWFOCUSLOST:
+            self.held_keys.clear()
+        
+        elif event.type == QUALITY_EVENT:
+            self.apply_quality(event.level)
+        
+        elif event.type == pygame.MOUSEMOTION:
+            if self.large_board is not None and (event.buttons[1] or event.buttons[2]):
+                # Drag with the right or middle button to pan
+                self.large_board.camera.pan(-event.rel[0], -event.rel[1])
+            self.update_hover(event.pos)
+        
+        elif event.type == pygame.MOUSEWHEEL:
+            if self.large_board is not None:
+                self.large_board.camera.zoom_at(self.mouse_pos, event.y)
+        
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button == 1 and not self.engine.won:
+                self.handle_card_click(event.pos)
+    
+    def update_simulation(self):
+        """Advance the game by one fixed SIM_STEP_MS step"""
+        if self.large_board is not None:
+            self.update_large_board()
+        self.update_hover()
+        self.update_revealed_cards()
+        self.update_background_effects()
+        
+        # Update cards
+        for card in self.cards:
+            card.update()
+    
+    def interpolated_objects(self):
+        return [self.witch, *self.fairies, *self.cards]
+    
+    def frame_events(self):
+        """This frame's input: live events, or the next logged frame when replaying"""
+        if self.replay is not None:
+            events = self.replay.next_frame()
+            if events is None:
+                self.running = False
+                return []
+            return events
+        if self.recorder is not None:
+            self.recorder.begin_frame()
+        return pygame.event.get()
+    
     def run(self):
         """Main Disney magical game loop - FASTER"""
-        running = True
-        
-        while running:
-            mouse_pos = pygame.mouse.get_pos()
+        self.running = True
+        
+        profiler = self.profiler
+        started = time.perf_counter()
+        frames = 0
+        
+        # From here game time is simulation time, advanced in fixed steps by the frame clock
+        frame_clock = tick_source
+        timestep = FixedTimestep(frame_clock())
+        simulation = None
+        if self.threaded:
+            # Steps run on their own thread while the frame before them is drawn
+            simulation = SimulationThread(self, timestep)
+            simulation.start()
+            set_tick_source(simulation.ticks)
+        else:
+            set_tick_source(timestep.ticks)
+        
+        while self.running:
+            frame_start = time.perf_counter()
+            profiler.begin("frame")
+            if simulation is not None:
+                profiler.begin("sim_wait")
+                self.scene = simulation.wait()
+                profiler.end("sim_wait")
+            profiler.begin("events")
             
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                
-                elif event.type == pygame.VIDEORESIZE:
-                    self.screen = pygame.display.set_mode((event.w, event.h), pygame.RESIZABLE)
-                    self.handle_resize()
-                
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        running = False
-                    elif event.key == pygame.K_r and self.game_won:
-                        self.restart_game()
-                    elif event.key == pygame.K_F11:
-                        pygame.display.toggle_fullscreen()
-                        self.handle_resize()
-                
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    if event.button == 1 and not self.game_won:
-                        self.handle_card_click(event.pos)
+            for event in self.frame_events():
+                self.handle_event(event)
+                if self.recorder is not None:
+                    self.recorder.record(event, self.screen.get_size())
             
-            # Update game state
-            self.update_hover(mouse_pos)
-            self.update_revealed_cards()
-            self.update_background_effects()
+            profiler.end("events")
             
-            # Update cards
-            for card in self.cards:
-                card.update()
+            # Update game state in fixed steps, catching up after slow frames
+            profiler.begin("update")
+            steps = timestep.advance(frame_clock())
+            if simulation is not None:
+                simulation.run_steps(steps)
+            else:
+                for _ in range(steps):
+                    self.update_simulation()
+                    timestep.step()
+            profiler.end("update")
             
-            # Draw everything
-            self.draw_night_sky_background()
-            self.draw_background_effects()
+            if self.recorder is not None:
+                self.recorder.end_frame(self)
+            elif self.replay is not None:
+                self.replay.end_frame(self)
             
-            # Draw cards
-            for card in self.cards:
-                card.draw(self.screen, self.font, self.title_font)
+            # Draw everything where it is between the last two steps (a snapshot is already interpolated)
+            self.render_frame(timestep.alpha if simulation is None else None)
+            profiler.end("frame", {"quality": self.quality["name"]} if profiler.tracing else None)
+            profiler.end_frame()
+            if profiler.show_overlay:
+                profiler.set_gauge("fps", f"{self.clock.get_fps():.1f}")
+                profiler.set_gauge("stamp atlas hits", f"{STAMP_ATLAS.stats()['hit_rate']:.0%}")
+                profiler.set_gauge("sim steps", f"{steps} ({timestep.dropped_ms / 1000:.1f}s dropped)")
+                profiler.set_gauge("quality", f"{self.quality['name']} ({self.governor.average_ms():.1f} ms avg)")
+                if simulation is not None:
+                    profiler.set_gauge("sim thread", f"{simulation.busy_ms:.1f} ms")
             
-            # Draw UI
-            self.draw_ui()
-            self.draw_win_screen()
+            self.check_startup()
+            self.check_card_size()
             
-            pygame.display.flip()
-            self.clock.tick(75)  # Faster frame rate
-        
+            # Effect quality follows the time spent on this frame, before the frame cap sleeps.
+            # Frames slowed by the warm-up thread say nothing about the hardware.
+            warming = self.warm_up is not None and self.warm_up.is_alive()
+            if not warming and self.governor.add_frame((time.perf_counter() - frame_start) * 1000):
+                pygame.event.post(pygame.event.Event(QUALITY_EVENT, level=self.governor.level))
+            frames += 1
+            if self.replay is None:
+                self.clock.tick(RENDER_FPS)
+        
+        if simulation is not None:
+            simulation.stop()
+        if self.warm_up is not None:
+            self.warm_up.stop()
+            self.warm_up.join()
+        if self.card_art_pool is not None:
+            self.card_art_pool.terminate()
+            CARD_SPRITES.clear()  # Closes the shared memory before interpreter teardown
+        if self.trace_path:
+            self.profiler.write_chrome_trace(self.trace_path)
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.leaderboard is not None:
+            self.leaderboard.close()
+        if self.autosave is not None:
+            self.autosave.close()
+        if self.replay is not None:
+            elapsed = time.perf_counter() - started
+            print(json.dumps({"frames": frames, "seconds": round(elapsed, 3),
+                              "fps": round(frames / elapsed, 1) if elapsed else 0.0,
+                              "score": self.engine.score, "moves": self.engine.moves,
+                              "quality": self.quality["name"],
+                              "diverged_at_frame": self.replay.divergence}))
         pygame.quit()
-        sys.exit()
+        sys.exit(1 if self.replay is not None and self.replay.divergence is not None else 0)
+
+def board_size(text):
+    """Parse ROWSxCOLS for --board"""
+    try:
+        rows, cols = (int(value) for value in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected ROWSxCOLS, got {text!r}")
+    if rows < 1 or cols < 1 or (rows * cols) % 2:
+        raise argparse.ArgumentTypeError("the board needs a positive, even number of cards")
+    return rows, cols
+
+def server_address(text):
+    """Parse HOST:PORT for --connect"""
+    host, _, port = text.rpartition(":")
+    if not host or not port.isdigit():
+        raise argparse.ArgumentTypeError(f"expected HOST:PORT, got {text!r}")
+    return host, int(port)
+
+def frame_rate(text):
+    """Parse a positive frame rate for --target-fps"""
+    try:
+        fps = float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a frame rate, got {text!r}")
+    if not (math.isfinite(fps) and fps > 0):
+        raise argparse.ArgumentTypeError("the target frame rate must be a finite number above 0")
+    return fps
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Enhanced Disney Witch's Magical Memory")
+    parser.add_argument("--profile", action="store_true",
+                        help="start with the phase timing overlay shown (toggle with F3)")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="record every frame phase and write a Chrome trace JSON on exit")
+    parser.add_argument("--board", metavar="ROWSxCOLS", type=board_size,
+                        help="play a large board with a pannable, zoomable camera")
+    parser.add_argument("--quality", choices=["auto"] + QUALITY_NAMES, default="auto",
+                        help="effect quality; auto adjusts it to hold --target-fps")
+    parser.add_argument("--target-fps", metavar="FPS", type=frame_rate, default=QUALITY_TARGET_FPS,
+                        help="frame rate the automatic quality level aims for")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="print startup timings as JSON once the sprite warm-up is done, then exit")
+    parser.add_argument("--seed", type=int, help="seed the random generator for a repeatable session")
+    parser.add_argument("--record", metavar="FILE", help="record the seed and every input event to FILE")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="replay a recorded session headless as fast as possible and print timings")
+    parser.add_argument("--connect", metavar="HOST:PORT", type=server_address,
+                        help="play on a memory_server.py, which shuffles and decides matches")
+    parser.add_argument("--save", metavar="FILE",
+                        help="save the game after every move and resume it from FILE at startup")
+    parser.add_argument("--leaderboard", metavar="FILE",
+                        help="keep won games in this SQLite database and show the top ten on the victory screen")
+    parser.add_argument("--threaded", action="store_true",
+                        help="run the simulation steps on a second thread while the previous frame is drawn")
+    args = parser.parse_args(argv)
+    if args.connect and (args.board or args.record or args.replay):
+        parser.error("--connect can't be combined with --board, --record or --replay")
+    if args.save and (args.connect or args.record or args.replay):
+        parser.error("--save can't be combined with --connect, --record or --replay")
+    if args.leaderboard and args.replay:
+        parser.error("--leaderboard can't be combined with --replay")
+    if args.threaded and (args.record or args.replay):
+        parser.error("--threaded can't be combined with --record or --replay")
+    return args
+
+def start_replay(path):
+    """Game set up to replay a recorded session under the dummy video driver"""
+    global WINDOW_WIDTH, WINDOW_HEIGHT, USE_PARTICLE_ENGINE
+    replay = InputReplay(path)
+    if replay.particle_engine and np is None:
+        raise SystemExit(f"{path} was recorded with the particle engine, which needs numpy")
+    
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    init_pygame()
+    WINDOW_WIDTH, WINDOW_HEIGHT = replay.size
+    USE_PARTICLE_ENGINE = replay.particle_engine
+    random.seed(replay.seed)
+    set_tick_source(lambda: replay.ticks)
+    
+    game = EnhancedDisneyWitchGame(board_size=replay.board_size)
+    game.governor.enabled = False  # Quality changes come from the log
+    game.replay = replay
+    game.mouse_pos = replay.mouse_pos
+    return game
+
+def start_recording(path, seed, board):
+    """Game whose session is written to path, with game time frozen per frame"""
+    if seed is None:
+        seed = random.getrandbits(32)
+    init_pygame()  # The recorder reads the clock before the game exists
+    recorder = InputRecorder(path, seed, board)
+    random.seed(seed)
+    set_tick_source(lambda: recorder.ticks)
+    
+    game = EnhancedDisneyWitchGame(board_size=board)
+    game.recorder = recorder
+    recorder.start(game)
+    return game
+
+def start_autosave(path, seed, board):
+    """Game that resumes from the save at path if there is one, and keeps it up to date"""
+    resumed = None
+    if os.path.exists(path):
+        try:
+            resumed = load_game(path)
+        except ValueError as error:
+            print(f"Starting a new game: {error}", file=sys.stderr)
+    if resumed is not None:
+        random.setstate(resumed.rng_state)
+        board = resumed.board_size
+    elif seed is not None:
+        random.seed(seed)
+    return EnhancedDisneyWitchGame(board_size=board, autosave=GameSave(path), resumed=resumed)
 
 if __name__ == "__main__":
-    game = EnhancedDisneyWitchGame()
-    game.run()
+    args = parse_args()
+    if args.replay:
+        game = start_replay(args.replay)
+    elif args.record:
+        game = start_recording(args.record, args.seed, args.board)
+    elif args.connect:
+        from memory_server import RemoteEngine  # Only network games pay for importing asyncio
+        try:
+            remote = RemoteEngine(args.connect)
+        except OSError as error:
+            raise SystemExit(f"Can't reach the game server at {args.connect[0]}:{args.connect[1]}: {error}")
+        game = EnhancedDisneyWitchGame(remote=remote)
+    elif args.save:
+        game = start_autosave(args.save, args.seed, args.board)
+    else:
+        if args.seed is not None:
+            random.seed(args.seed)
+        game = EnhancedDisneyWitchGame(board_size=args.board)
+    if not args.replay:
+        game.governor.budget_ms = 1000 / args.target_fps
+        if args.quality != "auto":
+            # Applied as the first event so recordings start at the same level
+            game.governor.enabled = False
+            pygame.event.post(pygame.event.Event(QUALITY_EVENT, level=QUALITY_NAMES.index(args.quality)))
+    if args.leaderboard:
+        from memory_leaderboard import Leaderboard  # Only games that keep scores pay for importing sqlite3
+        game.leaderboard = Leaderboard(args.leaderboard)
+        game.leaderboard.watch(game.board_key())
+    game.threaded = args.threaded
+    game.startup_profile = args.startup_profile
+    if args.profile:
+        game.profiler.toggle_overlay()
+    if args.trace:
+        game.profiler.enabled = game.profiler.tracing = True
+        game.trace_path = args.trace
+    try:
+        game.run()
+    except ConnectionError as error:
+        pygame.quit()
+        raise SystemExit(f"Lost the game server: {error}")
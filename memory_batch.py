@@ -0,0 +1,217 @@
+"""Batched memory games on NumPy arrays.
+
+BatchGames holds thousands of independent boards as (boards x cards) arrays
+and advances them in lockstep: bot choices, match resolution and win
+detection are whole-array operations, and finished games are dropped from
+the arrays as they complete. Boards use one symbol per pair, like the game.
+Reports have the same shape as memory_tournament.py:
+
+    python memory_batch.py --games 1000000 --bots random perfect memory:4
+"""
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+from memory_engine import MATCH_SCORE, REVEAL_TIME
+from memory_tournament import (DURATION_BUCKET, MAX_MOVES_PER_PAIR, THINK_TIME,
+                               TournamentResults, bot_spec)
+
+BATCH_GAMES = 20000  # Boards advanced together
+
+class BatchMemoryBot:
+    """Vectorized MemoryBot: remembers the last capacity cards seen on each board.
+    
+    capacity None remembers everything and 0 nothing, which plays like the
+    random bot. Each observation is stamped with a rising counter and, as in
+    MemoryBot, the oldest stamps beyond capacity are forgotten straight away.
+    """
+    def __init__(self, capacity=None):
+        self.capacity = capacity
+        self.stamps = None
+        self.clock = 0
+    
+    @classmethod
+    def from_spec(cls, spec):
+        if spec == "random":
+            return cls(0)
+        if spec == "perfect":
+            return cls(None)
+        return cls(int(spec.split(":", 1)[1]))
+    
+    def reset(self, shape):
+        self.stamps = np.zeros(shape, dtype=np.int64)
+        self.clock = 0
+    
+    def keep(self, live):
+        self.stamps = self.stamps[live]
+    
+    def observe(self, rows, cards, matched):
+        if self.capacity == 0:
+            return
+        self.clock += 1
+        self.stamps[rows, cards] = self.clock
+        if self.capacity is None or self.capacity >= self.stamps.shape[1]:
+            return
+        
+        # Forget everything older than the capacity most recent unmatched cards
+        ranked = np.where(matched, 0, self.stamps)
+        kth = -np.partition(-ranked, self.capacity - 1, axis=1)[:, self.capacity - 1]
+        self.stamps[ranked < kth[:, None]] = 0
+    
+    def remembered(self, matched):
+        """Mask of the cards each board's bot currently remembers"""
+        return (self.stamps > 0) & ~matched
+
+class BatchGames:
+    """Independent shuffled boards played in lockstep"""
+    def __init__(self, count, pairs, rng, reveal_time=REVEAL_TIME, match_score=MATCH_SCORE):
+        self.rng = rng
+        self.reveal_time = reveal_time
+        self.match_score = match_score
+        cards = pairs * 2
+        
+        # Shuffle every row at once by sorting random keys
+        deck = np.tile(np.arange(pairs, dtype=np.uint16), 2)
+        self.symbols = deck[rng.random((count, cards)).argsort(axis=1)]
+        
+        # partner[b, i] is the card on board b with the same symbol as card i
+        by_symbol = self.symbols.argsort(axis=1, kind="stable")
+        rows = np.arange(count)[:, None]
+        self.partner = np.empty((count, cards), dtype=np.intp)
+        self.partner[rows, by_symbol[:, 0::2]] = by_symbol[:, 1::2]
+        self.partner[rows, by_symbol[:, 1::2]] = by_symbol[:, 0::2]
+        
+        self.matched = np.zeros((count, cards), dtype=bool)
+        self.moves = np.zeros(count, dtype=np.int32)
+        self.score = np.zeros(count, dtype=np.int64)
+        self.time_ms = np.zeros(count, dtype=np.int64)
+    
+    def __len__(self):
+        return len(self.moves)
+    
+    def pick(self, preferred, allowed):
+        """Random card per board from preferred, or from allowed where preferred is empty"""
+        keys = self.rng.random(preferred.shape, dtype=np.float32)
+        keys += np.where(preferred, np.float32(0), np.float32(2))
+        keys += np.where(allowed, np.float32(0), np.float32(4))
+        return keys.argmin(axis=1)
+    
+    def turn(self, bot):
+        """Every board plays one move: two flips, then the pair resolves"""
+        rows = np.arange(len(self))
+        hidden = ~self.matched
+        
+        # First flip: a remembered pair if there is one, else an unseen card
+        known = bot.remembered(self.matched)
+        pair_known = known & known[rows[:, None], self.partner]
+        first = np.where(pair_known.any(axis=1), pair_known.argmax(axis=1),
+                         self.pick(hidden & ~known, hidden))
+        bot.observe(rows, first, self.matched)
+        
+        # Second flip: the first card's partner if remembered, else another unseen card
+        known = bot.remembered(self.matched)
+        partner = self.partner[rows, first]
+        others = hidden.copy()
+        others[rows, first] = False
+        second = np.where(known[rows, partner], partner, self.pick(others & ~known, others))
+        bot.observe(rows, second, self.matched)
+        
+        hit = second == partner
+        self.matched[rows[hit], first[hit]] = True
+        self.matched[rows[hit], second[hit]] = True
+        self.moves += 1
+        self.score += hit * self.match_score
+        self.time_ms += 2 * THINK_TIME + self.reveal_time
+    
+    def play(self, bot, max_moves):
+        """Play every board to the end; returns (won, moves, score, time) arrays"""
+        bot.reset(self.matched.shape)
+        finished = []
+        while len(self):
+            self.turn(bot)
+            won = self.matched.all(axis=1)
+            done = won | (self.moves >= max_moves)
+            if done.any():
+                finished.append((won[done], self.moves[done], self.score[done], self.time_ms[done]))
+                self.keep(~done)
+                bot.keep(~done)
+        return tuple(np.concatenate(column) for column in zip(*finished))
+    
+    def keep(self, live):
+        """Drop finished boards so later turns only touch games still running"""
+        self.symbols = self.symbols[live]
+        self.partner = self.partner[live]
+        self.matched = self.matched[live]
+        self.moves = self.moves[live]
+        self.score = self.score[live]
+        self.time_ms = self.time_ms[live]
+
+def histogram(values):
+    keys, counts = np.unique(values, return_counts=True)
+    return Counter(dict(zip(keys.tolist(), counts.tolist())))
+
+def play_batch(spec, batch, config):
+    """Play one batch for one bot; returns histograms of the won games like memory_tournament.play_chunk"""
+    first_game = batch * config["chunk_games"]
+    count = min(config["chunk_games"], config["games"] - first_game)
+    rng = np.random.default_rng([config["seed"], batch])
+    games = BatchGames(count, config["pairs"], rng, config["reveal_time"], config["match_score"])
+    won, moves, score, time_ms = games.play(BatchMemoryBot.from_spec(spec),
+                                            MAX_MOVES_PER_PAIR * config["pairs"])
+    wins = int(won.sum())
+    return {
+        "games": count,
+        "won": wins,
+        "abandoned": count - wins,
+        "moves": histogram(moves[won]),
+        "score": histogram(score[won]),
+        "duration_ms": histogram(time_ms[won] // DURATION_BUCKET * DURATION_BUCKET),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batched NumPy simulation of memory games")
+    parser.add_argument("--games", type=int, default=1000000, help="games per bot")
+    parser.add_argument("--bots", nargs="+", type=bot_spec, default=["random", "perfect", "memory:4"],
+                        help="strategies: random, perfect or memory:N")
+    parser.add_argument("--pairs", type=int, default=6, help="pairs on each board")
+    parser.add_argument("--reveal-time", type=int, default=REVEAL_TIME, help="milliseconds a pair stays up")
+    parser.add_argument("--match-score", type=int, default=MATCH_SCORE, help="points per matched pair")
+    parser.add_argument("--seed", type=int, default=1, help="simulation seed")
+    parser.add_argument("--batch", type=int, default=BATCH_GAMES, help="boards advanced together")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+    
+    config = {
+        "games": args.games,
+        "bots": args.bots,
+        "pairs": args.pairs,
+        "symbols": args.pairs,
+        "reveal_time": args.reveal_time,
+        "match_score": args.match_score,
+        "seed": args.seed,
+        "chunk_games": args.batch,
+    }
+    results = TournamentResults(config)
+    batches = -(-args.games // args.batch)
+    start = time.perf_counter()
+    for batch in range(batches):
+        for spec in args.bots:
+            results.merge(spec, batch, play_batch(spec, batch, config))
+        line = results.progress(results.games_played(), time.perf_counter() - start)
+        print(json.dumps(line), file=sys.stderr, flush=True)
+    
+    report = results.summary()
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
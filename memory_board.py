@@ -0,0 +1,62 @@
+"""Compact board state for the memory game.
+
+Symbols, revealed and matched flags and reveal timestamps live in typed
+arrays indexed by card position, about a dozen bytes per card, so boards of
+hundreds of thousands of cards stay small. Nothing here depends on pygame.
+"""
+import random
+from array import array
+
+class BoardModel:
+    """Card state for a whole board, one array slot per card"""
+    def __init__(self, symbols):
+        self.symbols = array('H', symbols)  # Symbol ID of each card; equal IDs match
+        count = len(self.symbols)
+        self.revealed = bytearray(count)
+        self.matched = bytearray(count)
+        self.reveal_times = array('q', bytes(8 * count))  # Milliseconds of game time
+        self.matched_count = 0
+    
+    @classmethod
+    def shuffled(cls, pair_count, symbol_count, rng=random):
+        """Board with pair_count pairs, cycling through symbol_count symbols"""
+        symbols = [pair % symbol_count for pair in range(pair_count)] * 2
+        rng.shuffle(symbols)
+        return cls(symbols)
+    
+    def __len__(self):
+        return len(self.symbols)
+    
+    def is_hidden(self, index):
+        return not self.revealed[index] and not self.matched[index]
+    
+    def reveal(self, index, now):
+        self.revealed[index] = 1
+        self.reveal_times[index] = now
+    
+    def hide(self, *indices):
+        for index in indices:
+            self.revealed[index] = 0
+    
+    def mark_matched(self, *indices):
+        for index in indices:
+            if not self.matched[index]:
+                self.matched[index] = 1
+                self.matched_count += 1
+            self.revealed[index] = 0
+    
+    def is_pair(self, first, second):
+        return self.symbols[first] == self.symbols[second]
+    
+    def shown_since(self, indices, now, duration):
+        """True once every card in indices has been face up for duration"""
+        times = self.reveal_times
+        return all(now - times[index] >= duration for index in indices)
+    
+    def all_matched(self):
+        return self.matched.find(0) == -1
+    
+    def nbytes(self):
+        """Bytes used by the per-card arrays"""
+        return (self.symbols.itemsize * len(self.symbols) + len(self.revealed) + len(self.matched)
+                + self.reveal_times.itemsize * len(self.reveal_times))
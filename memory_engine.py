@@ -0,0 +1,73 @@
+"""Matching rules of the memory game without pygame.
+
+MemoryEngine takes card indices and the current time in milliseconds from
+its caller, so the same rules drive the pygame client, headless bots and
+regression checks. Nothing waits on a real clock: a simulation can pass
+resolve_time() straight back in and play games as fast as the CPU allows.
+"""
+import random
+
+from memory_board import BoardModel
+
+REVEAL_TIME = 1800  # Milliseconds a revealed pair stays face up
+MATCH_SCORE = 250  # Points for each matched pair
+
+class MemoryEngine:
+    """Flips, moves, score and win detection over a BoardModel"""
+    def __init__(self, board, reveal_time=REVEAL_TIME, match_score=MATCH_SCORE):
+        self.board = board
+        self.reveal_time = reveal_time
+        self.match_score = match_score
+        self.pending = []  # Indices face up and waiting to be resolved, at most two
+        self.moves = 0
+        self.score = 0
+        self.matched_pairs = 0
+        self.total_pairs = len(board) // 2
+        self.won = False
+    
+    @classmethod
+    def new_game(cls, pair_count, symbol_count, rng=random, **options):
+        """Engine over a freshly shuffled board"""
+        return cls(BoardModel.shuffled(pair_count, symbol_count, rng), **options)
+    
+    def can_flip(self, index):
+        return len(self.pending) < 2 and self.board.is_hidden(index)
+    
+    def flip(self, index, now):
+        """Turn a card face up; returns False if it can't be flipped right now"""
+        if not self.can_flip(index):
+            return False
+        self.board.reveal(index, now)
+        self.pending.append(index)
+        if len(self.pending) == 2:
+            self.moves += 1
+        return True
+    
+    def resolve_time(self):
+        """When the face-up pair will be resolved, or None without a full pair"""
+        if len(self.pending) < 2:
+            return None
+        return max(self.board.reveal_times[index] for index in self.pending) + self.reveal_time
+    
+    def update(self, now):
+        """Resolve the face-up pair once it has been shown long enough.
+        
+        Returns (first, second, matched) when a pair was resolved, else None.
+        """
+        if len(self.pending) < 2:
+            return None
+        board = self.board
+        if not board.shown_since(self.pending, now, self.reveal_time):
+            return None
+        
+        first, second = self.pending
+        matched = board.is_pair(first, second)
+        if matched:
+            board.mark_matched(first, second)
+            self.matched_pairs += 1
+            self.score += self.match_score
+            self.won = board.all_matched()
+        else:
+            board.hide(first, second)
+        self.pending = []
+        return first, second, matched
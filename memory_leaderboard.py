@@ -0,0 +1,146 @@
+"""Local leaderboard of won memory games in SQLite.
+
+The database runs in WAL mode, so readers never wait on the writer. All
+disk work happens on one background thread. submit() only queues a row.
+The thread commits whatever has queued up as one transaction and then
+refreshes the cached top lists of the boards it touched. The game's
+victory screen reads those lists without ever touching the disk:
+
+    leaderboard = Leaderboard("scores.db")
+    leaderboard.watch("3x4")
+    leaderboard.submit("3x4", 1500, 9)
+    leaderboard.top("3x4")  # [(board, score, moves, played_at), ...] once written
+
+    python memory_leaderboard.py scores.db --board 3x4 --by moves
+"""
+import argparse
+import json
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+TOP_SIZE = 10  # Entries cached per watched board
+MAX_BATCH = 512  # Most scores committed in one transaction
+BUSY_TIMEOUT = 5000  # Milliseconds to wait for another process holding the write lock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    board TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    moves INTEGER NOT NULL,
+    played_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC, moves, played_at);
+CREATE INDEX IF NOT EXISTS scores_by_board_score ON scores (board, score DESC, moves, played_at);
+CREATE INDEX IF NOT EXISTS scores_by_board_moves ON scores (board, moves, score DESC, played_at);
+"""
+ORDERS = {
+    "score": "score DESC, moves, played_at",
+    "moves": "moves, score DESC, played_at",
+}
+
+def connect(path):
+    db = sqlite3.connect(path, timeout=BUSY_TIMEOUT / 1000)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.executescript(SCHEMA)
+    return db
+
+def query_top(db, board=None, by="moves", limit=TOP_SIZE):
+    """Best (board, score, moves, played_at) rows, for one board size or all of them"""
+    where, args = ("WHERE board = ?", (board, limit)) if board else ("", (limit,))
+    sql = f"SELECT board, score, moves, played_at FROM scores {where} ORDER BY {ORDERS[by]} LIMIT ?"
+    return db.execute(sql, args).fetchall()
+
+class Leaderboard:
+    """Score store whose writes are queued and batched on a background thread"""
+    def __init__(self, path, by="moves", top_size=TOP_SIZE):
+        self.path = path
+        self.by = by
+        self.top_size = top_size
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.cache = {}  # Board -> top rows, for watched boards
+        self.version = 0  # Bumped whenever a cached list changes
+        self.closed = False  # Set when the database can't be opened; scores are dropped from then on
+        self.writer = threading.Thread(target=self.write_loop, name="leaderboard", daemon=True)
+        self.writer.start()
+    
+    def watch(self, board):
+        """Keep board's top list cached; it is loaded on the writer thread"""
+        if not self.closed:
+            self.queue.put(("watch", board))
+    
+    def submit(self, board, score, moves):
+        """Queue a won game; returns its played_at stamp, which top() rows carry too"""
+        played_at = time.time()
+        if not self.closed:
+            self.queue.put(("score", board, score, moves, played_at))
+        return played_at
+    
+    def top(self, board):
+        with self.lock:
+            return self.cache.get(board, [])
+    
+    def write_loop(self):
+        try:
+            db = connect(self.path)
+        except sqlite3.Error as error:
+            # Nothing would drain the queue, so later scores are dropped instead of piling up
+            print(f"leaderboard: can't open {self.path}: {error}", file=sys.stderr)
+            self.closed = True
+            return
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            while len(batch) < MAX_BATCH:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            rows = [item[1:] for item in batch if item is not None and item[0] == "score"]
+            boards = {item[1] for item in batch if item is not None}
+            running = None not in batch
+            try:
+                if rows:
+                    with db:
+                        db.executemany("INSERT INTO scores (board, score, moves, played_at) VALUES (?, ?, ?, ?)",
+                                       rows)
+                for board in boards:
+                    if board in self.cache or ("watch", board) in batch:
+                        top = query_top(db, board, self.by, self.top_size)
+                        with self.lock:
+                            self.cache[board] = top
+                            self.version += 1
+            except sqlite3.Error as error:
+                # A full disk or a locked database costs these scores, not the game
+                print(f"leaderboard: {error}", file=sys.stderr)
+        db.close()
+    
+    def close(self):
+        """Write everything still queued, then stop the writer"""
+        if not self.closed:
+            self.queue.put(None)
+        self.writer.join()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show the memory game leaderboard")
+    parser.add_argument("database", help="leaderboard database written by the game")
+    parser.add_argument("--board", help="board size such as 3x4 (default: every board)")
+    parser.add_argument("--by", choices=sorted(ORDERS), default="moves", help="ranking")
+    parser.add_argument("--limit", type=int, default=TOP_SIZE, help="rows to show")
+    args = parser.parse_args(argv)
+    
+    db = connect(args.database)
+    rows = query_top(db, args.board, args.by, args.limit)
+    db.close()
+    print(json.dumps([{"board": board, "score": score, "moves": moves, "played_at": played_at}
+                      for board, score, moves, played_at in rows], indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""Load generator for memory_server.py.
+
+Opens many concurrent sessions over loopback, each played by one of the
+tournament bots, and reports games, flips per second and FLIP-to-SHOW round
+trips as JSON. With --spawn it starts its own server on a free port:
+
+    python memory_loadgen.py --spawn --sessions 2000 --duration 30 --reveal-time 200
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+
+from memory_engine import REVEAL_TIME
+from memory_server import DEFAULT_PORT
+from memory_tournament import bot_spec, histogram_stats, make_bot
+
+PROGRESS_INTERVAL = 5  # Seconds between progress lines on stderr
+
+class LoadStats:
+    """Counters and FLIP round-trip times shared by every session"""
+    def __init__(self):
+        self.connected = 0
+        self.failed = 0
+        self.games = 0
+        self.flips = 0
+        self.denied = 0
+        self.round_trips = Counter()  # FLIP sent to SHOW received, in hundredths of a millisecond
+    
+    def summary(self, elapsed):
+        latency = histogram_stats(self.round_trips)
+        latency["max"] = max(self.round_trips, default=0)
+        return {"seconds": round(elapsed, 2), "sessions": self.connected, "failed": self.failed,
+                "games": self.games, "flips": self.flips, "denied": self.denied,
+                "flips_per_sec": round(self.flips / elapsed) if elapsed else 0,
+                "round_trip_ms": {name: round(value / 100, 2) for name, value in latency.items()}}
+
+async def expect(reader, *commands):
+    """Read lines until one starts with one of commands; returns its fields"""
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        fields = line.decode("ascii").split()
+        if fields[0] in commands:
+            return fields
+        if fields[0] == "ERR":
+            raise ConnectionError(" ".join(fields))
+
+async def flip(reader, writer, index, stats):
+    """Flip a card; returns its symbol, or None if the server refused"""
+    start = time.perf_counter()
+    writer.write(b"FLIP %d\n" % index)
+    fields = await expect(reader, "SHOW", "DENY")
+    if fields[0] == "DENY":
+        stats.denied += 1
+        return None
+    stats.round_trips[round((time.perf_counter() - start) * 100000)] += 1
+    stats.flips += 1
+    return int(fields[2])
+
+async def play_game(reader, writer, bot, pairs, think, rng, stats):
+    """One game to the end, played like memory_tournament.play_game but over the wire"""
+    writer.write(b"NEW %d\n" % pairs)
+    cards = int((await expect(reader, "BOARD"))[1])
+    hidden = list(range(cards))
+    bot.reset(cards)
+    
+    while hidden:
+        await asyncio.sleep(think)
+        first = bot.first_pick(hidden, rng)
+        symbol = await flip(reader, writer, first, stats)
+        if symbol is None:
+            continue
+        bot.observe(first, symbol)
+        
+        await asyncio.sleep(think)
+        second = bot.second_pick(first, symbol, hidden, rng)
+        symbol = await flip(reader, writer, second, stats)
+        if symbol is not None:
+            bot.observe(second, symbol)
+        
+        fields = await expect(reader, "MATCH", "HIDE")
+        if fields[0] == "MATCH":
+            for index in (int(fields[1]), int(fields[2])):
+                hidden.remove(index)
+                bot.forget(index)
+    await expect(reader, "WON")
+    stats.games += 1
+
+async def run_session(host, port, delay, deadline, spec, pairs, think, rng, stats):
+    await asyncio.sleep(delay)
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        stats.failed += 1
+        return
+    stats.connected += 1
+    bot = make_bot(spec)
+    try:
+        while time.monotonic() < deadline:
+            await play_game(reader, writer, bot, pairs, think, rng, stats)
+        writer.write(b"QUIT\n")
+    except ConnectionError:
+        stats.failed += 1
+    finally:
+        writer.close()
+
+async def report_progress(stats, start, output):
+    while True:
+        await asyncio.sleep(PROGRESS_INTERVAL)
+        print(json.dumps(stats.summary(time.monotonic() - start)), file=output, flush=True)
+
+async def run_load(host, port, sessions, duration, ramp, spec, pairs, think_ms, seed):
+    """Run every session until the deadline and return the stats summary"""
+    stats = LoadStats()
+    rng = random.Random(seed)
+    start = time.monotonic()
+    deadline = start + ramp + duration
+    progress = asyncio.ensure_future(report_progress(stats, start, sys.stderr))
+    # Sessions finish the game they are in after the deadline, so nothing is cut off mid-move
+    await asyncio.gather(*(
+        run_session(host, port, ramp * i / sessions, deadline, spec, pairs, think_ms / 1000, rng, stats)
+        for i in range(sessions)))
+    progress.cancel()
+    return stats.summary(time.monotonic() - start)
+
+class SpawnedServer:
+    """memory_server.py in a child process on a free loopback port"""
+    def __init__(self, reveal_time):
+        self.process = subprocess.Popen(
+            [sys.executable, "memory_server.py", "--port", "0", "--reveal-time", str(reveal_time),
+             "--stats-interval", "1"],
+            stderr=subprocess.PIPE, text=True, cwd=sys.path[0] or None)
+        line = self.process.stderr.readline()
+        if not line.startswith("listening on "):
+            self.process.kill()
+            raise RuntimeError(f"memory_server.py did not start: {line.strip()}")
+        self.port = int(line.rsplit(":", 1)[1])
+        self.last_stats = None
+        # Keep draining stderr so the server never blocks on a full pipe
+        self.reader = threading.Thread(target=self.read_stats, daemon=True)
+        self.reader.start()
+    
+    def read_stats(self):
+        for line in self.process.stderr:
+            if line.startswith("{"):
+                self.last_stats = json.loads(line)
+    
+    def stop(self):
+        """Stop the server; returns its last stats line"""
+        self.process.terminate()
+        self.process.wait()
+        self.reader.join()
+        return self.last_stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load generator for memory_server.py")
+    parser.add_argument("--host", default="127.0.0.1", help="server address")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="server port")
+    parser.add_argument("--spawn", action="store_true", help="start a server on a free loopback port first")
+    parser.add_argument("--reveal-time", type=int, default=REVEAL_TIME,
+                        help="reveal time for a --spawn server in milliseconds")
+    parser.add_argument("--sessions", type=int, default=1000, help="concurrent sessions")
+    parser.add_argument("--duration", type=float, default=20, help="seconds to keep starting new games")
+    parser.add_argument("--ramp", type=float, default=2, help="seconds over which sessions connect")
+    parser.add_argument("--bot", type=bot_spec, default="perfect", help="strategy: random, perfect or memory:N")
+    parser.add_argument("--pairs", type=int, default=6, help="pairs on each board")
+    parser.add_argument("--think-ms", type=float, default=50, help="bot pause before each flip")
+    parser.add_argument("--seed", type=int, default=1, help="bot seed")
+    args = parser.parse_args(argv)
+    
+    server = SpawnedServer(args.reveal_time) if args.spawn else None
+    port = server.port if server else args.port
+    try:
+        report = asyncio.run(run_load(args.host, port, args.sessions, args.duration, args.ramp,
+                                      args.bot, args.pairs, args.think_ms, args.seed))
+    finally:
+        if server is not None:
+            # Its last stats line shows the peak session count and memory
+            server_stats = server.stop()
+    if server is not None:
+        report["server"] = server_stats
+    print(json.dumps(report, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
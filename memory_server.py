@@ -0,0 +1,307 @@
+"""Asyncio server hosting many memory games at once.
+
+Every TCP connection plays one session against an authoritative
+MemoryEngine: the server shuffles, decides matches and turns a mismatched
+pair back over when its reveal time runs out, using a loop timer rather
+than a polling clock. Symbols only reach the client as cards are flipped.
+
+The protocol is one short ASCII line per message.
+
+Client to server:
+    NEW <pairs> [<symbols>]     start a shuffled game, replacing the current one
+    FLIP <index>                turn a card face up
+    PING
+    QUIT
+
+Server to client:
+    BOARD <cards>               the new game is ready
+    SHOW <index> <symbol>       a card turned face up
+    DENY <index>                that card can't be flipped right now
+    MATCH <first> <second> <moves> <score>
+    HIDE <first> <second> <moves> <score>
+    WON <moves> <score> <ms>    ms is the game's length on the server clock
+    PONG
+    ERR <reason>                followed by the server closing the connection
+
+    python memory_server.py --port 7777
+    python memory_loadgen.py --port 7777 --sessions 2000
+"""
+import argparse
+import asyncio
+import json
+import random
+import resource
+import socket
+import sys
+
+from memory_board import BoardModel
+from memory_engine import MATCH_SCORE, REVEAL_TIME, MemoryEngine
+
+DEFAULT_PORT = 7777
+MAX_PAIRS = 1024  # Largest board a session may ask for, which bounds per-session memory
+MAX_LINE = 64  # Longest request line in bytes
+MAX_OUTPUT = 16 * 1024  # A client that stops reading is dropped once this much is queued for it
+IDLE_TIMEOUT = 300  # Seconds a session may go without a request
+STATS_INTERVAL = 5  # Seconds between stats lines on stderr
+
+class Session:
+    """One connection's game: the engine, its flip-back timer and the write side"""
+    __slots__ = ('server', 'writer', 'engine', 'timer', 'started')
+    
+    def __init__(self, server, writer):
+        self.server = server
+        self.writer = writer
+        self.engine = None
+        self.timer = None  # Pending flip-back, if a pair is face up
+        self.started = 0
+    
+    def send(self, *fields):
+        self.writer.write(" ".join(map(str, fields)).encode() + b"\n")
+        if self.writer.transport.get_write_buffer_size() > MAX_OUTPUT:
+            self.writer.transport.abort()
+    
+    def handle(self, line):
+        """Apply one request; returns False when the session should end"""
+        fields = line.split()
+        if not fields:
+            return True
+        command, args = fields[0].upper(), fields[1:]
+        try:
+            if command == "FLIP" and len(args) == 1:
+                self.flip(int(args[0]))
+            elif command == "NEW" and len(args) in (1, 2):
+                pairs = int(args[0])
+                self.new_game(pairs, int(args[1]) if len(args) == 2 else pairs)
+            elif command == "PING" and not args:
+                self.send("PONG")
+            elif command == "QUIT" and not args:
+                return False
+            else:
+                raise ValueError(f"bad request {line.strip()[:MAX_LINE]!r}")
+        except ValueError as error:
+            self.send("ERR", error)
+            return False
+        return True
+    
+    def new_game(self, pairs, symbols):
+        if not 1 <= pairs <= MAX_PAIRS or not 1 <= symbols <= pairs:
+            raise ValueError(f"pairs must be 1-{MAX_PAIRS} with 1-pairs symbols")
+        self.cancel_timer()
+        self.engine = MemoryEngine.new_game(pairs, symbols, self.server.rng, reveal_time=self.server.reveal_time,
+                                            match_score=self.server.match_score)
+        self.started = self.server.now()
+        self.server.games_started += 1
+        self.send("BOARD", pairs * 2)
+    
+    def flip(self, index):
+        engine = self.engine
+        if engine is None:
+            raise ValueError("no game; send NEW first")
+        now = self.server.now()
+        if not 0 <= index < len(engine.board) or not engine.flip(index, now):
+            self.send("DENY", index)
+            return
+        self.server.flips += 1
+        self.send("SHOW", index, engine.board.symbols[index])
+        
+        resolve_time = engine.resolve_time()
+        if resolve_time is not None:
+            # The pair stays up for the reveal time, then the timer settles it
+            self.timer = self.server.loop.call_later((resolve_time - now) / 1000, self.resolve, resolve_time)
+    
+    def resolve(self, resolve_time):
+        self.timer = None
+        engine = self.engine
+        first, second, matched = engine.update(resolve_time)
+        self.send("MATCH" if matched else "HIDE", first, second, engine.moves, engine.score)
+        if engine.won:
+            self.server.games_won += 1
+            self.send("WON", engine.moves, engine.score, resolve_time - self.started)
+    
+    def cancel_timer(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+class MemoryServer:
+    """Accepts connections and runs a Session for each"""
+    def __init__(self, seed=None, reveal_time=REVEAL_TIME, match_score=MATCH_SCORE):
+        self.rng = random.Random(seed)
+        self.reveal_time = reveal_time
+        self.match_score = match_score
+        self.loop = None
+        self.sessions = 0
+        self.peak_sessions = 0
+        self.games_started = 0
+        self.games_won = 0
+        self.flips = 0
+    
+    def now(self):
+        """Engine time in whole milliseconds of the event loop clock"""
+        return int(self.loop.time() * 1000)
+    
+    async def serve_client(self, reader, writer):
+        session = Session(self, writer)
+        self.sessions += 1
+        self.peak_sessions = max(self.peak_sessions, self.sessions)
+        writer.transport.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                except ValueError:
+                    session.send("ERR", "line too long")
+                    break
+                if not line or not session.handle(line.decode("ascii", "replace")):
+                    break
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            session.cancel_timer()
+            self.sessions -= 1
+            writer.close()
+    
+    def stats(self):
+        return {"sessions": self.sessions, "peak_sessions": self.peak_sessions,
+                "games_started": self.games_started, "games_won": self.games_won, "flips": self.flips,
+                "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+    
+    async def report(self, interval, output):
+        while True:
+            await asyncio.sleep(interval)
+            print(json.dumps(self.stats()), file=output, flush=True)
+    
+    async def serve(self, host, port, stats_interval=STATS_INTERVAL, ready=None):
+        self.loop = asyncio.get_running_loop()
+        server = await asyncio.start_server(self.serve_client, host, port, limit=MAX_LINE, backlog=1024)
+        if ready is not None:
+            ready(server.sockets[0].getsockname())
+        reporter = asyncio.ensure_future(self.report(stats_interval, sys.stderr)) if stats_interval else None
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if reporter is not None:
+                reporter.cancel()
+
+class RemoteEngine:
+    """MemoryEngine stand-in for a game client whose rules run on a MemoryServer.
+    
+    Exposes the attributes the game reads (board, pending, moves, score,
+    matched_pairs, total_pairs, won) over a non-blocking socket. Symbols are
+    filled into the local board as the server shows cards, so nothing can be
+    peeked before it is flipped. update() applies whatever the server sent
+    and returns a resolved pair like MemoryEngine.update().
+    """
+    def __init__(self, address, timeout=5):
+        self.sock = socket.create_connection(address, timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.setblocking(False)
+        self.buffer = b""
+        self.board = None
+        self.ready = False
+        self.resolved = []
+    
+    def new_game(self, pairs, symbols):
+        self.board = BoardModel([0] * (pairs * 2))
+        self.pending = []
+        self.moves = 0
+        self.score = 0
+        self.matched_pairs = 0
+        self.total_pairs = pairs
+        self.won = False
+        self.resolved = []
+        self.ready = False  # Until BOARD arrives, anything received belongs to the previous game
+        self.send("NEW", pairs, symbols)
+    
+    def send(self, *fields):
+        self.sock.sendall(" ".join(map(str, fields)).encode() + b"\n")
+    
+    def can_flip(self, index):
+        return len(self.pending) < 2 and self.board.is_hidden(index) and index not in self.pending
+    
+    def flip(self, index, now):
+        """Ask the server to flip; the card turns over when its SHOW arrives"""
+        if not self.can_flip(index):
+            return False
+        self.pending.append(index)
+        if len(self.pending) == 2:
+            self.moves += 1
+        self.send("FLIP", index)
+        return True
+    
+    def poll(self, now):
+        """Apply every complete message the server has sent so far"""
+        closed = False
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except BlockingIOError:
+                break
+            if not data:
+                closed = True
+                break
+            self.buffer += data
+        *lines, self.buffer = self.buffer.split(b"\n")
+        for line in lines:
+            self.apply(line.decode("ascii").split(), now)
+        if closed:
+            # Only after the lines before it, so an ERR explains the close
+            raise ConnectionError("the game server closed the connection")
+    
+    def apply(self, fields, now):
+        command, args = fields[0], fields[1:]
+        if command == "ERR":
+            raise ConnectionError(f"the game server refused a request: {' '.join(args)}")
+        if command == "BOARD":
+            self.ready = True
+        elif not self.ready:
+            return
+        elif command == "SHOW":
+            index, symbol = int(args[0]), int(args[1])
+            self.board.symbols[index] = symbol
+            self.board.reveal(index, now)
+        elif command == "DENY":
+            index = int(args[0])
+            if index in self.pending:
+                self.pending.remove(index)
+        elif command in ("MATCH", "HIDE"):
+            first, second, self.moves, self.score = map(int, args)
+            matched = command == "MATCH"
+            if matched:
+                self.board.mark_matched(first, second)
+                self.matched_pairs += 1
+                self.won = self.matched_pairs == self.total_pairs  # WON follows, but the game reacts to this MATCH
+            else:
+                self.board.hide(first, second)
+            self.pending = []
+            self.resolved.append((first, second, matched))
+    
+    def update(self, now):
+        self.poll(now)
+        return self.resolved.pop(0) if self.resolved else None
+    
+    def close(self):
+        self.sock.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Asyncio server hosting many memory games")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port")
+    parser.add_argument("--reveal-time", type=int, default=REVEAL_TIME, help="milliseconds a pair stays up")
+    parser.add_argument("--match-score", type=int, default=MATCH_SCORE, help="points per matched pair")
+    parser.add_argument("--seed", type=int, default=None, help="shuffle seed")
+    parser.add_argument("--stats-interval", type=float, default=STATS_INTERVAL,
+                        help="seconds between JSON stats lines on stderr (0 to disable)")
+    args = parser.parse_args(argv)
+    
+    server = MemoryServer(args.seed, args.reveal_time, args.match_score)
+    ready = lambda address: print(f"listening on {address[0]}:{address[1]}", file=sys.stderr, flush=True)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.stats_interval, ready))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""Save files for memory games in progress.
+
+A save is one fixed-layout binary snapshot followed by append-only delta
+records. The snapshot is a header (counters, face-up pair, board size and
+the Mersenne Twister state of the game's RNG) and then the BoardModel
+arrays byte for byte, so restoring memory-maps the file and copies each
+array in one piece. Every flip and every resolved pair after that appends
+one 32-byte record, which costs a single small write:
+
+    save = GameSave("kiosk.wsav")
+    save.save(engine, board_size, now)          # new game: fresh snapshot
+    save.record_flip(engine, index, now)        # after each flip
+    save.record_resolve(engine, first, second, matched, now)
+
+    saved = load_game("kiosk.wsav")             # SavedGame, or ValueError
+    engine = saved.resume(now)
+
+Snapshots are replaced atomically and synced to disk. Delta records are
+not synced, but each carries a CRC, so a record torn by a power cut ends
+the log instead of corrupting the game.
+"""
+import mmap
+import os
+import random
+import struct
+import zlib
+
+from memory_board import BoardModel
+from memory_engine import MemoryEngine
+
+MAGIC = b"WSAV"
+VERSION = 1
+# magic, version, flags, rows, cols (0 x 0 for the classic layout), cards, moves,
+# score, matched pairs, face-up cards (-1 when none), reveal time, match score,
+# saved at, then the Mersenne Twister state: 625 words, has-gauss flag, gauss
+HEADER = struct.Struct("<4sHHIIIIIIiiIIq625I?7xd")
+ARRAYS_OFFSET = -(-HEADER.size // 8) * 8  # reveal_times come first and stay 8-byte aligned
+WON = 1
+
+# kind, matched, first, second, moves, score, time; then a CRC of those bytes
+DELTA = struct.Struct("<BBxxIIIIq")
+RECORD = struct.Struct(f"<{DELTA.format[1:]}I")
+FLIP = 1
+RESOLVE = 2
+MAX_DELTAS = 4096  # Records appended before the next flip or pair writes a fresh snapshot
+
+class SavedGame:
+    """A game read back from a save file"""
+    def __init__(self, engine, board_size, rng_state, saved_at):
+        self.engine = engine
+        self.board_size = board_size  # (rows, cols) for a large board, or None
+        self.rng_state = rng_state
+        self.saved_at = saved_at  # Game time of the last snapshot or record
+    
+    def resume(self, now):
+        """The engine on a clock now reading now, with a face-up pair keeping its remaining time"""
+        times = self.engine.board.reveal_times
+        for index in self.engine.pending:
+            times[index] += now - self.saved_at
+        self.saved_at = now
+        return self.engine
+
+def pack_snapshot(engine, board_size, rng_state, now):
+    """Header and arrays of a snapshot as one bytes object"""
+    board = engine.board
+    pending = engine.pending + [-1] * (2 - len(engine.pending))
+    rows, cols = board_size or (0, 0)
+    _, words, gauss = rng_state
+    header = HEADER.pack(MAGIC, VERSION, WON if engine.won else 0, rows, cols, len(board), engine.moves,
+                         engine.score, engine.matched_pairs, pending[0], pending[1], engine.reveal_time,
+                         engine.match_score, now, *words, gauss is not None, gauss or 0.0)
+    return b"".join([header, bytes(ARRAYS_OFFSET - HEADER.size), board.reveal_times.tobytes(),
+                     board.symbols.tobytes(), board.revealed, board.matched])
+
+def unpack_snapshot(data):
+    """SavedGame from a buffer holding a snapshot; returns it and where its records start"""
+    if len(data) < HEADER.size:
+        raise ValueError("save file is truncated")
+    (magic, version, flags, rows, cols, cards, moves, score, matched_pairs, first, second, reveal_time,
+     match_score, saved_at, *rng) = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"not a version {VERSION} save file")
+    end = ARRAYS_OFFSET + cards * 12
+    if len(data) < end:
+        raise ValueError("save file is truncated")
+    
+    board = BoardModel(())
+    offset = ARRAYS_OFFSET
+    board.reveal_times.frombytes(data[offset:offset + cards * 8])
+    offset += cards * 8
+    board.symbols.frombytes(data[offset:offset + cards * 2])
+    offset += cards * 2
+    board.revealed = bytearray(data[offset:offset + cards])
+    board.matched = bytearray(data[offset + cards:end])
+    board.matched_count = cards - board.matched.count(0)
+    
+    engine = MemoryEngine(board, reveal_time, match_score)
+    engine.pending = [index for index in (first, second) if index >= 0]
+    engine.moves = moves
+    engine.score = score
+    engine.matched_pairs = matched_pairs
+    engine.won = bool(flags & WON)
+    words, has_gauss, gauss = rng[:625], rng[625], rng[626]
+    rng_state = (3, tuple(words), gauss if has_gauss else None)
+    return SavedGame(engine, (rows, cols) if rows else None, rng_state, saved_at), end
+
+def apply_records(saved, data, start):
+    """Replay the delta records from start up to the first torn one; returns how many applied"""
+    engine = saved.engine
+    board = engine.board
+    count = 0
+    for offset in range(start, len(data) - RECORD.size + 1, RECORD.size):
+        kind, matched, first, second, moves, score, time, crc = RECORD.unpack_from(data, offset)
+        if crc != zlib.crc32(data[offset:offset + DELTA.size]) or max(first, second) >= len(board):
+            break
+        if kind == FLIP:
+            board.reveal(first, time)
+            engine.pending.append(first)
+        elif kind == RESOLVE:
+            if matched:
+                board.mark_matched(first, second)
+                engine.matched_pairs += 1
+                engine.won = board.all_matched()
+            else:
+                board.hide(first, second)
+            engine.pending = []
+        else:
+            break
+        engine.moves = moves
+        engine.score = score
+        saved.saved_at = time
+        count += 1
+    return count
+
+def load_game(path):
+    """Map a save file and rebuild its game; raises ValueError if it isn't one"""
+    with open(path, "rb") as save_file:
+        size = os.fstat(save_file.fileno()).st_size
+        if not size:
+            raise ValueError(f"{path} is empty")
+        with mmap.mmap(save_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            try:
+                saved, offset = unpack_snapshot(data)
+            except ValueError as error:
+                raise ValueError(f"{path}: {error}")
+            apply_records(saved, data, offset)
+    return saved
+
+class GameSave:
+    """Writes snapshots and appends a delta record for every flip and resolved pair"""
+    def __init__(self, path, rng=random):
+        self.path = path
+        self.rng = rng  # Its state goes into each snapshot
+        self.fd = None
+        self.board_size = None
+        self.records = 0
+    
+    def save(self, engine, board_size, now):
+        """Replace the file with a snapshot of engine and start a new delta log"""
+        self.close()
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as save_file:
+            save_file.write(pack_snapshot(engine, board_size, self.rng.getstate(), now))
+            save_file.flush()
+            os.fsync(save_file.fileno())
+        os.replace(temp_path, self.path)
+        self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+        self.board_size = board_size
+        self.records = 0
+    
+    def append(self, engine, kind, matched, first, second, now):
+        if self.records >= MAX_DELTAS:
+            # The snapshot already includes this change
+            self.save(engine, self.board_size, now)
+            return
+        delta = DELTA.pack(kind, matched, first, second, engine.moves, engine.score, now)
+        os.write(self.fd, delta + zlib.crc32(delta).to_bytes(4, "little"))
+        self.records += 1
+    
+    def record_flip(self, engine, index, now):
+        self.append(engine, FLIP, 0, index, 0, now)
+    
+    def record_resolve(self, engine, first, second, matched, now):
+        self.append(engine, RESOLVE, matched, first, second, now)
+    
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
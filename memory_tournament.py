@@ -0,0 +1,332 @@
+"""Bot tournament for the memory game rules.
+
+Plays seeded games with MemoryEngine across a multiprocessing pool and
+streams aggregated histograms of moves-to-win, score and game time per bot.
+Game N uses the same shuffled board for every bot, so strategies are
+compared on identical deals. Progress can be checkpointed and resumed:
+
+    python memory_tournament.py --games 1000000 --bots random perfect memory:4 --checkpoint run.json
+    python memory_tournament.py --games 1000000 --bots random perfect memory:4 --checkpoint run.json --resume
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from collections import Counter, OrderedDict
+
+from memory_engine import MATCH_SCORE, REVEAL_TIME, MemoryEngine
+
+CHUNK_GAMES = 2000  # Games per pool task; also the checkpoint granularity
+THINK_TIME = 400  # Milliseconds a bot spends choosing each card
+MAX_MOVES_PER_PAIR = 50  # Games still unfinished after this many moves a pair are abandoned
+DURATION_BUCKET = 1000  # Game time histogram bucket in milliseconds
+CHECKPOINT_VERSION = 1
+
+class RandomBot:
+    """Flips two random face-down cards and remembers nothing"""
+    name = "random"
+    
+    def reset(self, card_count):
+        pass
+    
+    def observe(self, index, symbol):
+        pass
+    
+    def forget(self, index):
+        pass
+    
+    def first_pick(self, hidden, rng):
+        return rng.choice(hidden)
+    
+    def second_pick(self, first, symbol, hidden, rng):
+        second = rng.choice(hidden)
+        while second == first:
+            second = rng.choice(hidden)
+        return second
+
+class MemoryBot(RandomBot):
+    """Remembers the last capacity cards it saw, or every card if capacity is None.
+    
+    It flips a remembered pair when it knows one, otherwise an unseen card,
+    then that card's remembered partner if any, otherwise another unseen card.
+    """
+    def __init__(self, capacity=None):
+        self.capacity = capacity
+        self.name = "perfect" if capacity is None else f"memory:{capacity}"
+        self.seen = OrderedDict()  # Index -> symbol, oldest first
+    
+    def reset(self, card_count):
+        self.seen.clear()
+    
+    def observe(self, index, symbol):
+        self.seen[index] = symbol
+        self.seen.move_to_end(index)
+        if self.capacity is not None and len(self.seen) > self.capacity:
+            self.seen.popitem(last=False)
+    
+    def forget(self, index):
+        self.seen.pop(index, None)
+    
+    def known_pair(self):
+        first_seen = {}
+        for index, symbol in self.seen.items():
+            if symbol in first_seen:
+                return first_seen[symbol]
+            first_seen[symbol] = index
+        return None
+    
+    def unseen(self, hidden, rng, exclude=None):
+        choices = [index for index in hidden if index not in self.seen and index != exclude]
+        if not choices:
+            choices = [index for index in hidden if index != exclude]
+        return rng.choice(choices)
+    
+    def first_pick(self, hidden, rng):
+        index = self.known_pair()
+        return index if index is not None else self.unseen(hidden, rng)
+    
+    def second_pick(self, first, symbol, hidden, rng):
+        for index, seen_symbol in self.seen.items():
+            if seen_symbol == symbol and index != first:
+                return index
+        return self.unseen(hidden, rng, exclude=first)
+
+def make_bot(spec):
+    """Bot from a name: random, perfect or memory:N"""
+    if spec == "random":
+        return RandomBot()
+    if spec == "perfect":
+        return MemoryBot()
+    if spec.startswith("memory:"):
+        return MemoryBot(int(spec.split(":", 1)[1]))
+    raise ValueError(f"unknown bot {spec!r}")
+
+def bot_spec(text):
+    """argparse type for --bots"""
+    try:
+        make_bot(text)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error))
+    return text
+
+def play_game(bot, seed, pairs, symbols, reveal_time, match_score):
+    """Play one seeded game; returns (won, moves, score, game time in ms)"""
+    rng = random.Random(seed)
+    engine = MemoryEngine.new_game(pairs, symbols, rng, reveal_time=reveal_time, match_score=match_score)
+    board = engine.board
+    hidden = list(range(len(board)))
+    bot.reset(len(board))
+    max_moves = MAX_MOVES_PER_PAIR * pairs
+    now = 0
+    
+    while not engine.won and engine.moves < max_moves:
+        first = bot.first_pick(hidden, rng)
+        now += THINK_TIME
+        engine.flip(first, now)
+        bot.observe(first, board.symbols[first])
+        
+        second = bot.second_pick(first, board.symbols[first], hidden, rng)
+        now += THINK_TIME
+        engine.flip(second, now)
+        bot.observe(second, board.symbols[second])
+        
+        now = engine.resolve_time()
+        _, _, matched = engine.update(now)
+        if matched:
+            hidden.remove(first)
+            hidden.remove(second)
+            bot.forget(first)
+            bot.forget(second)
+    return engine.won, engine.moves, engine.score, now
+
+def play_chunk(task):
+    """Pool worker: play one chunk of games for one bot and return histograms of its won games"""
+    spec, chunk, config = task
+    bot = make_bot(spec)
+    moves = Counter()
+    scores = Counter()
+    durations = Counter()
+    won = 0
+    abandoned = 0
+    first_game = chunk * config["chunk_games"]
+    last_game = min(first_game + config["chunk_games"], config["games"])
+    for game in range(first_game, last_game):
+        # Every bot gets the same deal for game N
+        seed = config["seed"] * 1_000_000_007 + game
+        game_won, game_moves, score, duration = play_game(
+            bot, seed, config["pairs"], config["symbols"], config["reveal_time"], config["match_score"])
+        if not game_won:
+            # Cut off at MAX_MOVES_PER_PAIR; its moves say nothing about moves-to-win
+            abandoned += 1
+            continue
+        won += 1
+        moves[game_moves] += 1
+        scores[score] += 1
+        durations[duration // DURATION_BUCKET * DURATION_BUCKET] += 1
+    return spec, chunk, {
+        "games": last_game - first_game,
+        "won": won,
+        "abandoned": abandoned,
+        "moves": moves,
+        "score": scores,
+        "duration_ms": durations,
+    }
+
+class TournamentResults:
+    """Histograms of won games per bot, merged chunk by chunk and saved as a checkpoint"""
+    HISTOGRAMS = ("moves", "score", "duration_ms")
+    COUNTS = ("games", "won", "abandoned")
+    
+    def __init__(self, config):
+        self.config = config
+        self.done = set()  # (bot, chunk) pairs already merged
+        self.bots = {spec: self.empty() for spec in config["bots"]}
+    
+    def empty(self):
+        return {**{name: 0 for name in self.COUNTS}, **{name: Counter() for name in self.HISTOGRAMS}}
+    
+    def merge(self, spec, chunk, result):
+        totals = self.bots[spec]
+        for name in self.COUNTS:
+            totals[name] += result[name]
+        for name in self.HISTOGRAMS:
+            totals[name].update(result[name])
+        self.done.add((spec, chunk))
+    
+    def games_played(self):
+        return sum(totals["games"] for totals in self.bots.values())
+    
+    def progress(self, played, elapsed):
+        """Progress line: throughput and the moves-to-win and score stats merged so far"""
+        return {"games": self.games_played(), "games_per_sec": round(played / elapsed) if elapsed else 0,
+                "bots": {spec: {"won": totals["won"], "abandoned": totals["abandoned"],
+                                "moves": histogram_stats(totals["moves"]),
+                                "score": histogram_stats(totals["score"])}
+                         for spec, totals in self.bots.items()}}
+    
+    def summary(self):
+        report = {"config": self.config, "bots": {}}
+        for spec, totals in self.bots.items():
+            report["bots"][spec] = {
+                **{name: totals[name] for name in self.COUNTS},
+                **{f"{name}_stats": histogram_stats(totals[name]) for name in self.HISTOGRAMS},
+                **{name: {str(key): count for key, count in sorted(totals[name].items())}
+                   for name in self.HISTOGRAMS},
+            }
+        return report
+    
+    def save(self, path):
+        """Write the checkpoint atomically so an interrupted run can resume"""
+        state = {
+            "version": CHECKPOINT_VERSION,
+            "config": self.config,
+            "done": sorted([spec, chunk] for spec, chunk in self.done),
+            "bots": {spec: {**{name: totals[name] for name in self.COUNTS},
+                            **{name: dict(totals[name]) for name in self.HISTOGRAMS}}
+                     for spec, totals in self.bots.items()},
+        }
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as checkpoint_file:
+            json.dump(state, checkpoint_file)
+        os.replace(temp_path, path)
+    
+    @classmethod
+    def load(cls, path, config):
+        with open(path) as checkpoint_file:
+            state = json.load(checkpoint_file)
+        if state.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"{path} is not a version {CHECKPOINT_VERSION} checkpoint")
+        if state["config"] != config:
+            raise ValueError(f"{path} was written with different tournament settings")
+        results = cls(config)
+        results.done = {(spec, chunk) for spec, chunk in state["done"]}
+        for spec, totals in state["bots"].items():
+            for name in cls.COUNTS:
+                results.bots[spec][name] = totals[name]
+            for name in cls.HISTOGRAMS:
+                results.bots[spec][name] = Counter({int(key): count for key, count in totals[name].items()})
+        return results
+
+def histogram_stats(histogram):
+    """Mean and percentiles of a value -> count histogram"""
+    total = sum(histogram.values())
+    if not total:
+        return {"mean": 0.0, "p50": 0, "p90": 0, "p99": 0}
+    stats = {"mean": sum(value * count for value, count in histogram.items()) / total}
+    targets = [("p50", 0.50), ("p90", 0.90), ("p99", 0.99)]
+    seen = 0
+    for value in sorted(histogram):
+        seen += histogram[value]
+        while targets and seen >= targets[0][1] * total:
+            stats[targets.pop(0)[0]] = value
+    return stats
+
+def run_tournament(config, workers=None, checkpoint=None, resume=False, progress=sys.stderr):
+    """Play every (bot, chunk) task not already in the checkpoint and return the results"""
+    if resume and checkpoint and os.path.exists(checkpoint):
+        results = TournamentResults.load(checkpoint, config)
+    else:
+        results = TournamentResults(config)
+    
+    chunks = -(-config["games"] // config["chunk_games"])
+    tasks = [(spec, chunk, config) for chunk in range(chunks) for spec in config["bots"]
+             if (spec, chunk) not in results.done]
+    
+    start = time.perf_counter()
+    played = 0
+    with multiprocessing.Pool(workers) as pool:
+        for spec, chunk, result in pool.imap_unordered(play_chunk, tasks):
+            results.merge(spec, chunk, result)
+            played += result["games"]
+            if checkpoint:
+                results.save(checkpoint)
+            if progress is not None:
+                line = results.progress(played, time.perf_counter() - start)
+                print(json.dumps(line), file=progress, flush=True)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bot tournament for the memory game rules")
+    parser.add_argument("--games", type=int, default=100000, help="games per bot")
+    parser.add_argument("--bots", nargs="+", type=bot_spec, default=["random", "perfect", "memory:4"],
+                        help="strategies: random, perfect or memory:N")
+    parser.add_argument("--pairs", type=int, default=6, help="pairs on each board")
+    parser.add_argument("--symbols", type=int, default=None, help="distinct symbols (default: one per pair)")
+    parser.add_argument("--reveal-time", type=int, default=REVEAL_TIME, help="milliseconds a pair stays up")
+    parser.add_argument("--match-score", type=int, default=MATCH_SCORE, help="points per matched pair")
+    parser.add_argument("--seed", type=int, default=1, help="tournament seed")
+    parser.add_argument("--chunk", type=int, default=CHUNK_GAMES, help="games per pool task")
+    parser.add_argument("--workers", type=int, default=None, help="pool processes (default: all cores)")
+    parser.add_argument("--checkpoint", help="save progress here after every chunk")
+    parser.add_argument("--resume", action="store_true", help="continue from --checkpoint")
+    parser.add_argument("--output", help="write the final JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+    
+    config = {
+        "games": args.games,
+        "bots": args.bots,
+        "pairs": args.pairs,
+        "symbols": args.symbols or args.pairs,
+        "reveal_time": args.reveal_time,
+        "match_score": args.match_score,
+        "seed": args.seed,
+        "chunk_games": args.chunk,
+    }
+    try:
+        results = run_tournament(config, args.workers, args.checkpoint, args.resume)
+    except ValueError as error:
+        parser.error(str(error))
+    
+    text = json.dumps(results.summary(), indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import json
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pygame
+import pytest
+
+import enhanced_disney_witch_game as witch_game
+from enhanced_disney_witch_game import InputLog, InputRecorder, InputReplay
+
+from conftest import ROOT
+
+CHECKSUM = 0x12345678
+
+@pytest.fixture
+def fake_game(monkeypatch):
+    # The recorder only needs the window, pointer and particle flag; the checksum is pinned
+    monkeypatch.setattr(witch_game, "state_checksum", lambda game: CHECKSUM)
+    return SimpleNamespace(screen=SimpleNamespace(get_size=lambda: (1200, 800)),
+                           use_particle_engine=True, mouse_pos=(10, 20))
+
+def record(path, game, frames):
+    """Write frames, a list of (ticks, events), through an InputRecorder"""
+    recorder = InputRecorder(str(path), 42, (4, 6))
+    recorder.ticks = recorder.start_ticks = recorder.last_ticks = 1000
+    recorder.start(game)
+    for ticks, events in frames:
+        recorder.ticks = ticks
+        for event in events:
+            recorder.record(event, (1200, 800))
+        recorder.end_frame(game)
+    recorder.close()
+
+def replay_all(path):
+    replay = InputReplay(str(path))
+    frames = []
+    while True:
+        events = replay.next_frame()
+        if events is None:
+            return replay, frames
+        frames.append((replay.ticks, replay.expected, events))
+
+FRAMES = [
+    (1013, [pygame.event.Event(pygame.KEYDOWN, key=pygame.K_d)]),
+    (1026, [pygame.event.Event(pygame.MOUSEMOTION, pos=(300, 200), rel=(-2, 3), buttons=(0, 0, 1)),
+            pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(300, 200), button=1)]),
+    (1026 + 70000, [pygame.event.Event(pygame.MOUSEWHEEL, y=-2)]),  # Needs the long delta
+    (1026 + 70013, [pygame.event.Event(pygame.QUIT)]),
+]
+
+def test_round_trip(tmp_path, fake_game):
+    path = tmp_path / "session.wrec"
+    record(path, fake_game, FRAMES)
+    
+    replay, frames = replay_all(path)
+    assert (replay.seed, replay.size, replay.mouse_pos) == (42, (1200, 800), (10, 20))
+    assert replay.board_size == (4, 6) and replay.particle_engine
+    assert [ticks for ticks, _, _ in frames] == [ticks for ticks, _ in FRAMES]
+    assert frames[0][1] == CHECKSUM  # Frame 0 carries a checksum, the next ones don't
+    assert [expected for _, expected, _ in frames[1:]] == [None] * 3
+    
+    key, = frames[0][2]
+    assert (key.type, key.key) == (pygame.KEYDOWN, pygame.K_d)
+    motion, click = frames[1][2]
+    assert (motion.pos, motion.rel, motion.buttons) == ((300, 200), (-2, 3), (0, 0, 1))
+    assert (click.type, click.pos, click.button) == (pygame.MOUSEBUTTONDOWN, (300, 200), 1)
+    wheel, = frames[2][2]
+    assert (wheel.type, wheel.y) == (pygame.MOUSEWHEEL, -2)
+    assert frames[3][2][0].type == pygame.QUIT
+
+def test_torn_tail_ends_the_log(tmp_path, fake_game):
+    path = tmp_path / "session.wrec"
+    record(path, fake_game, FRAMES)
+    data = path.read_bytes()
+    
+    # The last frame is its header and the QUIT code; cut anywhere inside it
+    for cut in range(1, InputLog.FRAME.size + 2):
+        path.write_bytes(data[:-cut])
+        replay, frames = replay_all(path)
+        assert len(frames) == len(FRAMES) - 1
+        assert replay.ticks == FRAMES[-2][0]  # The clock stops at the last whole frame
+
+@pytest.mark.parametrize("data", [
+    b"WREC",
+    InputLog.HEADER.pack(InputLog.MAGIC, InputLog.VERSION + 1, 1, 0, 1200, 800, 0, 0, 0, 0, 0),
+    InputLog.HEADER.pack(b"WSAV", InputLog.VERSION, 1, 0, 1200, 800, 0, 0, 0, 0, 0),
+])
+def test_rejects_other_files(tmp_path, data):
+    path = tmp_path / "old.wrec"
+    path.write_bytes(data)
+    with pytest.raises(ValueError, match="input log"):
+        InputReplay(str(path))
+
+def test_replay_prints_only_json(tmp_path):
+    # A few empty frames and a QUIT, with no checksums to diverge from
+    path = tmp_path / "quit.wrec"
+    header = InputLog.HEADER.pack(InputLog.MAGIC, InputLog.VERSION, 7, 0, 800, 600, 0, 0, 0, 0, 0)
+    frames = InputLog.FRAME.pack(13, 0) * 5 + InputLog.FRAME.pack(13, 1) + bytes([1])
+    path.write_bytes(header + frames)
+    
+    # Without the hiding this suite sets up, so the game has to keep pygame's banner off stdout itself
+    env = {name: value for name, value in os.environ.items() if name != "PYGAME_HIDE_SUPPORT_PROMPT"}
+    result = subprocess.run([sys.executable, os.path.join(ROOT, "enhanced_disney_witch_game.py"),
+                             "--replay", str(path)], capture_output=True, text=True, timeout=120, env=env)
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout)
+    assert report["frames"] == 6 and report["diverged_at_frame"] is None
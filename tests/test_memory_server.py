@@ -0,0 +1,173 @@
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+
+from memory_engine import MATCH_SCORE
+from memory_server import MAX_LINE, MAX_PAIRS, MemoryServer, RemoteEngine
+
+REVEAL_MS = 20  # Short reveal time so pairs resolve quickly
+
+@pytest.fixture
+def server():
+    """A MemoryServer on a free loopback port, run on an event loop in a background thread"""
+    memory_server = MemoryServer(seed=1, reveal_time=REVEAL_MS)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    state = {}
+    
+    def ready(address):
+        state["address"] = address
+        started.set()
+    
+    def run():
+        asyncio.set_event_loop(loop)
+        state["task"] = loop.create_task(memory_server.serve("127.0.0.1", 0, stats_interval=0, ready=ready))
+        try:
+            loop.run_until_complete(state["task"])
+        except asyncio.CancelledError:
+            pass
+        # Let client sessions still winding down finish before the loop goes
+        pending = asyncio.all_tasks(loop)
+        for task in pending:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        loop.close()
+    
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert started.wait(5)
+    yield memory_server, state["address"]
+    loop.call_soon_threadsafe(state["task"].cancel)
+    thread.join(5)
+
+class Client:
+    """Blocking line client for the protocol"""
+    def __init__(self, address):
+        self.sock = socket.create_connection(address, timeout=5)
+        self.lines = self.sock.makefile("rb")
+    
+    def send(self, line):
+        self.sock.sendall(line.encode("ascii") + b"\n")
+    
+    def expect(self, *commands):
+        fields = self.lines.readline().decode("ascii").split()
+        assert fields and fields[0] in commands, fields
+        return fields
+    
+    def closed(self):
+        return self.lines.readline() == b""
+    
+    def flip(self, index):
+        self.send(f"FLIP {index}")
+        _, shown, symbol = self.expect("SHOW")
+        assert int(shown) == index
+        return int(symbol)
+    
+    def close(self):
+        self.lines.close()
+        self.sock.close()
+
+@pytest.fixture
+def client(server):
+    client = Client(server[1])
+    yield client
+    client.close()
+
+def test_plays_a_game_to_the_end(server, client):
+    client.send("NEW 3")
+    assert client.expect("BOARD") == ["BOARD", "6"]
+    
+    # Look at every card once, then match them up
+    symbols = {}
+    turns = 0
+    for first, second in ((0, 1), (2, 3), (4, 5)):
+        symbols[first], symbols[second] = client.flip(first), client.flip(second)
+        turns += 1
+        command, *fields = client.expect("MATCH", "HIDE")
+        assert [int(field) for field in fields[:3]] == [first, second, turns]
+        if command == "MATCH":
+            del symbols[first], symbols[second]
+    while symbols:
+        first = next(iter(symbols))
+        second = next(index for index in symbols if index != first and symbols[index] == symbols[first])
+        client.flip(first)
+        client.flip(second)
+        turns += 1
+        assert client.expect("MATCH")[1:4] == [str(first), str(second), str(turns)]
+        del symbols[first], symbols[second]
+    
+    _, moves, score, elapsed = client.expect("WON")
+    assert (int(moves), int(score)) == (turns, 3 * MATCH_SCORE)
+    assert int(elapsed) >= turns * REVEAL_MS
+    assert server[0].games_won == 1
+
+def test_deny(client):
+    client.send("NEW 2")
+    client.expect("BOARD")
+    client.flip(0)
+    for index in (0, 4, -1):  # Already face up, then off the board
+        client.send(f"FLIP {index}")
+        assert client.expect("DENY") == ["DENY", str(index)]
+    client.flip(1)
+    client.send("FLIP 2")  # A pair is already face up
+    assert client.expect("DENY") == ["DENY", "2"]
+    assert client.expect("MATCH", "HIDE")[1:3] == ["0", "1"]
+    client.flip(2)  # Allowed again once the pair is resolved
+
+@pytest.mark.parametrize("line, reason", [
+    ("FLIP 0", "no game"),
+    ("JUMP 3", "bad request"),
+    ("FLIP one", "invalid literal"),
+    ("NEW 0", "pairs must be"),
+    (f"NEW {MAX_PAIRS + 1}", "pairs must be"),
+    ("NEW 2 3", "pairs must be"),
+])
+def test_errors_close_the_session(client, line, reason):
+    client.send(line)
+    fields = client.expect("ERR")
+    assert reason in " ".join(fields)
+    assert client.closed()
+
+def test_line_too_long(client):
+    client.send("PING " + "x" * MAX_LINE)
+    assert client.expect("ERR") == ["ERR", "line", "too", "long"]
+    assert client.closed()
+
+def test_ping_and_quit(server, client):
+    client.send("ping")  # Commands are case-insensitive
+    client.expect("PONG")
+    client.send("QUIT")
+    assert client.closed()
+    deadline = time.monotonic() + 5
+    while server[0].sessions and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert server[0].sessions == 0
+
+def wait_for(engine, condition, now=0):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for the server"
+        engine.poll(now)
+        time.sleep(0.005)
+
+def test_remote_engine(server):
+    engine = RemoteEngine(server[1])
+    try:
+        engine.new_game(1, 1)
+        wait_for(engine, lambda: engine.ready)
+        assert engine.flip(0, 0) and engine.flip(1, 0)
+        assert not engine.flip(0, 0)  # Already asked for
+        resolved = []
+        wait_for(engine, lambda: resolved.append(engine.update(0)) or resolved[-1] is not None)
+        assert resolved[-1] == (0, 1, True)
+        assert engine.board.symbols[0] == engine.board.symbols[1]
+        assert engine.won and (engine.moves, engine.score) == (1, MATCH_SCORE)
+        
+        engine.send("JUMP")
+        with pytest.raises(ConnectionError, match="refused"):
+            wait_for(engine, lambda: False)
+    finally:
+        engine.close()
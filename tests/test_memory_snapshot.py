@@ -0,0 +1,157 @@
+import random
+import struct
+
+import pytest
+
+import memory_snapshot
+from memory_engine import MemoryEngine
+from memory_snapshot import HEADER, RECORD, GameSave, load_game, pack_snapshot
+
+def new_engine(seed=5, pairs=6):
+    return MemoryEngine.new_game(pairs, pairs, random.Random(seed))
+
+def find_pair(engine, matching):
+    """Two hidden cards that do or don't match"""
+    board = engine.board
+    hidden = [index for index in range(len(board)) if board.is_hidden(index)]
+    for first in hidden:
+        for second in hidden:
+            if first != second and board.is_pair(first, second) == matching:
+                return first, second
+    raise AssertionError("no such pair")
+
+def play_turn(engine, save, matching, now):
+    """Flip a pair and resolve it, recording each step; returns the time after it"""
+    first, second = find_pair(engine, matching)
+    for index in (first, second):
+        engine.flip(index, now)
+        save.record_flip(engine, index, now)
+        now += 100
+    now = engine.resolve_time()
+    _, _, matched = engine.update(now)
+    save.record_resolve(engine, first, second, matched, now)
+    return now + 100
+
+def assert_same_game(restored, engine):
+    board, expected = restored.board, engine.board
+    assert list(board.symbols) == list(expected.symbols)
+    assert list(board.reveal_times) == list(expected.reveal_times)
+    assert board.revealed == expected.revealed and board.matched == expected.matched
+    assert board.matched_count == expected.matched_count
+    assert (restored.moves, restored.score, restored.matched_pairs, restored.won, restored.pending) == (
+        engine.moves, engine.score, engine.matched_pairs, engine.won, engine.pending)
+    assert (restored.reveal_time, restored.match_score) == (engine.reveal_time, engine.match_score)
+
+@pytest.mark.parametrize("board_size", [None, (3, 4)])
+def test_round_trip(tmp_path, board_size):
+    path = str(tmp_path / "game.wsav")
+    rng = random.Random(9)
+    engine = new_engine()
+    save = GameSave(path, rng)
+    save.save(engine, board_size, 0)
+    rng_state = rng.getstate()
+    
+    now = play_turn(engine, save, True, 1000)
+    now = play_turn(engine, save, False, now)
+    first, _ = find_pair(engine, True)
+    engine.flip(first, now)
+    save.record_flip(engine, first, now)
+    save.close()
+    
+    saved = load_game(path)
+    assert_same_game(saved.engine, engine)
+    assert saved.board_size == board_size
+    assert saved.rng_state == rng_state
+    assert saved.saved_at == now
+
+def test_won_game(tmp_path):
+    path = str(tmp_path / "game.wsav")
+    engine = new_engine(pairs=2)
+    save = GameSave(path)
+    save.save(engine, None, 0)
+    now = play_turn(engine, save, True, 0)
+    play_turn(engine, save, True, now)
+    save.close()
+    assert engine.won
+    assert_same_game(load_game(path).engine, engine)
+
+def test_torn_record_ends_the_log(tmp_path):
+    path = tmp_path / "game.wsav"
+    engine = new_engine()
+    save = GameSave(str(path))
+    save.save(engine, None, 0)
+    play_turn(engine, save, True, 1000)
+    save.close()
+    data = path.read_bytes()
+    path.write_bytes(data[:-RECORD.size])
+    before_resolve = load_game(str(path))  # The game one whole record earlier
+    
+    # A record cut short, or one with a bad CRC, is where the log ends
+    for torn in [data[:-1], data[:-RECORD.size // 2], data[:-5] + bytes([data[-5] ^ 1]) + data[-4:]]:
+        path.write_bytes(torn)
+        saved = load_game(str(path))
+        assert_same_game(saved.engine, before_resolve.engine)
+        assert saved.engine.pending == before_resolve.engine.pending
+        assert len(saved.engine.pending) == 2
+
+def test_resume_keeps_the_remaining_reveal_time(tmp_path):
+    path = str(tmp_path / "game.wsav")
+    engine = new_engine()
+    save = GameSave(path)
+    save.save(engine, None, 0)
+    first, second = find_pair(engine, False)
+    for index, now in ((first, 1000), (second, 1200)):
+        engine.flip(index, now)
+        save.record_flip(engine, index, now)
+    save.close()
+    remaining = engine.resolve_time() - 1200
+    
+    saved = load_game(path)
+    resumed = saved.resume(50000)  # The process restarted with a clock reading 50 s
+    assert resumed.resolve_time() - 50000 == remaining
+    assert resumed.board.reveal_times[first] == 1000 + 48800
+    assert resumed.update(50000 + remaining - 1) is None
+    assert resumed.update(50000 + remaining) == (first, second, False)
+
+def test_snapshot_rewritten_after_max_deltas(tmp_path, monkeypatch):
+    monkeypatch.setattr(memory_snapshot, "MAX_DELTAS", 4)
+    path = tmp_path / "game.wsav"
+    engine = new_engine()
+    save = GameSave(str(path))
+    save.save(engine, None, 0)
+    snapshot_size = path.stat().st_size
+    
+    now = play_turn(engine, save, False, 1000)  # Three records
+    first, second = find_pair(engine, True)
+    engine.flip(first, now)
+    save.record_flip(engine, first, now)  # The fourth
+    assert path.stat().st_size == snapshot_size + 4 * RECORD.size
+    engine.flip(second, now + 100)
+    save.record_flip(engine, second, now + 100)  # Replaces the file with a snapshot holding both flips
+    assert save.records == 0
+    assert path.stat().st_size == snapshot_size
+    
+    now = engine.resolve_time()
+    _, _, matched = engine.update(now)
+    save.record_resolve(engine, first, second, matched, now)
+    save.close()
+    assert path.stat().st_size == snapshot_size + RECORD.size
+    assert_same_game(load_game(str(path)).engine, engine)
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "game.wsav"
+    data = pack_snapshot(new_engine(), None, random.getstate(), 0)
+    
+    other_version = bytearray(data)
+    struct.pack_into("<H", other_version, 4, memory_snapshot.VERSION + 1)
+    cases = [
+        (bytes(other_version), "not a version"),
+        (b"WREC" + data[4:], "not a version"),
+        (data[:HEADER.size - 1], "truncated"),
+        (data[:-1], "truncated"),  # The arrays end early
+        (b"", "empty"),
+    ]
+    for contents, message in cases:
+        path.write_bytes(contents)
+        with pytest.raises(ValueError, match=message):
+            load_game(str(path))
@@ -0,0 +1,40 @@
+from enhanced_disney_witch_game import (QUALITY_LEVELS, QUALITY_MAX_UPGRADE_DELAY, QUALITY_UPGRADE_DELAY,
+                                        QUALITY_WINDOW, QualityGovernor)
+
+SLOW_MS = 40.0  # Over the 60 fps budget
+FAST_MS = 2.0  # Well under it
+
+def feed(governor, busy_ms, frames):
+    """Frames until the level changes; returns how many were fed"""
+    for frame in range(1, frames + 1):
+        if governor.add_frame(busy_ms):
+            return frame
+    return frames
+
+def test_delay_doubles_when_climbs_are_undone_straight_away():
+    governor = QualityGovernor(target_fps=60)
+    top = len(QUALITY_LEVELS) - 1
+    feed(governor, SLOW_MS, QUALITY_WINDOW)
+    assert governor.level == top - 1 and governor.upgrade_delay == QUALITY_UPGRADE_DELAY
+    
+    expected = QUALITY_UPGRADE_DELAY
+    for _ in range(8):
+        assert feed(governor, FAST_MS, 100000) == expected  # Climbs once the delay is up
+        feed(governor, SLOW_MS, QUALITY_WINDOW)  # ...and has to drop straight back
+        expected = min(expected * 2, QUALITY_MAX_UPGRADE_DELAY)
+        assert governor.level == top - 1 and governor.upgrade_delay == expected
+    assert governor.upgrade_delay == QUALITY_MAX_UPGRADE_DELAY
+
+def test_spike_long_after_a_climb_leaves_the_delay_alone():
+    governor = QualityGovernor(target_fps=60)
+    feed(governor, SLOW_MS, QUALITY_WINDOW)
+    feed(governor, FAST_MS, 100000)
+    feed(governor, SLOW_MS, QUALITY_WINDOW)
+    assert governor.upgrade_delay == QUALITY_UPGRADE_DELAY * 2
+    
+    feed(governor, FAST_MS, 100000)  # This climb holds for minutes
+    feed(governor, FAST_MS, 10000)
+    feed(governor, SLOW_MS, QUALITY_WINDOW)  # One victory burst
+    assert governor.level == len(QUALITY_LEVELS) - 2
+    assert governor.upgrade_delay == QUALITY_UPGRADE_DELAY
+    assert feed(governor, FAST_MS, 100000) == QUALITY_UPGRADE_DELAY
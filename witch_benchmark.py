@@ -0,0 +1,241 @@
+"""Headless frame-time benchmark for the Enhanced Disney Witch game.
+
+Boots EnhancedDisneyWitchGame with the SDL dummy video driver and a fixed
+random seed, then plays a scripted session (entrance, a mismatched pair,
+matches until the board is cleared, the victory burst) as fast as possible
+on a virtual 75 fps clock. Frame times and per-phase times are reported as
+JSON, optionally compared against a saved baseline:
+
+    python witch_benchmark.py --frames 3000 --save baseline.json
+    python witch_benchmark.py --frames 3000 --baseline baseline.json --tolerance 0.15
+
+With --board ROWSxCOLS the large-board mode is used and the camera drifts
+across the board while visible pairs are matched.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+# The dummy drivers must be chosen before pygame is imported, and its banner kept off the JSON on stdout
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+import enhanced_disney_witch_game as witch_game
+
+FRAME_MS = witch_game.SIM_STEP_MS  # One simulation step per frame
+VICTORY_FRAMES = 150  # How long to watch the victory burst before restarting
+CAMERA_DRIFT = (3, 1)  # Screen pixels the large-board camera pans each frame
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def summarize(samples):
+    """Distribution of a list of millisecond samples"""
+    values = sorted(samples)
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": values[-1] if values else 0.0,
+    }
+
+class ScriptedSession:
+    """Plays the game the same way every run: entrance, one miss, then every match"""
+    def __init__(self, game):
+        self.game = game
+        self.stage = "entrance"
+        self.victory_frames = 0
+        self.screen_rect = game.screen.get_rect()
+    
+    def click(self, card):
+        """Move the pointer onto the card and click it, through the game's event handling"""
+        pos = card.get_rect().center
+        self.game.handle_event(pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0)))
+        self.game.handle_event(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1))
+    
+    def clickable(self):
+        """Unmatched cards that are entirely on screen"""
+        return [card for card in self.game.cards
+                if not card.is_matched and self.screen_rect.contains(card.get_rect())]
+    
+    def waiting(self):
+        """True while a revealed pair is still being shown"""
+        return len(self.game.engine.pending) > 0
+    
+    def step(self):
+        """Perform this frame's scripted input"""
+        game = self.game
+        if game.large_board is not None:
+            game.large_board.camera.pan(*CAMERA_DRIFT)
+        
+        if self.stage == "entrance":
+            if all(card.entrance_complete for card in game.cards):
+                self.stage = "mismatch"
+        
+        elif self.stage == "mismatch":
+            cards = self.clickable()
+            first = cards[0]
+            other = next((card for card in cards if card.color != first.color), None)
+            if other is not None:
+                self.click(first)
+                self.click(other)
+            self.stage = "match"
+        
+        elif self.stage == "match" and not self.waiting():
+            if game.engine.won:
+                self.stage = "victory"
+                self.victory_frames = 0
+                return
+            hidden = self.clickable()
+            for i, first in enumerate(hidden):
+                partner = next((card for card in hidden[i + 1:] if card.color == first.color), None)
+                if partner is not None:
+                    self.click(first)
+                    self.click(partner)
+                    break
+        
+        elif self.stage == "victory":
+            self.victory_frames += 1
+            if self.victory_frames >= VICTORY_FRAMES:
+                game.restart_game()
+                self.stage = "entrance"
+
+def run_benchmark(frames, seed, dirty_rects=False, particle_engine=True, width=None, height=None,
+                  board=None, quality=None):
+    """Run the scripted session for a number of frames and return the report"""
+    random.seed(seed)
+    clock = {"ticks": 0}
+    witch_game.set_tick_source(lambda: clock["ticks"])
+    if width and height:
+        witch_game.WINDOW_WIDTH, witch_game.WINDOW_HEIGHT = width, height
+    
+    game = witch_game.EnhancedDisneyWitchGame(board_size=board)
+    game.dirty_rect_rendering = dirty_rects
+    if quality is not None:
+        game.apply_quality(witch_game.QUALITY_NAMES.index(quality))
+    if game.use_particle_engine != particle_engine:
+        game.toggle_particle_engine()
+    session = ScriptedSession(game)
+    # The game's own phase timers, keeping every frame instead of a rolling window
+    profiler = game.profiler = witch_game.FrameProfiler(history=frames)
+    profiler.enabled = True
+    stage_ms = {}
+    
+    for frame in range(frames):
+        clock["ticks"] = int(frame * FRAME_MS)
+        pygame.event.pump()
+        session.step()
+        
+        # One simulation step and one render, as the game loop runs them on a 75 fps frame clock
+        profiler.begin("frame")
+        profiler.begin("update")
+        game.update_simulation()
+        profiler.end("update")
+        game.render_frame(0.0)
+        profiler.end("frame")
+        stage_ms.setdefault(session.stage, []).append(profiler.frame_totals["frame"])
+        profiler.end_frame()
+    
+    witch_game.set_tick_source(None)
+    return {
+        "frames": frames,
+        "seed": seed,
+        "window": list(game.screen.get_size()),
+        "board": list(board) if board else [witch_game.ROWS, witch_game.COLS],
+        "live_cards": len(game.cards),
+        "board_bytes": game.engine.board.nbytes(),
+        "dirty_rects": dirty_rects,
+        "particle_engine": game.use_particle_engine,
+        "quality": game.quality["name"],
+        "frame_ms": summarize(profiler.samples.pop("frame")),
+        "phases_ms": {phase: summarize(samples) for phase, samples in profiler.samples.items()},
+        "stages_ms": {stage: summarize(samples) for stage, samples in stage_ms.items()},
+        "stamp_atlas": witch_game.STAMP_ATLAS.stats(),
+        "card_sprites": {
+            "hits": witch_game.CARD_SPRITES.hits,
+            "misses": witch_game.CARD_SPRITES.misses,
+        },
+        "text_cache": {
+            "hits": witch_game.TEXT_CACHE.hits,
+            "misses": witch_game.TEXT_CACHE.misses,
+        },
+    }
+
+def compare(report, baseline, tolerance):
+    """Ratios of current to baseline timings; anything above 1 + tolerance regressed"""
+    checks = [("frame", report["frame_ms"], baseline.get("frame_ms", {}))]
+    for phase, stats in report["phases_ms"].items():
+        checks.append((phase, stats, baseline.get("phases_ms", {}).get(phase, {})))
+    
+    results = {}
+    regressions = []
+    for name, current, previous in checks:
+        for metric in ("p50", "p95", "p99"):
+            # Phases too short to time reliably are not compared
+            if previous.get(metric, 0) < 0.01:
+                continue
+            ratio = current[metric] / previous[metric]
+            results[f"{name}.{metric}"] = round(ratio, 3)
+            if ratio > 1 + tolerance:
+                regressions.append(f"{name}.{metric}")
+    return {"tolerance": tolerance, "ratios": results, "regressions": regressions}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless frame-time benchmark")
+    parser.add_argument("--frames", type=int, default=2000, help="frames to simulate")
+    parser.add_argument("--seed", type=int, default=1234, help="random seed for the session")
+    parser.add_argument("--size", default=None, help="window size as WIDTHxHEIGHT")
+    parser.add_argument("--board", type=witch_game.board_size, default=None,
+                        help="large-board mode with ROWSxCOLS cards")
+    parser.add_argument("--dirty-rects", action="store_true", help="use dirty-rect rendering")
+    parser.add_argument("--legacy-particles", action="store_true",
+                        help="use per-object particles instead of the array engine")
+    parser.add_argument("--quality", choices=witch_game.QUALITY_NAMES, default=None,
+                        help="fixed effect quality level (default: full quality)")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--save", help="also save the report as a baseline file")
+    parser.add_argument("--baseline", help="compare against a saved baseline report")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed slowdown before a metric counts as a regression")
+    args = parser.parse_args(argv)
+    
+    width = height = None
+    if args.size:
+        width, height = (int(value) for value in args.size.lower().split("x"))
+    
+    witch_game.init_pygame()
+    report = run_benchmark(args.frames, args.seed, args.dirty_rects,
+                           not args.legacy_particles, width, height, args.board, args.quality)
+    
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            report["comparison"] = compare(report, json.load(baseline_file), args.tolerance)
+        if report["comparison"]["regressions"]:
+            exit_code = 1
+    
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(text + "\n")
+    else:
+        print(text)
+    if args.save:
+        with open(args.save, "w") as save_file:
+            save_file.write(text + "\n")
+    
+    pygame.quit()
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())